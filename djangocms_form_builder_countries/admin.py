@@ -0,0 +1,95 @@
+"""
+Admin integration for djangocms-form-builder-countries.
+
+Adds the "Submissions per country" view next to the form entries, with a
+streaming export of the entries.
+"""
+
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.translation import get_language
+
+from .models import CountrySubmission
+
+
+@admin.register(CountrySubmission)
+class CountrySubmissionAdmin(admin.ModelAdmin):
+    """Shows the number of form submissions per country instead of a change list."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+        return [
+            path("export/", self.admin_site.admin_view(self.export_view), name="{}_{}_export".format(*info)),
+            *super().get_urls(),
+        ]
+
+    def changelist_view(self, request, extra_context=None):
+        """Render the submissions per country, optionally of one form (``?form_name=...``)."""
+        if not self.has_view_permission(request):
+            return super().changelist_view(request, extra_context)
+        from .submissions import get_all_country_fields, get_submissions_per_country
+
+        form_name = request.GET.get("form_name") or None
+        # Read once for the form list and the counts
+        fields = get_all_country_fields()
+        rows = get_submissions_per_country(form_names=None if form_name is None else [form_name], fields=fields)
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": self.model._meta.verbose_name_plural,
+            "form_names": sorted(set().union(*fields.values())),
+            "form_name": form_name,
+            "rows": rows,
+            "total": sum(count for code, name, count in rows),
+            **(extra_context or {}),
+        }
+        return TemplateResponse(request, "admin/djangocms_form_builder_countries/submissions.html", context)
+
+    def export_view(self, request):
+        """
+        Stream the entries of forms with country fields as CSV or NDJSON.
+
+        Query parameters:
+            format: "csv" (default) or "ndjson"
+            form_name: Only export this form
+            after: Only export entries with a greater id, to resume an export
+            limit: Maximum number of entries
+        """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        from .export import CONTENT_TYPES, FORMAT_CSV, export_entries
+
+        export_format = request.GET.get("format", FORMAT_CSV)
+        if export_format not in CONTENT_TYPES:
+            return HttpResponseBadRequest("Unknown format.")
+        try:
+            after = int(request.GET.get("after", 0))
+            limit = int(request.GET["limit"]) if request.GET.get("limit") else None
+        except ValueError:
+            return HttpResponseBadRequest("after and limit must be integers.")
+        form_name = request.GET.get("form_name") or None
+
+        response = StreamingHttpResponse(
+            export_entries(
+                export_format,
+                form_names=None if form_name is None else [form_name],
+                after=after,
+                limit=limit,
+                language=get_language(),
+            ),
+            content_type=CONTENT_TYPES[export_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="country-submissions.{export_format}"'
+        return response
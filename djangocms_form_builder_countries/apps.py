@@ -3,6 +3,9 @@ Django application configuration for djangocms-form-builder-countries.
 """
 
 from django.apps import AppConfig
+from django.conf import settings
+
+from .constants import PREWARM_SETTING
 
 
 class CountriesFieldConfig(AppConfig):
@@ -12,5 +15,15 @@ class CountriesFieldConfig(AppConfig):
     verbose_name = "Django CMS Form Builder Countries"
 
     def ready(self):
-        """Register CMS plugins when the application is ready."""
-        from . import cms_plugins  # noqa: F401
+        """
+        Start prewarming the country choice tables if
+        ``DJANGOCMS_FORM_BUILDER_COUNTRIES_PREWARM`` is set.
+
+        django CMS imports ``cms_plugins``, and with it the plugin form, when
+        it discovers the plugins on startup. The country tables, the search
+        index, the widgets and the exports are imported on first use only.
+        """
+        if getattr(settings, PREWARM_SETTING, False):
+            from .prewarm import prewarm_in_background
+
+            prewarm_in_background()
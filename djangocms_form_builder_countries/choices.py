@@ -0,0 +1,708 @@
+"""
+Cached country choice tables.
+
+Building the choices for a country select translates and sorts all
+ISO 3166-1 names. The result only depends on the active language, so
+there is one immutable CountryTable per language. The choices of a field
+configuration (``countries_first``, blank choice) are CountryChoices
+views over that table, which store positions instead of copying the
+(code, name) pairs, and are shared between all form builds. Fields
+limited to some countries (``countries_only``, ``countries_exclude``)
+store only the positions of those countries, so that their choices,
+rendered options and valid codes shrink together.
+
+Country tables missing from the in-process memo are looked up in the
+Django cache configured by ``DJANGOCMS_FORM_BUILDER_COUNTRIES_CACHE``
+(default: ``"default"``) before they are built, so that new processes can
+reuse the tables stored by other processes or by the
+``warm_country_choices`` management command. Tables are built from the
+orders precollated by the ``collate_countries`` command if available.
+
+If ``DJANGOCMS_FORM_BUILDER_COUNTRIES_SHARED_CHOICES`` is set, the orders
+of the choice tables are stored in the Django cache as well, and all keys
+include a version stored in the same cache. Saving or deleting a
+CountryField and changing the settings bumps the version. Every process
+compares its version with the stored one at most every
+VERSION_CHECK_INTERVAL seconds and drops its memoized tables when they
+differ, so that all processes read the tables rebuilt once for the new
+version.
+"""
+
+import hashlib
+import threading
+import time
+import weakref
+from array import array
+from collections.abc import Iterable
+from functools import lru_cache
+from itertools import zip_longest
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import Signal, receiver
+from django.utils.translation import get_language, override
+from django.utils.translation import gettext_lazy as _
+from django_countries import countries
+
+from . import metrics
+from .constants import COLLATION_SETTING, CONFIG_VERSION, CONFIG_VERSION_KEY, SHARED_CHOICES_SETTING
+
+try:
+    from django.utils.choices import BaseChoiceIterator
+except ImportError:  # Django < 5.0
+
+    class BaseChoiceIterator:
+        """Base class for lazy choice iterators, as added in Django 5.0."""
+
+        def __eq__(self, other):
+            if isinstance(other, Iterable):
+                return all(a == b for a, b in zip_longest(self, other, fillvalue=object()))
+            return super().__eq__(other)
+
+
+# Maximum number of distinct (language, configuration) tables kept in memory
+CHOICES_CACHE_SIZE = 256
+
+# Maximum number of languages country tables are kept in memory for
+TABLE_CACHE_SIZE = 64
+
+# Django cache alias the country tables are shared through
+CACHE_SETTING = "DJANGOCMS_FORM_BUILDER_COUNTRIES_CACHE"
+CACHE_KEY_PREFIX = "djangocms_form_builder_countries:countries"
+CHOICES_KEY_PREFIX = "djangocms_form_builder_countries:choices"
+VERSION_KEY = "djangocms_form_builder_countries:version"
+
+# Seconds between two reads of the shared version by a process
+VERSION_CHECK_INTERVAL = 1.0
+
+# Separator inserted between the priority countries and the remaining ones,
+# and its position in the order of a CountryChoices view. Its value is no
+# country code and not blank, so that submitting it fails validation even on
+# optional fields.
+SEPARATOR = ("---", "---")
+SEPARATOR_INDEX = -1
+
+# Sent after the memoized tables have been dropped, so that caches derived
+# from them (e.g. pre-rendered widget options) can be dropped as well
+choices_cleared = Signal()
+
+
+class CountryTable:
+    """
+    All countries of one language in display order.
+
+    Built once per language and shared by all CountryChoices views of that
+    language. Holds plain (code, name) tuples, so that it can be stored in
+    the Django cache.
+
+    Args:
+        choices: (code, name) pairs in display order
+    """
+
+    __slots__ = ("choices", "positions", "__weakref__")
+
+    def __init__(self, choices):
+        self.choices = tuple((str(code), str(name)) for code, name in choices)
+        self.positions = {code: index for index, (code, name) in enumerate(self.choices)}
+
+    def __len__(self):
+        return len(self.choices)
+
+
+class CountryChoices(BaseChoiceIterator):
+    """
+    Immutable choices of a country select, as a view over a CountryTable.
+
+    Country fields and their widgets keep the instance instead of copying
+    it into new lists (see ``fields.SharedChoicesMixin``), so a single
+    instance is shared by all fields with the same language and
+    configuration.
+
+    Args:
+        table: CountryTable of the language
+        order: Positions in ``table`` in display order, SEPARATOR_INDEX for
+            the separator
+        blank_label: Label of the leading blank choice, None for none
+    """
+
+    def __init__(self, table, order, blank_label=None):
+        self.table = table
+        self.order = order
+        self.blank = None if blank_label is None else ("", blank_label)
+
+    def __iter__(self):
+        if self.blank is not None:
+            yield self.blank
+        choices = self.table.choices
+        for position in self.order:
+            yield SEPARATOR if position == SEPARATOR_INDEX else choices[position]
+
+    def __len__(self):
+        return len(self.order) + (self.blank is not None)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        if index < 0:
+            index += len(self)
+        if self.blank is not None:
+            if index == 0:
+                return self.blank
+            index -= 1
+        if not 0 <= index < len(self.order):
+            raise IndexError("index out of range")
+        position = self.order[index]
+        return SEPARATOR if position == SEPARATOR_INDEX else self.table.choices[position]
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {len(self)} choices>"
+
+
+def normalize_codes(codes):
+    """
+    Normalize a list of country codes for use as a cache key.
+
+    Codes are uppercased and de-duplicated, keeping their first position.
+
+    Returns:
+        tuple: Normalized country codes
+    """
+    return tuple(dict.fromkeys(str(code).upper() for code in codes or ()))
+
+
+def get_countries_first(config):
+    """
+    Return the normalized countries_first of a CountryField config.
+
+    CountryFieldForm normalizes the list when the plugin is saved and marks
+    the config with CONFIG_VERSION. Configs saved before are normalized
+    here and upgraded in place, so that later calls skip the work.
+
+    Returns:
+        tuple: Uppercased, de-duplicated country codes
+    """
+    countries_first = config.get("countries_first") or ()
+    if config.get(CONFIG_VERSION_KEY) == CONFIG_VERSION:
+        return tuple(countries_first)
+    countries_first = normalize_codes(countries_first)
+    config["countries_first"] = list(countries_first)
+    config[CONFIG_VERSION_KEY] = CONFIG_VERSION
+    return countries_first
+
+
+def get_country_selection(config):
+    """
+    Return the countries selectable in a CountryField config.
+
+    Expands the regions in ``countries_only`` and ``countries_exclude``
+    and applies both lists to all countries. The result is memoized per
+    distinct pair of lists.
+
+    Returns:
+        tuple: Sorted country codes, or None if all countries are selectable
+    """
+    only = config.get("countries_only") or ()
+    exclude = config.get("countries_exclude") or ()
+    if not only and not exclude:
+        return None
+    return _build_selection(tuple(only), tuple(exclude))
+
+
+@lru_cache(maxsize=CHOICES_CACHE_SIZE)
+def _build_selection(only, exclude):
+    from .regions import expand_codes
+
+    codes = get_country_codes()
+    if only:
+        codes = codes & expand_codes(normalize_codes(only))
+    return tuple(sorted(codes - expand_codes(normalize_codes(exclude))))
+
+
+def get_valid_codes(countries=None):
+    """
+    Return the codes a field limited to some countries accepts.
+
+    Args:
+        countries: Selectable countries as returned by get_country_selection()
+
+    Returns:
+        frozenset: Valid country codes, shared between callers
+    """
+    if countries is None:
+        return get_country_codes()
+    return _build_valid_codes(countries)
+
+
+@lru_cache(maxsize=CHOICES_CACHE_SIZE)
+def _build_valid_codes(countries):
+    return frozenset(countries)
+
+
+def get_choices_key(countries_first=(), required=False, placeholder="", normalized=False, countries=None):
+    """
+    Return the key identifying a choice table in the active language.
+
+    Args:
+        countries_first: Country codes to show before all other countries
+        required: Whether the field is required (no blank choice is added)
+        placeholder: Label of the blank choice for optional fields
+        normalized: Whether countries_first already is a tuple returned by
+            normalize_codes() and countries one returned by
+            get_country_selection()
+        countries: Selectable country codes, None for all countries
+
+    Returns:
+        tuple: Hashable (language, countries_first, required, placeholder,
+        countries)
+    """
+    if not normalized:
+        countries_first = normalize_codes(countries_first)
+        if countries is not None:
+            countries = tuple(sorted(normalize_codes(countries)))
+    return (
+        get_language(),
+        countries_first,
+        bool(required),
+        placeholder or "",
+        countries,
+    )
+
+
+def get_country_choices(countries_first=(), required=False, placeholder="", countries=None):
+    """
+    Return the choices for a country select in the active language.
+
+    Takes the same arguments as get_choices_key().
+
+    Returns:
+        CountryChoices: Immutable (code, name) pairs, shared between callers
+    """
+    return get_choices_for_key(get_choices_key(countries_first, required, placeholder, countries=countries))
+
+
+def get_all_countries():
+    """
+    Return all countries in the active language, without blank choice.
+
+    Suitable as lazy ``choices`` callable for form fields.
+    """
+    return get_country_choices(required=True)
+
+
+def get_choices_for_key(key):
+    """Return the choice table for a key built by get_choices_key()."""
+    metrics.count("choices.lookup")
+    if is_shared():
+        sync_cache_version()
+    return _build_choices(*key)
+
+
+async def aget_choices_for_key(key):
+    """
+    Async version of get_choices_for_key().
+
+    Reads the country table and, if choices are shared, the order of the
+    choice table with the async Django cache API, see aget_country_table().
+    """
+    language, countries_first, required, placeholder, countries = key
+    table = await aget_country_table(language)
+    order_key = (language, countries_first, countries)
+    if is_shared() and order_key not in _built_orders:
+        cache = get_cache()
+        cache_key = get_choices_cache_key(order_key)
+        order = await cache.aget(cache_key)
+        if order is None:
+            order = build_order(table, countries_first, countries)
+            await cache.aset(cache_key, order)
+        _fetched_orders[order_key] = order
+    # The shared version was just checked by aget_country_table()
+    metrics.count("choices.lookup")
+    return _build_choices(*key)
+
+
+# Shared orders read by aget_choices_for_key(), handed over to the memo
+_fetched_orders = {}
+
+# (language, countries_first, countries) of the memoized shared orders, see
+# _built_languages
+_built_orders = set()
+
+
+@lru_cache(maxsize=CHOICES_CACHE_SIZE)
+def _build_choices(language, countries_first, required, placeholder, countries=None):
+    metrics.count("choices.miss")
+    # The shared version is checked by the callers
+    table = _build_table(language)
+    if is_shared():
+        order_key = (language, countries_first, countries)
+        order = _fetched_orders.pop(order_key, None)
+        if order is None:
+            cache = get_cache()
+            cache_key = get_choices_cache_key(order_key)
+            order = cache.get(cache_key)
+            if order is None:
+                order = build_order(table, countries_first, countries)
+                cache.set(cache_key, order)
+        _built_orders.add(order_key)
+    else:
+        order = build_order(table, countries_first, countries)
+
+    blank_label = None
+    if not required:
+        blank_label = placeholder if placeholder else _("Select a country")
+
+    return CountryChoices(table, order, blank_label)
+
+
+def build_order(table, countries_first=(), countries=None):
+    """
+    Return the display order of a country table with countries shown first.
+
+    Args:
+        table: CountryTable of the language
+        countries_first: Normalized country codes to show first
+        countries: Selectable country codes, None for all countries
+
+    Returns:
+        range or array: Positions in ``table``, SEPARATOR_INDEX for the
+        separator
+    """
+    if countries is None:
+        order = range(len(table))
+    else:
+        positions = table.positions
+        order = array("h", sorted(positions[code] for code in countries if code in positions))
+        countries_first = [code for code in countries_first if code in countries]
+    if countries_first:
+        first = [table.positions[code] for code in countries_first if code in table.positions]
+        if first:
+            # Priority countries in their configured order, then the separator
+            # and all remaining countries
+            remaining = set(order).difference(first)
+            order = array("h", [*first, SEPARATOR_INDEX, *(i for i in order if i in remaining)])
+    return order
+
+
+def get_country_table(language=None):
+    """
+    Return the country table of a language (default: the active language).
+
+    Returns:
+        CountryTable: Shared table, do not mutate
+    """
+    if language is None:
+        language = get_language()
+    if is_shared():
+        sync_cache_version()
+    return _build_table(language)
+
+
+async def aget_country_table(language=None):
+    """
+    Async version of get_country_table().
+
+    Reads and stores the table with the async Django cache API instead of
+    blocking the event loop. Once the table of a language is memoized, it is
+    returned without awaiting anything, and the sync functions building
+    choices and form fields do not access the cache either.
+
+    Returns:
+        CountryTable: Shared table, do not mutate
+    """
+    if language is None:
+        language = get_language()
+    if is_shared() and _is_version_check_due():
+        sync_cache_version(await aget_cache_version())
+    if language not in _built_languages:
+        cache = get_cache()
+        cache_key = get_cache_key(language)
+        table = await cache.aget(cache_key)
+        if table is None:
+            # Built by another task while this one was waiting for the cache
+            table = _live_tables.get(language)
+        if table is None:
+            with override(language):
+                table = build_country_table()
+            _live_tables[language] = table
+            await cache.aset(cache_key, table)
+        _fetched_tables[language] = table
+    return _build_table(language)
+
+
+# Tables read by aget_country_table(), handed over to the memo
+_fetched_tables = {}
+
+# Languages whose table has been memoized. A language evicted from the memo
+# is still listed, so its table is read again through the sync path.
+_built_languages = set()
+
+# Tables in use by language, so that concurrent misses of the memo share the
+# table built by the first one. Entries go away with the last reference.
+_live_tables = weakref.WeakValueDictionary()
+_table_lock = threading.Lock()
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def _build_table(language):
+    # lru_cache does not lock, so threads missing the memo at the same time
+    # all get here. The first one builds the table, the others wait for it.
+    with _table_lock:
+        table = _fetched_tables.pop(language, None)
+        if table is None:
+            table = _live_tables.get(language)
+        if table is None:
+            cache = get_cache()
+            cache_key = get_cache_key(language)
+            table = cache.get(cache_key)
+            if table is None:
+                with override(language):
+                    table = build_country_table()
+                cache.set(cache_key, table)
+        _live_tables[language] = table
+        _built_languages.add(language)
+    return table
+
+
+def build_country_table():
+    """
+    Build the country table of the active language, bypassing all caches.
+
+    Uses the precollated order of the language if a matching collation
+    file is configured, see the collation module.
+
+    Returns:
+        CountryTable: All countries sorted by their localized names
+    """
+    from .collation import get_collated_codes, translate
+
+    codes = get_collated_codes(get_language())
+    if codes is None:
+        return CountryTable(countries)
+    return CountryTable(translate(codes))
+
+
+def get_country_names(language=None):
+    """
+    Return the names of all countries in a language (default: the active language).
+
+    Returns:
+        dict: Country codes mapped to their localized names, shared between
+        callers, do not mutate
+    """
+    if language is None:
+        language = get_language()
+    return _build_names(language)
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def _build_names(language):
+    return {code: name for code, name in get_country_table(language).choices if code}
+
+
+def get_country_codes():
+    """
+    Return the codes of all selectable countries.
+
+    Returns:
+        frozenset: Valid ISO 3166-1 alpha-2 codes, without the blank and
+        separator values
+    """
+    return _build_codes()
+
+
+@lru_cache(maxsize=1)
+def _build_codes():
+    return frozenset(countries.countries)
+
+
+def get_cache():
+    """Return the Django cache country tables are shared through."""
+    return caches[getattr(settings, CACHE_SETTING, "default")]
+
+
+@lru_cache(maxsize=1)
+def get_countries_fingerprint():
+    """
+    Return what the country tables are built from besides the language.
+
+    Returns:
+        tuple: The django-countries version and the ``COUNTRIES_*``
+        settings, as (name, repr) pairs
+    """
+    # importlib.metadata is slow to import and only needed once
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        countries_version = version("django-countries")
+    except PackageNotFoundError:
+        countries_version = None
+    # Settings often hold lazy translations, e.g. the names in
+    # COUNTRIES_OVERRIDE. Without an active language they are represented
+    # by their message ids, so the fingerprint is the same in every process.
+    with override(None):
+        countries_settings = sorted(
+            (name, repr(getattr(settings, name))) for name in dir(settings) if name.startswith("COUNTRIES_")
+        )
+    return countries_version, countries_settings
+
+
+def get_cache_key(language):
+    """
+    Return the Django cache key of the country table of a language.
+
+    The key includes the django-countries version and settings, so that
+    tables stored for another country list are never read, and the shared
+    version if choices are shared.
+    """
+    return f"{CACHE_KEY_PREFIX}:{_get_digest(language)}"
+
+
+def get_choices_cache_key(order_key):
+    """
+    Return the Django cache key of the order of a shared choice table.
+
+    Args:
+        order_key: (language, countries_first, countries) of the choice table
+    """
+    return f"{CHOICES_KEY_PREFIX}:{_get_digest(order_key)}"
+
+
+def _get_digest(key):
+    if is_shared():
+        key = (key, get_local_version())
+    digest = hashlib.md5(repr((key, get_countries_fingerprint())).encode(), usedforsecurity=False)
+    return digest.hexdigest()
+
+
+def is_shared():
+    """Return whether choice tables are shared through the Django cache under versioned keys."""
+    return getattr(settings, SHARED_CHOICES_SETTING, False)
+
+
+# Shared version the memoized tables of this process belong to, and the
+# time.monotonic() it was last read at
+_version = {"version": None, "checked": None}
+
+
+def get_cache_version():
+    """
+    Return the version of the shared choice tables.
+
+    A missing version, e.g. after the cache was cleared, is replaced by a
+    new one, so that processes still using an older version notice the
+    change.
+    """
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _new_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_cache_version():
+    """Async version of get_cache_version()."""
+    cache = get_cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, _new_version(), timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def get_local_version():
+    """Return the shared version the memoized tables of this process belong to."""
+    if _version["version"] is None:
+        sync_cache_version(get_cache_version())
+    return _version["version"]
+
+
+def _is_version_check_due():
+    checked = _version["checked"]
+    return checked is None or time.monotonic() - checked >= VERSION_CHECK_INTERVAL
+
+
+def sync_cache_version(version=None):
+    """
+    Drop the memoized tables if the shared version has changed.
+
+    Args:
+        version: The shared version, read from the cache if it was not
+            read within VERSION_CHECK_INTERVAL seconds
+    """
+    if version is None:
+        if not _is_version_check_due():
+            return
+        version = get_cache_version()
+    _version["checked"] = time.monotonic()
+    if version != _version["version"]:
+        if _version["version"] is not None:
+            clear_cache()
+        _version["version"] = version
+
+
+def bump_cache_version():
+    """
+    Invalidate the shared choice tables of all processes.
+
+    Starts a new version and drops the memoized tables of this process.
+    Other processes drop theirs when they next read the version.
+    """
+    cache = get_cache()
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        version = _new_version()
+        cache.set(VERSION_KEY, version, timeout=None)
+    clear_cache()
+    _version.update(version=version, checked=time.monotonic())
+
+
+def invalidate_choices():
+    """Drop the memoized tables of this process, and of all processes if choices are shared."""
+    if is_shared():
+        bump_cache_version()
+    else:
+        clear_cache()
+
+
+def clear_cache():
+    """Drop all memoized country tables, choices, names, selections and code sets."""
+    _build_choices.cache_clear()
+    _build_table.cache_clear()
+    _fetched_tables.clear()
+    _built_languages.clear()
+    _live_tables.clear()
+    _fetched_orders.clear()
+    _built_orders.clear()
+    _build_names.cache_clear()
+    _build_codes.cache_clear()
+    _build_selection.cache_clear()
+    _build_valid_codes.cache_clear()
+    get_countries_fingerprint.cache_clear()
+    choices_cleared.send(sender=None)
+
+
+@receiver(setting_changed)
+def reset_on_setting_changed(*, setting, **kwargs):
+    """Invalidate cached tables when a django-countries or collation setting changes."""
+    if setting.startswith("COUNTRIES_"):
+        # django-countries keeps its own per-instance cache of the country dict
+        del countries.countries
+        invalidate_choices()
+    elif setting in (COLLATION_SETTING, SHARED_CHOICES_SETTING):
+        invalidate_choices()
+    elif setting == CACHE_SETTING:
+        _version.update(version=None, checked=None)
+        clear_cache()
@@ -1,23 +1,43 @@
 """
-CMS Plugin registration for country field.
+CMS Plugin registration for country fields.
 
-Registers the CountryFieldPlugin with the Django CMS plugin pool,
-making it available in the Form Builder structure board.
+Registers the CountryFieldPlugin and CountryMultiFieldPlugin with the
+Django CMS plugin pool, making them available in the Form Builder
+structure board.
 """
 
+from cms.constants import EXPIRE_NOW
 from cms.plugin_pool import plugin_pool
+from django.conf import settings as django_settings
 from django.utils.translation import gettext_lazy as _
 from djangocms_form_builder import forms as form_builder_forms
 from djangocms_form_builder import settings as form_builder_settings
 from djangocms_form_builder.cms_plugins.form_plugins import FormElementPlugin
 
-from .forms import CountryFieldForm
-from .models import CountryField
+from .constants import GEOIP_SETTING, MODE_REMOTE, MODE_STATIC
+from .forms import CountryFieldForm, CountryMultiFieldForm
+from .models import CountryField, CountryMultiField
 
 # Get mixin factory from form builder settings
 mixin_factory = form_builder_settings.get_renderer(form_builder_forms)
 
 
+def get_form_cache_expiration(request):
+    """
+    Return EXPIRE_NOW if a country field render cannot be cached, else None.
+
+    Renders for submitted data may show the submitted value. The wrapping
+    form embeds the CSRF token inline if CSRF_COOKIE_HTTPONLY is set, see
+    FormPlugin.cache. The setting is read on every call, so that it can be
+    changed after the plugins have been imported.
+    """
+    if request is not None and request.method not in ("GET", "HEAD"):
+        return EXPIRE_NOW
+    if django_settings.CSRF_COOKIE_HTTPONLY:
+        return EXPIRE_NOW
+    return None
+
+
 @plugin_pool.register_plugin
 class CountryFieldPlugin(mixin_factory("SelectField"), FormElementPlugin):
     """
@@ -29,6 +49,7 @@ class CountryFieldPlugin(mixin_factory("SelectField"), FormElementPlugin):
     Features:
         - All countries with localized names
         - Option to show specific countries first (e.g., DACH region)
+        - Optional on-demand country search instead of the full list
         - Integrates with Form Builder's validation and submission system
     """
 
@@ -52,18 +73,100 @@ class CountryFieldPlugin(mixin_factory("SelectField"), FormElementPlugin):
             {
                 "classes": ("collapse",),
                 "description": _(
-                    "Configure which countries to show first in the dropdown. "
-                    "This is useful for forms targeting specific regions."
+                    "Configure which countries to offer and which to show first in the "
+                    "dropdown. This is useful for forms targeting specific regions."
+                ),
+                "fields": (
+                    "countries_first",
+                    ("countries_only", "countries_exclude"),
+                    "countries_mode",
+                    "countries_preselect",
                 ),
-                "fields": ("countries_first",),
             },
         ),
     )
 
+    field_template = f"djangocms_form_builder/{form_builder_settings.framework}/widgets/base.html"
+
+    # The select only depends on the plugin configuration and the active
+    # language. The CMS keys its placeholder and page caches by language, so
+    # there is no need to vary on Accept-Language, which would store a copy
+    # per distinct header. Renders that cannot be cached are declared by
+    # get_cache_expiration().
+    cache = True
+
+    def get_cache_expiration(self, request, instance, placeholder):
+        """
+        Declare how long the rendered select can be cached.
+
+        Unbound selects can be cached until the plugin or the country tables
+        change, which invalidates the CMS caches. Renders for submitted data,
+        see get_form_cache_expiration(), and preselected countries, which
+        depend on the client IP, are not cached.
+        """
+        if get_form_cache_expiration(request) == EXPIRE_NOW:
+            return EXPIRE_NOW
+        if getattr(django_settings, GEOIP_SETTING, None) and instance.config.get("countries_preselect"):
+            return EXPIRE_NOW
+        return None
+
+    def render(self, context, instance, placeholder):
+        """Provide the framework field template to wrapping templates."""
+        context = super().render(context, instance, placeholder)
+        context["field_template"] = self.field_template
+        return context
+
     def get_render_template(self, context, instance, placeholder):
         """
         Return the template for rendering the country field.
 
-        Uses the standard form builder select template.
+        Uses the standard form builder select template. The remote and
+        static modes wrap it to add the script loading the countries.
         """
-        return f"djangocms_form_builder/{form_builder_settings.framework}/widgets/base.html"
+        if instance.config.get("countries_mode") == MODE_REMOTE:
+            return "djangocms_form_builder_countries/country_search.html"
+        if instance.config.get("countries_mode") == MODE_STATIC:
+            return "djangocms_form_builder_countries/country_list.html"
+        return self.field_template
+
+
+@plugin_pool.register_plugin
+class CountryMultiFieldPlugin(mixin_factory("SelectField"), FormElementPlugin):
+    """
+    Django CMS plugin for selecting several countries in forms.
+
+    Renders a multiple select of all countries, or of the countries
+    offered by the field. The selection is stored as bitmask in the form
+    submissions, see country_sets.
+    """
+
+    name = _("Countries")
+    module = _("Forms")
+    model = CountryMultiField
+    form = CountryMultiFieldForm
+
+    fieldsets = (
+        (
+            None,
+            {
+                "fields": (
+                    ("field_label", "field_name"),
+                    "field_required",
+                )
+            },
+        ),
+        (
+            _("Country Options"),
+            {
+                "classes": ("collapse",),
+                "description": _("Configure which countries to offer."),
+                "fields": (("countries_only", "countries_exclude"),),
+            },
+        ),
+    )
+
+    cache = True
+
+    def get_cache_expiration(self, request, instance, placeholder):
+        """Declare how long the rendered select can be cached, see get_form_cache_expiration()."""
+        return get_form_cache_expiration(request)
@@ -0,0 +1,214 @@
+"""
+Precollated country orderings.
+
+Sorting the translated country names is the most expensive part of
+building a country table. The ``collate_countries`` management command
+sorts the countries of every language once, at build or deploy time,
+and writes the resulting orders to a compact file. If
+``DJANGOCMS_FORM_BUILDER_COUNTRIES_COLLATION`` points to that file, it
+is memory-mapped on first use and country tables are built by
+translating the names in the stored order, without sorting.
+
+The file records a fingerprint of the django-countries version and the
+``COUNTRIES_*`` settings. If they change (e.g. ``COUNTRIES_OVERRIDE`` or
+``COUNTRIES_ONLY``), or a language is missing from the file, tables are
+built and sorted by django-countries as before.
+
+File layout: the magic bytes, the length of a JSON header as unsigned
+32-bit integer, the header, then one array of unsigned 16-bit code
+positions per language. The header holds the fingerprint, the byte
+order, the country codes and the offset (after the header) and length of
+every array.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from functools import lru_cache
+
+from django.conf import settings
+from django.dispatch import receiver
+from django.utils.encoding import force_str
+from django.utils.translation import override
+from django_countries import countries
+
+from .choices import choices_cleared, get_countries_fingerprint
+from .constants import COLLATION_SETTING
+
+MAGIC = b"DCFBCC1\n"
+HEADER_LENGTH = struct.Struct("<I")
+
+# Code of the break entry django-countries inserts after COUNTRIES_FIRST
+BREAK_CODE = ""
+
+
+class CollationError(ValueError):
+    """Raised when a collation file cannot be read."""
+
+
+class Collation:
+    """
+    Country orderings of several languages, read from a collation file.
+
+    Args:
+        buffer: Contents of the file, usually a memory map
+    """
+
+    __slots__ = ("buffer", "fingerprint", "codes", "languages")
+
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        start = len(MAGIC) + HEADER_LENGTH.size
+        if bytes(view[: len(MAGIC)]) != MAGIC or len(view) < start:
+            raise CollationError("Not a country collation file.")
+        (length,) = HEADER_LENGTH.unpack_from(view, len(MAGIC))
+        try:
+            header = json.loads(bytes(view[start : start + length]))
+        except ValueError as error:
+            raise CollationError(f"Invalid collation header: {error}") from error
+        if header.get("byteorder") != sys.byteorder:
+            raise CollationError("The collation file was written with another byte order.")
+        data = view[start + length :]
+        self.buffer = buffer
+        self.fingerprint = header["fingerprint"]
+        self.codes = tuple(header["codes"])
+        self.languages = {
+            language: data[offset : offset + 2 * count].cast("H")
+            for language, (offset, count) in header["languages"].items()
+        }
+
+    def get_codes(self, language):
+        """
+        Return the country codes of a language in display order.
+
+        Returns:
+            list: Country codes, BREAK_CODE for the break entry, or None if
+            the language was not collated
+        """
+        positions = self.languages.get(language)
+        if positions is None:
+            return None
+        codes = self.codes
+        return [codes[position] for position in positions]
+
+
+def get_fingerprint():
+    """Return the fingerprint of the current django-countries version and settings."""
+    return hashlib.md5(repr(get_countries_fingerprint()).encode(), usedforsecurity=False).hexdigest()
+
+
+def collate(language):
+    """
+    Sort the countries of a language with django-countries.
+
+    Returns:
+        list: Country codes in display order, or None if the order cannot
+        be reproduced from the codes alone (e.g. countries with several
+        names in ``COUNTRIES_OVERRIDE``)
+    """
+    with override(language):
+        expected = [(code, force_str(name)) for code, name in countries]
+        codes = [code for code, name in expected]
+        if list(translate(codes)) != expected:
+            return None
+    return codes
+
+
+def translate(codes):
+    """
+    Translate country codes into (code, name) pairs in the active language.
+
+    Args:
+        codes: Country codes, as returned by Collation.get_codes()
+    """
+    for code in codes:
+        if code == BREAK_CODE:
+            yield BREAK_CODE, force_str(countries.get_option("first_break"))
+        else:
+            yield countries.translate_pair(code)
+
+
+def write_collation(path, orders):
+    """
+    Write country orders to a collation file.
+
+    The file is written next to ``path`` and moved into place, so that
+    running processes keep reading their memory-mapped copy.
+
+    Args:
+        path: Path of the file
+        orders: Dictionary of language codes to country codes, see collate()
+    """
+    codes = sorted({code for order in orders.values() for code in order})
+    positions = {code: index for index, code in enumerate(codes)}
+    arrays = {language: array("H", (positions[code] for code in order)) for language, order in orders.items()}
+
+    languages = {}
+    offset = 0
+    for language, order in arrays.items():
+        languages[language] = [offset, len(order)]
+        offset += len(order) * order.itemsize
+    header = {
+        "fingerprint": get_fingerprint(),
+        "byteorder": sys.byteorder,
+        "codes": codes,
+        "languages": languages,
+    }
+    header = json.dumps(header, separators=(",", ":")).encode()
+    # Keep the arrays aligned to their item size
+    header += b" " * ((len(MAGIC) + HEADER_LENGTH.size + len(header)) % 2)
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(MAGIC)
+        file.write(HEADER_LENGTH.pack(len(header)))
+        file.write(header)
+        for order in arrays.values():
+            order.tofile(file)
+    os.replace(temporary, path)
+
+
+def get_collation_path():
+    """Return the configured path of the collation file, or None."""
+    return getattr(settings, COLLATION_SETTING, None)
+
+
+def get_collated_codes(language):
+    """
+    Return the precollated country codes of a language.
+
+    Returns:
+        list: Country codes in display order, or None if no collation file
+        is configured, it does not match the current django-countries
+        version and settings, or it does not contain the language
+    """
+    path = get_collation_path()
+    if not path:
+        return None
+    collation = _load_collation(os.fspath(path))
+    if collation is None or collation.fingerprint != get_fingerprint():
+        return None
+    return collation.get_codes(language)
+
+
+@lru_cache(maxsize=1)
+def _load_collation(path):
+    try:
+        with open(path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        return Collation(buffer)
+    except (CollationError, KeyError, TypeError, ValueError):
+        return None
+
+
+@receiver(choices_cleared)
+def reset_on_choices_cleared(**kwargs):
+    """Reopen the collation file after the country tables have been dropped."""
+    _load_collation.cache_clear()
@@ -0,0 +1,31 @@
+"""
+Constants for the country field plugin.
+"""
+
+from django.utils.translation import gettext_lazy as _
+
+# How the country list is delivered to the browser
+MODE_SELECT = "select"
+MODE_REMOTE = "remote"
+MODE_STATIC = "static"
+
+MODE_CHOICES = (
+    (MODE_SELECT, _("Drop down with all countries")),
+    (MODE_REMOTE, _("Search countries on demand")),
+    (MODE_STATIC, _("Drop down loaded from a cached file")),
+)
+
+# Version of the config layout written by CountryFieldForm. Configs with
+# this version store countries_first normalized (see choices.normalize_codes)
+CONFIG_VERSION = 1
+CONFIG_VERSION_KEY = "countries_config_version"
+
+# Default and maximum number of results returned by a search
+SEARCH_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+
+# Settings checked without importing the modules using them
+PREWARM_SETTING = "DJANGOCMS_FORM_BUILDER_COUNTRIES_PREWARM"
+COLLATION_SETTING = "DJANGOCMS_FORM_BUILDER_COUNTRIES_COLLATION"
+SHARED_CHOICES_SETTING = "DJANGOCMS_FORM_BUILDER_COUNTRIES_SHARED_CHOICES"
+GEOIP_SETTING = "DJANGOCMS_FORM_BUILDER_COUNTRIES_GEOIP_DATABASE"
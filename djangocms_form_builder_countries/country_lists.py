@@ -0,0 +1,168 @@
+"""
+Static country lists.
+
+Country fields in the static mode render an empty select, which loads its
+options from a JSON file per language served as static file. The name of
+the file contains a hash of its content, so that browsers and CDNs can
+cache it indefinitely and a changed list is published under a new name.
+The ``countries_first`` of a field are applied in the browser.
+
+The lists hold the country tables of the choices module, the same data
+submitted values are validated against. They are written by the
+``build_country_lists`` management command, and by the static files
+finder in finders.py when ``collectstatic`` runs or static files are
+served in development. Selects render all options as long as the list of
+their language is not published.
+"""
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.templatetags.static import static
+from django.utils.translation import get_language
+
+from .choices import TABLE_CACHE_SIZE, choices_cleared, get_country_table
+
+LISTS_DIR_SETTING = "DJANGOCMS_FORM_BUILDER_COUNTRIES_LISTS_DIR"
+
+# Static path the lists are published under
+STATIC_PREFIX = "djangocms_form_builder_countries/countries"
+
+# Settings deciding whether a list is published
+STATIC_SETTINGS = {
+    "DEBUG",
+    "STATIC_ROOT",
+    "STATIC_URL",
+    "STATICFILES_DIRS",
+    "STATICFILES_FINDERS",
+    "STATICFILES_STORAGE",
+    "STORAGES",
+    LISTS_DIR_SETTING,
+}
+
+
+class CountryList:
+    """
+    The JSON file of the countries of one language.
+
+    Args:
+        language: Language code
+        content: Encoded JSON
+    """
+
+    __slots__ = ("language", "content", "name")
+
+    def __init__(self, language, content):
+        self.language = language
+        self.content = content
+        digest = hashlib.md5(content, usedforsecurity=False).hexdigest()[:12]
+        self.name = f"{STATIC_PREFIX}/{language}.{digest}.json"
+
+    @property
+    def url(self):
+        """URL of the file, see ``django.templatetags.static.static()``."""
+        return static(self.name)
+
+
+def get_country_list(language=None):
+    """
+    Return the country list of a language (default: the active language).
+
+    Returns:
+        CountryList: Shared list, do not mutate
+    """
+    if language is None:
+        language = get_language()
+    return _build_list(language)
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def _build_list(language):
+    countries = [[code, name] for code, name in get_country_table(language).choices if code]
+    content = json.dumps({"language": language, "countries": countries}, ensure_ascii=False, separators=(",", ":"))
+    return CountryList(language, content.encode())
+
+
+def get_published_url(country_list):
+    """
+    Return the URL of a country list published as static file.
+
+    A list is published when it is in the static files storage, e.g. after
+    ``collectstatic``, or, with ``DEBUG``, when the static files finders
+    find it. The result is memoized until the country tables or the static
+    files settings change.
+
+    Returns:
+        str: URL of the file, or None if the list is not published
+    """
+    return _get_published_url(country_list.name)
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def _get_published_url(name):
+    try:
+        published = staticfiles_storage.exists(name)
+    except ImproperlyConfigured:  # No STATIC_ROOT
+        published = False
+    if not published and not (settings.DEBUG and finders.find(name)):
+        return None
+    try:
+        return static(name)
+    except ValueError:  # Missing from the manifest of ManifestStaticFilesStorage
+        return None
+
+
+def get_lists_dir():
+    """Return the configured directory of the generated lists, or None."""
+    return getattr(settings, LISTS_DIR_SETTING, None)
+
+
+def write_country_lists(directory, languages=None):
+    """
+    Write the country lists of several languages.
+
+    Files already written are kept, so that pages still referring to a
+    previous list keep working.
+
+    Args:
+        directory: Directory the static paths of the lists are relative to
+        languages: Language codes, defaults to all ``settings.LANGUAGES``
+
+    Returns:
+        list: The written or existing CountryList of every language
+    """
+    if languages is None:
+        languages = [code for code, name in settings.LANGUAGES]
+    country_lists = [get_country_list(language) for language in languages]
+    for country_list in country_lists:
+        path = os.path.join(directory, country_list.name)
+        if os.path.exists(path):
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(country_list.content)
+        os.replace(temporary, path)
+    return country_lists
+
+
+@receiver(choices_cleared)
+def reset_on_choices_cleared(**kwargs):
+    """Rebuild the lists after the country tables have been dropped."""
+    _build_list.cache_clear()
+    _get_published_url.cache_clear()
+
+
+@receiver(setting_changed)
+def reset_on_setting_changed(*, setting, **kwargs):
+    """Look up the published lists again when the static files are configured differently."""
+    if setting in STATIC_SETTINGS:
+        _get_published_url.cache_clear()
@@ -0,0 +1,169 @@
+"""
+Compact storage of country selections.
+
+CountryMultiField stores the countries selected in a form submission as a
+fixed-width bitmask instead of a JSON list of codes. Bit ``i`` is set if
+the country at position ``i`` of COUNTRY_INDEX was selected, and the mask
+is written as BITMASK_DIGITS lowercase hex digits, most significant
+first. Every country is therefore a single bit of a known hex digit:
+membership is tested in Python with one integer operation, and in the
+database by comparing one character of the stored value, see
+get_country_lookup().
+
+COUNTRY_INDEX is frozen: codes are only ever appended, never removed or
+reordered, so that stored masks keep their meaning across django-countries
+versions and ``COUNTRIES_*`` settings. Countries missing from the index
+(e.g. added with ``COUNTRIES_OVERRIDE``) cannot be selected in
+CountryMultiField.
+
+Digits are addressed from the right end of a mask, where the first
+countries of the index are. When appended codes outgrow BITMASK_BITS, it
+can be raised without rewriting stored masks: shorter masks keep their
+meaning and simply do not contain the new countries.
+"""
+
+from functools import lru_cache
+
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Left, Length, Right
+from django.db.models.lookups import GreaterThan, In
+from django.dispatch import receiver
+
+from .choices import CHOICES_CACHE_SIZE, choices_cleared, get_country_codes, get_country_selection
+
+# ISO 3166-1 alpha-2 codes of django-countries 9.1, append new codes only
+COUNTRY_INDEX = (
+    "AD", "AE", "AF", "AG", "AI", "AL", "AM", "AO", "AQ", "AR", "AS", "AT", "AU", "AW", "AX", "AZ",
+    "BA", "BB", "BD", "BE", "BF", "BG", "BH", "BI", "BJ", "BL", "BM", "BN", "BO", "BQ", "BR", "BS",
+    "BT", "BV", "BW", "BY", "BZ", "CA", "CC", "CD", "CF", "CG", "CH", "CI", "CK", "CL", "CM", "CN",
+    "CO", "CR", "CU", "CV", "CW", "CX", "CY", "CZ", "DE", "DJ", "DK", "DM", "DO", "DZ", "EC", "EE",
+    "EG", "EH", "ER", "ES", "ET", "FI", "FJ", "FK", "FM", "FO", "FR", "GA", "GB", "GD", "GE", "GF",
+    "GG", "GH", "GI", "GL", "GM", "GN", "GP", "GQ", "GR", "GS", "GT", "GU", "GW", "GY", "HK", "HM",
+    "HN", "HR", "HT", "HU", "ID", "IE", "IL", "IM", "IN", "IO", "IQ", "IR", "IS", "IT", "JE", "JM",
+    "JO", "JP", "KE", "KG", "KH", "KI", "KM", "KN", "KP", "KR", "KW", "KY", "KZ", "LA", "LB", "LC",
+    "LI", "LK", "LR", "LS", "LT", "LU", "LV", "LY", "MA", "MC", "MD", "ME", "MF", "MG", "MH", "MK",
+    "ML", "MM", "MN", "MO", "MP", "MQ", "MR", "MS", "MT", "MU", "MV", "MW", "MX", "MY", "MZ", "NA",
+    "NC", "NE", "NF", "NG", "NI", "NL", "NO", "NP", "NR", "NU", "NZ", "OM", "PA", "PE", "PF", "PG",
+    "PH", "PK", "PL", "PM", "PN", "PR", "PS", "PT", "PW", "PY", "QA", "RE", "RO", "RS", "RU", "RW",
+    "SA", "SB", "SC", "SD", "SE", "SG", "SH", "SI", "SJ", "SK", "SL", "SM", "SN", "SO", "SR", "SS",
+    "ST", "SV", "SX", "SY", "SZ", "TC", "TD", "TF", "TG", "TH", "TJ", "TK", "TL", "TM", "TN", "TO",
+    "TR", "TT", "TV", "TW", "TZ", "UA", "UG", "UM", "US", "UY", "UZ", "VA", "VC", "VE", "VG", "VI",
+    "VN", "VU", "WF", "WS", "YE", "YT", "ZA", "ZM", "ZW",
+)  # fmt: skip
+
+# Number of countries a mask can hold, and of hex digits it is written with
+BITMASK_BITS = 256
+BITMASK_DIGITS = BITMASK_BITS // 4
+
+COUNTRY_INDEX_POSITIONS = {code: position for position, code in enumerate(COUNTRY_INDEX)}
+COUNTRY_BITS = {code: 1 << position for code, position in COUNTRY_INDEX_POSITIONS.items()}
+
+# Hex digits with each of the four bits of a digit set
+DIGITS_WITH_BIT = tuple(tuple(f"{digit:x}" for digit in range(16) if digit & (1 << bit)) for bit in range(4))
+
+
+def encode_countries(codes):
+    """
+    Encode country codes as bitmask.
+
+    Args:
+        codes: Country codes in COUNTRY_INDEX
+
+    Returns:
+        str: BITMASK_DIGITS hex digits, or "" if no code is given
+
+    Raises:
+        KeyError: If a code is not in COUNTRY_INDEX
+    """
+    mask = 0
+    for code in codes:
+        mask |= COUNTRY_BITS[code]
+    return f"{mask:0{BITMASK_DIGITS}x}" if mask else ""
+
+
+def decode_countries(value):
+    """
+    Decode a bitmask into country codes.
+
+    Args:
+        value: Bitmask as returned by encode_countries()
+
+    Returns:
+        list: Country codes in COUNTRY_INDEX order
+    """
+    mask = int(value, 16) if value else 0
+    codes = []
+    while mask:
+        bit = mask & -mask
+        codes.append(COUNTRY_INDEX[bit.bit_length() - 1])
+        mask ^= bit
+    return codes
+
+
+def has_country(value, code):
+    """
+    Return whether a bitmask contains a country.
+
+    Only reads the hex digit holding the country's bit.
+    """
+    position = COUNTRY_INDEX_POSITIONS.get(code)
+    if position is None or position // 4 >= len(value):
+        return False
+    digit = value[-1 - position // 4]
+    return digit in DIGITS_WITH_BIT[position % 4]
+
+
+def get_country_lookup(field_name, code, data_field="entry_data"):
+    """
+    Return a filter matching form entries whose selection contains a country.
+
+    Compares the one character of the stored mask holding the country's
+    bit, counted from the right end, without decoding the mask or parsing
+    a list, e.g.
+    ``FormEntry.objects.filter(get_country_lookup("markets", "DE"))``.
+
+    Args:
+        field_name: Name of the CountryMultiField in the entry data
+        code: Country code
+        data_field: JSON field of the entries holding the submitted data
+
+    Returns:
+        Lookup: Boolean expression for ``QuerySet.filter()``
+
+    Raises:
+        KeyError: If the code is not in COUNTRY_INDEX
+    """
+    position = COUNTRY_INDEX_POSITIONS[code]
+    mask = KeyTextTransform(field_name, data_field)
+    # Right() returns the whole value of masks too short to hold the digit
+    digit = Left(Right(mask, position // 4 + 1), 1)
+    return In(digit, DIGITS_WITH_BIT[position % 4]) & GreaterThan(Length(mask), position // 4)
+
+
+def get_country_set_selection(config):
+    """
+    Return the countries selectable in a CountryMultiField config.
+
+    Like choices.get_country_selection(), limited to the countries in
+    COUNTRY_INDEX.
+
+    Returns:
+        tuple: Sorted country codes, or None if all countries are selectable
+    """
+    return _build_selection(get_country_selection(config))
+
+
+@lru_cache(maxsize=CHOICES_CACHE_SIZE)
+def _build_selection(countries):
+    if countries is None:
+        codes = get_country_codes()
+        if codes <= COUNTRY_BITS.keys():
+            return None
+        return tuple(sorted(codes & COUNTRY_BITS.keys()))
+    return tuple(code for code in countries if code in COUNTRY_BITS)
+
+
+@receiver(choices_cleared)
+def reset_on_choices_cleared(**kwargs):
+    """Recompute the selections after the country settings changed."""
+    _build_selection.cache_clear()
@@ -0,0 +1,171 @@
+"""
+Streaming export of form submissions with country fields.
+
+Writes the form entries of forms with country fields as CSV or NDJSON,
+together with the localized names of the submitted countries. Entries are
+read in chunks by keyset pagination on their primary key and every chunk
+is encoded before the next one is read, so exports of any size run in
+constant memory. An interrupted export is resumed by passing the id of
+the last exported entry as ``after``.
+
+Used by the ``export_country_submissions`` management command and the
+export view of the "Submissions per country" admin.
+"""
+
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from djangocms_form_builder.entry_model import FormEntry
+
+from .choices import get_country_names
+from .country_sets import decode_countries
+from .submissions import CHUNK_SIZE, get_all_country_fields
+
+FORMAT_CSV = "csv"
+FORMAT_NDJSON = "ndjson"
+FORMATS = (FORMAT_CSV, FORMAT_NDJSON)
+
+CONTENT_TYPES = {
+    FORMAT_CSV: "text/csv; charset=utf-8",
+    FORMAT_NDJSON: "application/x-ndjson",
+}
+
+
+def iter_entries(form_names, after=0, limit=None, chunk_size=CHUNK_SIZE):
+    """
+    Yield chunks of form entries in primary key order.
+
+    Every chunk is read by a separate query starting after the last entry
+    of the previous chunk, so no cursor is held open between chunks.
+
+    Args:
+        form_names: Names of the forms to export
+        after: Only export entries with a greater id
+        limit: Maximum number of entries, defaults to all
+        chunk_size: Number of entries read per query
+
+    Yields:
+        list: (id, form_name, entry_created_at, entry_data) tuples
+    """
+    entries = FormEntry.objects.filter(form_name__in=form_names).order_by("pk")
+    entries = entries.values_list("pk", "form_name", "entry_created_at", "entry_data")
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        chunk = list(entries.filter(pk__gt=after)[:size])
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < size:
+            return
+        after = chunk[-1][0]
+        if remaining is not None:
+            remaining -= len(chunk)
+
+
+def export_entries(
+    export_format, form_names=None, after=0, limit=None, chunk_size=CHUNK_SIZE, language=None, progress=None
+):
+    """
+    Encode the entries of forms with country fields.
+
+    CSV has a column with the code
+    and one with the name of every country field, and the remaining entry
+    data as JSON. NDJSON has one object per entry with its ``data`` and the
+    ``country_names`` of its country fields.
+
+    The bitmasks of multiple country fields are decoded: their CSV columns
+    hold the codes separated by "," and the names separated by "; ", their
+    ``country_names`` map every selected code to its name.
+
+    Args:
+        export_format: FORMAT_CSV or FORMAT_NDJSON
+        form_names: Only export these forms, defaults to all forms with
+            country fields
+        language: Language of the country names, defaults to the language
+            active when the first chunk is encoded
+        progress: Called with the number of entries and the id of the last
+            entry of every chunk after it has been encoded
+
+    Other arguments are passed to iter_entries().
+
+    Yields:
+        str: The CSV header, then the encoded entries of one chunk at a time
+    """
+    if export_format not in FORMATS:
+        raise ValueError(f"Unknown export format: {export_format!r}")
+    fields = {}
+    for plugin_type, forms in get_all_country_fields(form_names).items():
+        multiple = plugin_type == "CountryMultiFieldPlugin"
+        for form_name, field_names in forms.items():
+            fields.setdefault(form_name, {}).update(dict.fromkeys(field_names, multiple))
+    names = get_country_names(language)
+    encode = encode_csv if export_format == FORMAT_CSV else encode_ndjson
+    columns = sorted(set().union(*fields.values()))
+
+    if export_format == FORMAT_CSV:
+        header = ["id", "form_name", "created_at"]
+        for field_name in columns:
+            header.extend((field_name, f"{field_name}_name"))
+        header.append("data")
+        yield write_csv([header])
+
+    for chunk in iter_entries(sorted(fields), after, limit, chunk_size):
+        encoded = encode(chunk, fields, columns, names)
+        if progress is not None:
+            progress(len(chunk), chunk[-1][0])
+        yield encoded
+
+
+def get_codes(value, multiple):
+    """Return the country codes of a submitted value, decoding the bitmasks of multiple country fields."""
+    if not value:
+        return []
+    return decode_countries(value) if multiple else [value]
+
+
+def encode_csv(chunk, fields, columns, names):
+    """Encode a chunk of entries as CSV rows."""
+    rows = []
+    for pk, form_name, created_at, data in chunk:
+        form_fields = fields[form_name]
+        row = [pk, form_name, created_at.isoformat()]
+        for field_name in columns:
+            codes = get_codes(data.get(field_name), form_fields[field_name]) if field_name in form_fields else []
+            row.extend((",".join(codes), "; ".join(names.get(code, code) for code in codes)))
+        other = {key: value for key, value in data.items() if key not in form_fields}
+        row.append(json.dumps(other, cls=DjangoJSONEncoder, ensure_ascii=False))
+        rows.append(row)
+    return write_csv(rows)
+
+
+def encode_ndjson(chunk, fields, columns, names):
+    """Encode a chunk of entries as NDJSON lines."""
+    lines = []
+    for pk, form_name, created_at, data in chunk:
+        country_names = {}
+        for field_name, multiple in fields[form_name].items():
+            codes = get_codes(data.get(field_name), multiple)
+            if codes and multiple:
+                country_names[field_name] = {code: names.get(code, code) for code in codes}
+            elif codes:
+                country_names[field_name] = names.get(codes[0], codes[0])
+        entry = {
+            "id": pk,
+            "form_name": form_name,
+            "created_at": created_at,
+            "data": data,
+            "country_names": country_names,
+        }
+        lines.append(json.dumps(entry, cls=DjangoJSONEncoder, ensure_ascii=False))
+    lines.append("")
+    return "\n".join(lines)
+
+
+def write_csv(rows):
+    """Return rows encoded as CSV."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
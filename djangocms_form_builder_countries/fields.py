@@ -0,0 +1,90 @@
+"""
+Form fields for country submissions.
+
+Provides the fields used on the public form to validate the
+submitted country code or codes.
+"""
+
+import django
+from django import forms
+
+from .choices import CountryChoices, get_country_codes
+from .country_sets import COUNTRY_BITS, decode_countries, encode_countries
+from .forms import CountryMultipleChoiceField
+
+
+class SharedChoicesMixin:
+    """
+    Keep the shared CountryChoices of a choice field instead of copying them.
+    """
+
+    if django.VERSION < (5, 0):
+
+        def _set_choices(self, value):
+            # Django < 5.0 copies every iterable but callables into a new list
+            if isinstance(value, CountryChoices):
+                self._choices = self.widget.choices = value
+            else:
+                super()._set_choices(value)
+
+        choices = property(forms.ChoiceField._get_choices, _set_choices)
+
+    def __deepcopy__(self, memo):
+        # Choice tables are shared and never mutated, skip copying every entry
+        # each time a form is instantiated.
+        result = super(forms.ChoiceField, self).__deepcopy__(memo)
+        result._choices = self._choices
+        return result
+
+
+class CountryChoiceField(SharedChoicesMixin, forms.ChoiceField):
+    """
+    Choice field for a single country code.
+
+    ``ChoiceField.valid_value`` scans all choices for every submitted
+    value. This field checks membership in a precomputed set of country
+    codes instead. The ``("---", "---")`` separator is not in the set, so
+    submitting it fails validation on required and optional fields alike.
+    """
+
+    def __init__(self, *, valid_codes=None, **kwargs):
+        super().__init__(**kwargs)
+        self.valid_codes = get_country_codes() if valid_codes is None else frozenset(valid_codes)
+
+    def valid_value(self, value):
+        """Check that the value is a selectable country code."""
+        return str(value) in self.valid_codes
+
+
+class CountrySetField(SharedChoicesMixin, CountryMultipleChoiceField):
+    """
+    Multiple choice field for several country codes, cleaned to a bitmask.
+
+    Validates the selected codes against a precomputed set like
+    CountryChoiceField, and returns them encoded by
+    ``country_sets.encode_countries()``, which is what the form builder
+    stores in the submission. Initial values may be given as bitmask.
+    """
+
+    def __init__(self, *, valid_codes=None, **kwargs):
+        super().__init__(**kwargs)
+        if valid_codes is None:
+            valid_codes = get_country_codes() & COUNTRY_BITS.keys()
+        self.valid_codes = frozenset(valid_codes)
+
+    def valid_value(self, value):
+        """Check that the value is a selectable country code."""
+        return str(value) in self.valid_codes
+
+    def prepare_value(self, value):
+        """Decode bitmasks, e.g. initial values read from a submission."""
+        if isinstance(value, str):
+            return decode_countries(value)
+        return value
+
+    def has_changed(self, initial, data):
+        return super().has_changed(self.prepare_value(initial), data)
+
+    def clean(self, value):
+        """Return the bitmask of the selected countries, "" for none."""
+        return encode_countries(super().clean(value))
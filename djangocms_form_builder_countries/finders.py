@@ -0,0 +1,55 @@
+"""
+Static files finders.
+
+Add ``CountryListFinder`` to ``STATICFILES_FINDERS`` to publish the
+country lists of the static mode with ``collectstatic``, see
+country_lists.py.
+"""
+
+import os
+
+from django.contrib.staticfiles.finders import BaseFinder
+from django.core import checks
+from django.core.files.storage import FileSystemStorage
+
+from .country_lists import LISTS_DIR_SETTING, STATIC_PREFIX, get_lists_dir, write_country_lists
+
+
+class CountryListFinder(BaseFinder):
+    """
+    Static files finder providing the country lists.
+
+    Writes the current lists of all languages to the directory set in
+    ``DJANGOCMS_FORM_BUILDER_COUNTRIES_LISTS_DIR`` when they are looked up,
+    so that ``collectstatic`` always collects up-to-date lists.
+    """
+
+    def __init__(self, app_names=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.location = get_lists_dir()
+
+    def check(self, **kwargs):
+        if not self.location:
+            return [
+                checks.Error(
+                    f"{LISTS_DIR_SETTING} must be set to use CountryListFinder.",
+                    id="djangocms_form_builder_countries.E001",
+                )
+            ]
+        return []
+
+    def find(self, path, find_all=False, **kwargs):
+        find_all = find_all or kwargs.get("all", False)
+        if self.location and path.startswith(f"{STATIC_PREFIX}/"):
+            for country_list in write_country_lists(self.location):
+                if country_list.name == path:
+                    path = os.path.join(self.location, path)
+                    return [path] if find_all else path
+        return [] if find_all else None
+
+    def list(self, ignore_patterns):
+        if not self.location:
+            return
+        storage = FileSystemStorage(location=self.location)
+        for country_list in write_country_lists(self.location):
+            yield country_list.name, storage
@@ -7,22 +7,42 @@ for configuring country field options.
 
 from django import forms
 from django.utils.translation import gettext_lazy as _
-from django_countries import countries
 from djangocms_form_builder.forms import FormFieldMixin
 from djangocms_form_builder.models import FormField
 from entangled.forms import EntangledModelForm
 
+from .constants import CONFIG_VERSION, CONFIG_VERSION_KEY, MODE_CHOICES, MODE_SELECT, SEARCH_LIMIT
+
+
+def _get_all_countries():
+    # The country tables are only imported once the choices are rendered, as
+    # the CMS imports the plugins, and with them this module, on startup
+    from .choices import get_all_countries
+
+    return get_all_countries()
+
+
+def _get_regions_and_countries():
+    from .choices import get_all_countries
+    from .regions import get_region_choices
+
+    return [
+        (_("Regions"), get_region_choices()),
+        (_("Countries"), list(get_all_countries())),
+    ]
+
 
 class CountryMultipleChoiceField(forms.MultipleChoiceField):
     """
     Multiple choice field for selecting countries to show first.
 
     Pre-configured with all countries as choices and appropriate
-    widget styling for the Django CMS admin.
+    widget styling for the Django CMS admin. The country list is
+    resolved lazily in the language of the request rendering the field.
     """
 
     def __init__(self, *args, **kwargs):
-        kwargs.setdefault("choices", list(countries))
+        kwargs.setdefault("choices", _get_all_countries)
         kwargs.setdefault("required", False)
         kwargs.setdefault(
             "widget",
@@ -35,6 +55,21 @@ class CountryMultipleChoiceField(forms.MultipleChoiceField):
         )
         super().__init__(*args, **kwargs)
 
+    def search(self, query, limit=SEARCH_LIMIT):
+        """
+        Return the choices matching a search query.
+
+        Uses the accent-insensitive country search index of the active
+        language. Results keep the order and labels of the field's choices.
+
+        Returns:
+            list: (code, name) pairs
+        """
+        from .search import get_search_index
+
+        matches = get_search_index().lookup(query)
+        return [(code, name) for code, name in self.choices if code in matches][:limit]
+
 
 class CountryFieldForm(FormFieldMixin, EntangledModelForm):
     """
@@ -49,6 +84,10 @@ class CountryFieldForm(FormFieldMixin, EntangledModelForm):
         entangled_fields = {
             "config": [
                 "countries_first",
+                "countries_only",
+                "countries_exclude",
+                "countries_mode",
+                "countries_preselect",
             ]
         }
 
@@ -60,6 +99,36 @@ class CountryFieldForm(FormFieldMixin, EntangledModelForm):
         ),
         required=False,
     )
+    countries_only = CountryMultipleChoiceField(
+        label=_("Only offer"),
+        choices=_get_regions_and_countries,
+        help_text=_("Offer only these regions and countries. Leave empty to offer all countries."),
+        required=False,
+    )
+    countries_exclude = CountryMultipleChoiceField(
+        label=_("Do not offer"),
+        choices=_get_regions_and_countries,
+        help_text=_("Remove these regions and countries from the offered countries."),
+        required=False,
+    )
+    countries_mode = forms.ChoiceField(
+        label=_("Country list"),
+        choices=MODE_CHOICES,
+        initial=MODE_SELECT,
+        help_text=_(
+            "Searching on demand keeps the country list out of the page and "
+            "loads matching countries while the user types."
+        ),
+        required=False,
+    )
+    countries_preselect = forms.BooleanField(
+        label=_("Preselect the visitor's country"),
+        help_text=_(
+            "Select the country of the visitor's IP address initially. "
+            "Requires a GeoIP database, see the documentation."
+        ),
+        required=False,
+    )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -68,3 +137,50 @@ class CountryFieldForm(FormFieldMixin, EntangledModelForm):
             if hasattr(instance, "config") and "countries_first" not in instance.config:
                 # Default to DACH countries for new instances
                 self.fields["countries_first"].initial = ["DE", "AT", "CH"]
+
+    def clean_countries_first(self):
+        """Store countries_first uppercased and de-duplicated."""
+        from .choices import normalize_codes
+
+        return list(normalize_codes(self.cleaned_data["countries_first"]))
+
+    def clean_countries_only(self):
+        """Store countries_only uppercased and de-duplicated."""
+        from .choices import normalize_codes
+
+        return list(normalize_codes(self.cleaned_data["countries_only"]))
+
+    def clean_countries_exclude(self):
+        """Store countries_exclude uppercased and de-duplicated."""
+        from .choices import normalize_codes
+
+        return list(normalize_codes(self.cleaned_data["countries_exclude"]))
+
+    def save(self, commit=True):
+        """Mark the config as normalized, see choices.get_countries_first()."""
+        self.instance.config[CONFIG_VERSION_KEY] = CONFIG_VERSION
+        return super().save(commit)
+
+
+class CountryMultiFieldForm(FormFieldMixin, EntangledModelForm):
+    """
+    Admin form for configuring a multiple country selection field.
+
+    Shares the countries_only and countries_exclude options with
+    CountryFieldForm.
+    """
+
+    class Meta:
+        model = FormField
+        entangled_fields = {
+            "config": [
+                "countries_only",
+                "countries_exclude",
+            ]
+        }
+
+    countries_only = CountryFieldForm.base_fields["countries_only"]
+    countries_exclude = CountryFieldForm.base_fields["countries_exclude"]
+
+    clean_countries_only = CountryFieldForm.clean_countries_only
+    clean_countries_exclude = CountryFieldForm.clean_countries_exclude
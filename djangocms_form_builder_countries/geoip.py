@@ -0,0 +1,147 @@
+"""
+Country lookup of client IP addresses.
+
+Reads the country of an IP address from a local database in the MaxMind DB
+format, e.g. GeoLite2-Country or DB-IP's IP to Country Lite, with the
+``maxminddb`` package (the ``geoip`` extra). The file set in
+``DJANGOCMS_FORM_BUILDER_COUNTRIES_GEOIP_DATABASE`` is memory-mapped once
+per process, and only the pages touched by lookups are read.
+
+The country of every network of PREFIX_BITS bits (a /24 for IPv4, a /48
+for IPv6) is memoized in an LRU cache, so that addresses of a known network
+resolve with a dictionary lookup. Addresses of networks the database splits
+below that prefix are looked up one by one.
+"""
+
+import ipaddress
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .constants import GEOIP_SETTING
+
+try:
+    import maxminddb
+except ImportError:  # The geoip extra is not installed
+    maxminddb = None
+
+# Number of leading address bits whose country is memoized
+PREFIX_BITS = {4: 24, 6: 48}
+
+# Maximum number of memoized prefixes
+PREFIX_CACHE_SIZE = 8192
+
+# Memoized for prefixes holding networks of several countries
+SPLIT = object()
+
+
+def get_database_path():
+    """Return the configured path of the GeoIP database, or None."""
+    return getattr(settings, GEOIP_SETTING, None)
+
+
+def get_client_ip(request):
+    """
+    Return the IP address of the client of a request.
+
+    Uses ``REMOTE_ADDR``. Behind a reverse proxy, set it from the proxy's
+    header in a middleware, as only the deployment knows which proxies
+    can be trusted.
+    """
+    return request.META.get("REMOTE_ADDR")
+
+
+def get_country_code(address):
+    """
+    Return the country of an IP address.
+
+    Args:
+        address: IP address as string
+
+    Returns:
+        str: ISO 3166-1 alpha-2 code, or None if no database is configured,
+        the address is invalid or its country is not known
+
+    Raises:
+        ImproperlyConfigured: If a database is configured, but ``maxminddb``
+        is not installed
+    """
+    path = get_database_path()
+    if not path or not address:
+        return None
+    path = os.fspath(path)
+    database = _open_database(path)
+    if database is None:
+        return None
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return None
+    if address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+
+    prefix = ipaddress.ip_network((address, PREFIX_BITS[address.version]), strict=False)
+    country = _get_prefix_country(path, prefix)
+    if country is SPLIT:
+        country, _ = _lookup(database, address)
+    return country
+
+
+def get_request_country(request):
+    """Return the country of the client of a request, see get_country_code()."""
+    return get_country_code(get_client_ip(request))
+
+
+def _lookup(database, address):
+    """Return the country of an address and the prefix length of its network in the database."""
+    try:
+        data, prefix_length = database.get_with_prefix_len(address)
+    except (maxminddb.InvalidDatabaseError, ValueError):
+        # ValueError: IPv6 address in an IPv4 database
+        return None, 0
+    if not isinstance(data, dict):
+        return None, prefix_length
+    for key in ("country", "registered_country"):
+        country = data.get(key)
+        if isinstance(country, dict) and country.get("iso_code"):
+            return country["iso_code"], prefix_length
+    return None, prefix_length
+
+
+@lru_cache(maxsize=1)
+def _open_database(path):
+    if maxminddb is None:
+        raise ImproperlyConfigured(
+            f"{GEOIP_SETTING} requires the maxminddb package, install djangocms-form-builder-countries[geoip]."
+        )
+    try:
+        return maxminddb.open_database(path, maxminddb.MODE_MMAP)
+    except (OSError, ValueError, maxminddb.InvalidDatabaseError):
+        return None
+    except TypeError:  # Metadata with missing fields
+        return None
+
+
+@lru_cache(maxsize=PREFIX_CACHE_SIZE)
+def _get_prefix_country(path, prefix):
+    country, prefix_length = _lookup(_open_database(path), prefix.network_address)
+    if prefix_length > prefix.prefixlen:
+        return SPLIT
+    return country
+
+
+def clear_cache():
+    """Close the database and drop all memoized lookups."""
+    _open_database.cache_clear()
+    _get_prefix_country.cache_clear()
+
+
+@receiver(setting_changed)
+def reset_on_setting_changed(*, setting, **kwargs):
+    """Close the database when another one is configured."""
+    if setting == GEOIP_SETTING:
+        clear_cache()
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from djangocms_form_builder_countries.country_lists import LISTS_DIR_SETTING, get_lists_dir, write_country_lists
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the static country list of every language in LANGUAGES, used by "
+        "country fields loading their countries from a cached file. File names "
+        "contain a hash of the list. Lists written before are kept. Add "
+        "CountryListFinder to STATICFILES_FINDERS to write the lists on "
+        "collectstatic instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--language",
+            action="append",
+            dest="languages",
+            metavar="LANGUAGE",
+            help="Only write the list of LANGUAGE. Can be given several times.",
+        )
+        parser.add_argument(
+            "--output",
+            metavar="DIRECTORY",
+            help=f"Static files directory to write the lists to (default: {LISTS_DIR_SETTING}).",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["output"] or get_lists_dir()
+        if not directory:
+            raise CommandError(f"Pass --output or set {LISTS_DIR_SETTING}.")
+        available = [code for code, name in settings.LANGUAGES]
+        languages = options["languages"] or available
+        unknown = sorted(set(languages) - set(available))
+        if unknown:
+            raise CommandError(f"Unknown language(s): {', '.join(unknown)}.")
+
+        country_lists = write_country_lists(directory, languages)
+        if options["verbosity"] >= 2:
+            for country_list in country_lists:
+                self.stdout.write(country_list.name)
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote the country lists of {len(country_lists)} language(s) to {directory}.")
+        )
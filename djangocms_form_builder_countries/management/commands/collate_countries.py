@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from djangocms_form_builder_countries.collation import COLLATION_SETTING, collate, get_collation_path, write_collation
+
+
+class Command(BaseCommand):
+    help = (
+        "Sort the countries of every language in LANGUAGES and write the orders "
+        f"to a collation file. Point {COLLATION_SETTING} to the file to build "
+        "country tables without sorting. Run this at build or deploy time and "
+        "again after upgrading django-countries or changing COUNTRIES_* settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--language",
+            action="append",
+            dest="languages",
+            metavar="LANGUAGE",
+            help="Only collate LANGUAGE. Can be given several times.",
+        )
+        parser.add_argument(
+            "--output",
+            metavar="PATH",
+            help=f"Path of the collation file (default: {COLLATION_SETTING}).",
+        )
+
+    def handle(self, *args, **options):
+        path = options["output"] or get_collation_path()
+        if not path:
+            raise CommandError(f"Pass --output or set {COLLATION_SETTING}.")
+        available = [code for code, name in settings.LANGUAGES]
+        languages = options["languages"] or available
+        unknown = sorted(set(languages) - set(available))
+        if unknown:
+            raise CommandError(f"Unknown language(s): {', '.join(unknown)}.")
+
+        orders = {}
+        for language in languages:
+            codes = collate(language)
+            if codes is None:
+                self.stderr.write(f"Skipped {language}: its order cannot be restored from country codes.")
+            else:
+                orders[language] = codes
+        write_collation(path, orders)
+        self.stdout.write(self.style.SUCCESS(f"Collated {len(orders)} language(s) into {path}."))
@@ -0,0 +1,36 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from djangocms_form_builder_countries.submissions import CHUNK_SIZE, get_submissions_per_country
+
+
+class Command(BaseCommand):
+    help = (
+        "Count the form submissions per country of all forms with country fields "
+        "and write them as CSV. Entries are read in chunks, so memory use does not "
+        "grow with the number of submissions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--form-name",
+            action="append",
+            dest="form_names",
+            metavar="FORM_NAME",
+            help="Only count entries submitted to the form with this name. Can be given several times.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help=f"Number of entries fetched from the database at once (default: {CHUNK_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive.")
+        rows = get_submissions_per_country(options["form_names"], options["chunk_size"])
+        writer = csv.writer(self.stdout)
+        writer.writerow(["code", "country", "submissions"])
+        writer.writerows(rows)
@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from djangocms_form_builder_countries.export import FORMAT_CSV, FORMATS, export_entries
+from djangocms_form_builder_countries.submissions import CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the form entries of all forms with country fields as CSV or NDJSON, "
+        "with the localized names of the submitted countries. Entries are read and "
+        "written in chunks, and an interrupted export can be resumed with --after."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--form-name",
+            action="append",
+            dest="form_names",
+            metavar="FORM_NAME",
+            help="Only export entries submitted to the form with this name. Can be given several times.",
+        )
+        parser.add_argument("--format", choices=FORMATS, default=FORMAT_CSV, help="Output format (default: csv).")
+        parser.add_argument("--output", metavar="PATH", help="Write to PATH instead of standard output.")
+        parser.add_argument("--language", default=settings.LANGUAGE_CODE, help="Language of the country names.")
+        parser.add_argument(
+            "--after",
+            type=int,
+            default=0,
+            metavar="ID",
+            help="Only export entries with an id greater than ID, to resume an export.",
+        )
+        parser.add_argument("--limit", type=int, help="Export at most LIMIT entries.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help=f"Number of entries read per query (default: {CHUNK_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive.")
+        if options["limit"] is not None and options["limit"] < 0:
+            raise CommandError("--limit must not be negative.")
+        if options["language"] not in dict(settings.LANGUAGES):
+            raise CommandError(f"Unknown language: {options['language']}.")
+
+        exported = 0
+        last_id = options["after"]
+
+        def progress(count, pk):
+            nonlocal exported, last_id
+            exported += count
+            last_id = pk
+
+        output = open(options["output"], "w", newline="", encoding="utf-8") if options["output"] else None
+        try:
+            for data in export_entries(
+                options["format"],
+                form_names=options["form_names"],
+                after=options["after"],
+                limit=options["limit"],
+                chunk_size=options["chunk_size"],
+                language=options["language"],
+                progress=progress,
+            ):
+                if output is None:
+                    self.stdout.write(data, ending="")
+                else:
+                    output.write(data)
+        except BaseException:
+            if exported:
+                self.stderr.write(f"Export interrupted after {exported} entries. Resume with --after {last_id}.")
+            raise
+        finally:
+            if output is not None:
+                output.close()
+        self.stderr.write(self.style.SUCCESS(f"Exported {exported} entries, last id {last_id}."))
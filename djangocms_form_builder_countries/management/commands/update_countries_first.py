@@ -0,0 +1,181 @@
+from cms.cache import invalidate_cms_page_cache
+from cms.cache.placeholder import clear_placeholder_cache
+from cms.models import PageContent, Placeholder
+from cms.utils.conf import get_site_id
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from djangocms_form_builder_countries.choices import (
+    get_countries_first,
+    get_country_codes,
+    invalidate_choices,
+    normalize_codes,
+)
+from djangocms_form_builder_countries.models import CountryField
+
+
+def parse_codes(value):
+    """Parse a comma separated list of country codes."""
+    return normalize_codes(code.strip() for code in value.split(",") if code.strip())
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite the countries_first configuration of many country fields at "
+        "once. Select fields by page, placeholder, language or their current "
+        "countries_first, then set, extend or reduce the list. Fields are "
+        "updated in batches, each in its own transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--page",
+            action="append",
+            dest="pages",
+            type=int,
+            metavar="PAGE_ID",
+            help="Only update fields on the page with this id. Can be given several times.",
+        )
+        parser.add_argument(
+            "--placeholder",
+            action="append",
+            dest="placeholders",
+            type=int,
+            metavar="PLACEHOLDER_ID",
+            help="Only update fields in the placeholder with this id. Can be given several times.",
+        )
+        parser.add_argument(
+            "--language",
+            action="append",
+            dest="languages",
+            metavar="LANGUAGE",
+            help="Only update fields of this language. Can be given several times.",
+        )
+        parser.add_argument(
+            "--countries-first",
+            dest="current",
+            metavar="CODES",
+            help='Only update fields whose countries_first currently is CODES, e.g. "DE,AT,CH".',
+        )
+        operation = parser.add_mutually_exclusive_group(required=True)
+        operation.add_argument("--set", metavar="CODES", help="Replace countries_first with CODES.")
+        operation.add_argument("--add", metavar="CODES", help="Append CODES to countries_first.")
+        operation.add_argument("--remove", metavar="CODES", help="Remove CODES from countries_first.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of fields updated per query and transaction (default: 500).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report which fields would be updated.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+        operation, codes = next(
+            (name, parse_codes(options[name])) for name in ("set", "add", "remove") if options[name] is not None
+        )
+        unknown = [code for code in codes if code not in get_country_codes()]
+        if unknown:
+            raise CommandError(f"Unknown country code(s): {', '.join(unknown)}.")
+
+        plugins = self.get_queryset(options)
+        current = parse_codes(options["current"]) if options["current"] is not None else None
+        updated = 0
+        placeholders = set()
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    plugins.filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .only("pk", "config", "language", "placeholder_id")[: options["batch_size"]]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                changed = []
+                for plugin in batch:
+                    before = get_countries_first(plugin.config)
+                    if current is not None and before != current:
+                        continue
+                    after = self.apply(operation, before, codes)
+                    if after == before:
+                        continue
+                    if options["verbosity"] >= 2:
+                        self.stdout.write(
+                            f"Field {plugin.pk} ({plugin.language}): {','.join(before) or '-'} -> {','.join(after) or '-'}"
+                        )
+                    plugin.config["countries_first"] = list(after)
+                    plugin.changed_date = timezone.now()
+                    changed.append(plugin)
+                    placeholders.add((plugin.placeholder_id, plugin.language))
+                if changed and not options["dry_run"]:
+                    CountryField.objects.bulk_update(changed, ["config", "changed_date"])
+                updated += len(changed)
+
+        noun = "country field" if updated == 1 else "country fields"
+        if options["dry_run"]:
+            self.stdout.write(f"Would update {updated} {noun}.")
+            return
+        if updated:
+            self.invalidate_caches(placeholders)
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} {noun}."))
+
+    def get_queryset(self, options):
+        """Return the country fields selected by the command line options."""
+        plugins = CountryField.objects.filter(plugin_type="CountryFieldPlugin")
+        if options["pages"]:
+            contents = PageContent.admin_manager.filter(page__in=options["pages"]).values("pk")
+            plugins = plugins.filter(
+                placeholder__content_type=ContentType.objects.get_for_model(PageContent),
+                placeholder__object_id__in=contents,
+            )
+        if options["placeholders"]:
+            plugins = plugins.filter(placeholder__in=options["placeholders"])
+        if options["languages"]:
+            plugins = plugins.filter(language__in=options["languages"])
+        return plugins
+
+    @staticmethod
+    def apply(operation, before, codes):
+        """Return the countries_first list after applying the operation."""
+        if operation == "set":
+            return codes
+        if operation == "add":
+            return normalize_codes(before + codes)
+        return tuple(code for code in before if code not in codes)
+
+    @staticmethod
+    def get_page_site_id(page):
+        """
+        Return the site of a page, or None for placeholders outside pages.
+
+        django CMS 5.0 keeps the site on the page, 4.1 on its tree node.
+        """
+        if page is None:
+            return None
+        if hasattr(page, "site_id"):
+            return page.site_id
+        return page.node.site_id
+
+    def invalidate_caches(self, placeholders):
+        """
+        Invalidate the caches of all updated fields at once.
+
+        ``bulk_update`` does not send save signals, so the choice tables and
+        the CMS page and placeholder caches are invalidated here, after the
+        last batch.
+        """
+        invalidate_choices()
+        invalidate_cms_page_cache()
+        for placeholder in Placeholder.objects.filter(pk__in={pk for pk, language in placeholders}):
+            site_id = get_site_id(self.get_page_site_id(placeholder.page))
+            for language in {language for pk, language in placeholders if pk == placeholder.pk}:
+                clear_placeholder_cache(placeholder, language, site_id)
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from djangocms_form_builder_countries.choices import CACHE_SETTING
+from djangocms_form_builder_countries.prewarm import prewarm
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the country tables for every language in LANGUAGES and store them "
+        "in the Django cache, and prewarm the choices of every countries_first "
+        "configuration used by country fields. Run this after deploying to avoid slow first "
+        "requests in each language."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--language",
+            action="append",
+            dest="languages",
+            metavar="LANGUAGE",
+            help="Only warm the tables of LANGUAGE. Can be given several times.",
+        )
+
+    def handle(self, *args, **options):
+        available = [code for code, name in settings.LANGUAGES]
+        languages = options["languages"] or available
+        unknown = sorted(set(languages) - set(available))
+        if unknown:
+            raise CommandError(f"Unknown language(s): {', '.join(unknown)}.")
+        keys = prewarm(languages=languages, store=True)
+        alias = getattr(settings, CACHE_SETTING, "default")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stored the country tables of {len(languages)} language(s) in cache {alias!r} "
+                f"and prewarmed {len(keys)} choice tables."
+            )
+        )
@@ -0,0 +1,139 @@
+"""
+Opt-in instrumentation of the country field hot paths.
+
+Set ``DJANGOCMS_FORM_BUILDER_COUNTRIES_METRICS`` to the dotted path of a
+metrics backend class to record:
+
+    get_form_field.duration: Seconds spent building the form field
+    get_form_field.choices: Number of choices of the built field
+    render.duration: Seconds spent rendering the country select
+    <cache>.lookup / <cache>.miss: Lookups and misses of the ``choices``
+        and ``options`` caches
+
+All metrics are tagged with the active language. Without the setting,
+instrumented code only checks that ``backend`` is None.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, defaultdict
+from functools import wraps
+from time import perf_counter
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from django.utils.translation import get_language
+
+SETTING = "DJANGOCMS_FORM_BUILDER_COUNTRIES_METRICS"
+
+# Active metrics backend instance, None when instrumentation is disabled
+backend = None
+
+
+class BaseMetricsBackend(ABC):
+    """
+    Interface of metrics backends.
+
+    Subclasses forward the values to a metrics system, e.g. StatsD or
+    Prometheus.
+    """
+
+    @abstractmethod
+    def record(self, metric, value, language):
+        """Record a value (duration in seconds or size) of a metric."""
+
+    @abstractmethod
+    def increment(self, metric, language):
+        """Increment a counter."""
+
+
+class InMemoryMetricsBackend(BaseMetricsBackend):
+    """
+    Metrics backend keeping all values in memory.
+
+    Meant for tests and debugging, values are never dropped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop all recorded values."""
+        with self._lock:
+            self.values = defaultdict(list)
+            self.counters = Counter()
+
+    def record(self, metric, value, language):
+        with self._lock:
+            self.values[metric, language].append(value)
+
+    def increment(self, metric, language):
+        with self._lock:
+            self.counters[metric, language] += 1
+
+    def hit_ratio(self, cache, language):
+        """
+        Return the share of cache lookups that were hits.
+
+        Returns:
+            float: Hit ratio between 0 and 1, None without lookups
+        """
+        lookups = self.counters[f"{cache}.lookup", language]
+        if not lookups:
+            return None
+        return 1 - self.counters[f"{cache}.miss", language] / lookups
+
+
+def load_backend():
+    """Instantiate the backend configured in the settings."""
+    global backend
+    path = getattr(settings, SETTING, None)
+    backend = import_string(path)() if path else None
+
+
+def count(metric):
+    """Increment a counter for the active language if instrumentation is enabled."""
+    if backend is not None:
+        backend.increment(metric, get_language())
+
+
+def timed(metric, size=None):
+    """
+    Decorator recording the duration of each call as ``<metric>.duration``.
+
+    Args:
+        metric: Metric name prefix
+        size: Optional callable returning the number of choices from the
+            result, recorded as ``<metric>.choices``
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if backend is None:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            result = func(*args, **kwargs)
+            duration = perf_counter() - start
+            language = get_language()
+            backend.record(f"{metric}.duration", duration, language)
+            if size is not None:
+                backend.record(f"{metric}.choices", size(result), language)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+@receiver(setting_changed)
+def reload_backend(*, setting, **kwargs):
+    """Switch the backend when the setting changes."""
+    if setting == SETTING:
+        load_backend()
+
+
+load_backend()
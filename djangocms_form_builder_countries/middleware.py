@@ -0,0 +1,41 @@
+"""
+Middleware for rendering country fields under ASGI.
+
+CMS plugins are rendered synchronously. If the country table of the
+active language is not memoized yet, the first country field rendered
+reads it from the Django cache with a blocking call. Under ASGI,
+CountryTableMiddleware loads it with the async cache API before the view
+runs, so rendering country fields does not access the cache.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .choices import aget_country_table
+
+
+class CountryTableMiddleware:
+    """
+    Load the country table of the active language before async requests.
+
+    Add it after ``LocaleMiddleware``, so that the language of the request
+    is active. Sync requests are passed through unchanged; they load the
+    table on first use.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        await aget_country_table()
+        return await self.get_response(request)
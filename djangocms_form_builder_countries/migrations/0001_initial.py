@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("djangocms_form_builder", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CountryField",
+            fields=[],
+            options={
+                "verbose_name": "Country field",
+                "verbose_name_plural": "Country fields",
+                "proxy": True,
+                "indexes": [],
+                "constraints": [],
+            },
+            bases=("djangocms_form_builder.formfield",),
+        ),
+    ]
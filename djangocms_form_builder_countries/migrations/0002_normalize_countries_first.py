@@ -0,0 +1,34 @@
+from django.db import migrations
+
+# Frozen copies of constants.CONFIG_VERSION_KEY and CONFIG_VERSION
+CONFIG_VERSION_KEY = "countries_config_version"
+CONFIG_VERSION = 1
+
+BATCH_SIZE = 500
+
+
+def normalize_countries_first(apps, schema_editor):
+    """Uppercase and de-duplicate countries_first of existing country fields."""
+    FormField = apps.get_model("djangocms_form_builder", "FormField")
+    fields = FormField.objects.using(schema_editor.connection.alias).filter(plugin_type="CountryFieldPlugin")
+    changed = []
+    for field in fields.only("pk", "config").iterator(chunk_size=BATCH_SIZE):
+        config = field.config or {}
+        if config.get(CONFIG_VERSION_KEY) == CONFIG_VERSION:
+            continue
+        codes = config.get("countries_first") or ()
+        config["countries_first"] = list(dict.fromkeys(str(code).upper() for code in codes))
+        config[CONFIG_VERSION_KEY] = CONFIG_VERSION
+        field.config = config
+        changed.append(field)
+    FormField.objects.using(schema_editor.connection.alias).bulk_update(changed, ["config"], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("djangocms_form_builder_countries", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_countries_first, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:36
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("djangocms_form_builder", "0001_initial"),
+        ("djangocms_form_builder_countries", "0002_normalize_countries_first"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CountrySubmission",
+            fields=[],
+            options={
+                "verbose_name": "Submissions per country",
+                "verbose_name_plural": "Submissions per country",
+                "proxy": True,
+                "indexes": [],
+                "constraints": [],
+            },
+            bases=("djangocms_form_builder.formentry",),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("djangocms_form_builder", "0001_initial"),
+        ("djangocms_form_builder_countries", "0003_country_submission"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CountryMultiField",
+            fields=[],
+            options={
+                "verbose_name": "Multiple country field",
+                "verbose_name_plural": "Multiple country fields",
+                "proxy": True,
+                "indexes": [],
+                "constraints": [],
+            },
+            bases=("djangocms_form_builder.formfield",),
+        ),
+    ]
@@ -2,14 +2,20 @@
 Country field model for djangocms-form-builder.
 
 Provides a proxy model that integrates django-countries
-with the Django CMS Form Builder plugin system.
+with the Django CMS Form Builder plugin system, and a proxy of the form
+entries for the "Submissions per country" admin view.
 """
 
-from django import forms
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
-from django_countries import countries
+from djangocms_form_builder.entry_model import FormEntry
 from djangocms_form_builder.models import FormField
 
+from . import metrics
+from .constants import MODE_REMOTE, MODE_STATIC, SHARED_CHOICES_SETTING
+
 
 class CountryField(FormField):
     """
@@ -23,6 +29,12 @@ class CountryField(FormField):
         field_required: Whether field is required
         field_placeholder: Placeholder text (used as blank label)
         countries_first: List of country codes to show first (e.g., ['DE', 'AT', 'CH'])
+        countries_only: Country codes and regions (e.g., ['@EU', 'CH']) to offer,
+            all countries if empty
+        countries_exclude: Country codes and regions not to offer
+        countries_mode: "select" renders all countries, "remote" searches them on
+            demand, "static" loads them from a static file
+        countries_preselect: Whether the country of the client IP is selected initially
     """
 
     class Meta:
@@ -30,54 +42,232 @@ class CountryField(FormField):
         verbose_name = _("Country field")
         verbose_name_plural = _("Country fields")
 
-    def get_form_field(self):
+    @metrics.timed("get_form_field", size=lambda result: len(result[1].choices))
+    def get_form_field(self, request=None):
         """
         Return the Django form field for this country selector.
 
         Uses django-countries to provide all ISO 3166-1 countries
-        with localized names.
+        with localized names. The choice table is memoized per active
+        language and field configuration. The form builder asks each field
+        plugin for its field, so the fields of one request share what
+        build_form_fields() resolved, see get_request_resolved().
+
+        Args:
+            request: Current request, passed by the form builder. Used to
+                preselect the client's country, see build_form_fields()
+
+        Returns:
+            tuple: (field_name, CountryChoiceField) for form construction
+        """
+        return build_form_fields([self], request=request, resolved=get_request_resolved(request))[0]
+
+    async def aget_form_field(self, request=None):
+        """
+        Async version of get_form_field().
+
+        Returns the same field, but reads the country table from the Django
+        cache with the async cache API, see abuild_form_fields().
+        """
+        return (await abuild_form_fields([self], request=request, resolved=get_request_resolved(request)))[0]
+
+
+def build_form_fields(instances, request=None, resolved=None):
+    """
+    Build the form fields of several country fields at once.
+
+    Identical configurations (e.g. billing and shipping country) are
+    resolved once: their fields share one choice table, one cache key
+    and the set of valid codes. Fields limited to some countries accept
+    only those.
+
+    Args:
+        instances: CountryField instances, e.g. all country fields of a form
+        request: Current request, used to preselect the client's country
+            in fields with ``countries_preselect``
+        resolved: Dict of the (key, choices, valid_codes) resolved so far by
+            choices key, extended by this call
+
+    Returns:
+        list: (field_name, CountryChoiceField) tuples in the order of instances
+    """
+    # Imported on first use, so that loading the models on startup does not
+    # import django-countries and the widget machinery
+    from .choices import get_choices_for_key, get_valid_codes
+    from .fields import CountryChoiceField
+    from .widgets import CachedCountrySelect, RemoteCountrySelect, StaticCountrySelect
+
+    if resolved is None:
+        resolved = {}
+    fields = []
+    client_country = None
+    for instance in instances:
+        config = instance.config
+        required = config.get("field_required", False)
+        key = get_config_choices_key(config)
+        if key not in resolved:
+            resolved[key] = (key, get_choices_for_key(key), get_valid_codes(key[4]))
+        key, choices, valid_codes = resolved[key]
+
+        initial = None
+        if config.get("countries_preselect") and request is not None:
+            if client_country is None:
+                from .geoip import get_request_country
+
+                client_country = get_request_country(request) or ""
+            if client_country in valid_codes:
+                initial = client_country
+
+        if config.get("countries_mode") == MODE_REMOTE:
+            widget_class = RemoteCountrySelect
+        elif config.get("countries_mode") == MODE_STATIC:
+            widget_class = StaticCountrySelect
+        else:
+            widget_class = CachedCountrySelect
+
+        fields.append(
+            (
+                instance.field_name,
+                CountryChoiceField(
+                    label=config.get("field_label", ""),
+                    required=required,
+                    choices=choices,
+                    initial=initial,
+                    valid_codes=valid_codes,
+                    widget=widget_class(
+                        attrs={
+                            "class": "form-select",
+                        },
+                        cache_key=key,
+                    ),
+                ),
+            )
+        )
+    return fields
+
+
+async def abuild_form_fields(instances, request=None, resolved=None):
+    """
+    Async version of build_form_fields().
+
+    Loads the country table of the active language and, if choices are
+    shared, the order of each choice table with aget_choices_for_key(), so
+    that building the fields needs no blocking cache access and no
+    ``sync_to_async`` thread hop.
+    """
+    from .choices import aget_choices_for_key, get_valid_codes
+
+    if resolved is None:
+        resolved = {}
+    for instance in instances:
+        key = get_config_choices_key(instance.config)
+        if key not in resolved:
+            resolved[key] = (key, await aget_choices_for_key(key), get_valid_codes(key[4]))
+    return build_form_fields(instances, request=request, resolved=resolved)
+
+
+def get_request_resolved(request):
+    """
+    Return the dict build_form_fields() keeps resolved choices in for a request.
+
+    Returns:
+        dict: Stored on the request, None without request
+    """
+    if request is None:
+        return None
+    return vars(request).setdefault("_country_choices", {})
+
+
+def get_config_choices_key(config):
+    """
+    Return the key of the choice table of a CountryField config.
+
+    See ``choices.get_choices_key()``.
+    """
+    from .choices import get_choices_key, get_countries_first, get_country_selection
+
+    return get_choices_key(
+        countries_first=get_countries_first(config),
+        required=config.get("field_required", False),
+        placeholder=config.get("field_placeholder", ""),
+        normalized=True,
+        countries=get_country_selection(config),
+    )
+
+
+class CountryMultiField(FormField):
+    """
+    Proxy model for selecting several countries in Django CMS Form Builder.
+
+    Submissions store the selected countries as bitmask, see country_sets.
+
+    Configuration options:
+        field_name: Internal field name
+        field_label: Label shown to user
+        field_required: Whether at least one country must be selected
+        countries_only: Country codes and regions to offer, all countries if empty
+        countries_exclude: Country codes and regions not to offer
+    """
+
+    class Meta:
+        proxy = True
+        verbose_name = _("Multiple country field")
+        verbose_name_plural = _("Multiple country fields")
+
+    def get_form_field(self, request=None):
+        """
+        Return the Django form field for this multiple country selector.
+
+        Args:
+            request: Current request, passed by the form builder
 
         Returns:
-            tuple: (field_name, ChoiceField) for form construction
+            tuple: (field_name, CountrySetField) for form construction
         """
-        first_countries = self.config.get("countries_first", [])
-        choices = list(countries)
-
-        if first_countries:
-            first_choices = []
-            remaining_choices = []
-            first_set = {code.upper() for code in first_countries}
-
-            for code, name in choices:
-                if code in first_set:
-                    first_choices.append((code, name))
-                else:
-                    remaining_choices.append((code, name))
-
-            # Sort first_choices by the order specified in first_countries
-            first_order = {code.upper(): i for i, code in enumerate(first_countries)}
-            first_choices.sort(key=lambda x: first_order.get(x[0], 999))
-
-            # Add separator between priority and remaining countries
-            if first_choices:
-                choices = first_choices + [("", "---")] + remaining_choices
-            else:
-                choices = remaining_choices
-
-        required = self.config.get("field_required", False)
-        placeholder = self.config.get("field_placeholder", "")
-
-        if not required:
-            blank_label = placeholder if placeholder else _("Select a country")
-            choices = [("", blank_label)] + choices
-
-        return self.field_name, forms.ChoiceField(
-            label=self.config.get("field_label", ""),
-            required=required,
-            choices=choices,
-            widget=forms.Select(
-                attrs={
-                    "class": "form-select",
-                }
+        from .choices import get_choices_for_key, get_choices_key, get_valid_codes
+        from .country_sets import get_country_set_selection
+        from .fields import CountrySetField
+        from .widgets import CachedCountrySelectMultiple
+
+        config = self.config
+        countries = get_country_set_selection(config)
+        key = get_choices_key(required=True, normalized=True, countries=countries)
+        return (
+            self.field_name,
+            CountrySetField(
+                label=config.get("field_label", ""),
+                required=config.get("field_required", False),
+                choices=get_choices_for_key(key),
+                valid_codes=get_valid_codes(countries),
+                widget=CachedCountrySelectMultiple(
+                    attrs={
+                        "class": "form-select",
+                        "size": "8",
+                    },
+                    cache_key=key,
+                ),
             ),
         )
+
+
+@receiver(post_save, sender=CountryField)
+@receiver(post_delete, sender=CountryField)
+def invalidate_shared_choices(**kwargs):
+    """Make all processes reload the shared choice tables after a country field changed."""
+    if getattr(settings, SHARED_CHOICES_SETTING, False):
+        from .choices import bump_cache_version
+
+        bump_cache_version()
+
+
+class CountrySubmission(FormEntry):
+    """
+    Proxy of the form entries, to add the submissions per country to the admin.
+
+    See CountrySubmissionAdmin.
+    """
+
+    class Meta:
+        proxy = True
+        verbose_name = _("Submissions per country")
+        verbose_name_plural = _("Submissions per country")
@@ -0,0 +1,120 @@
+"""
+Prewarming of the country choice tables.
+
+Builds the choice tables and pre-rendered options for every language in
+``settings.LANGUAGES`` and every field configuration used by existing
+CountryField plugins, so that the first requests after a deploy do not
+pay for translating and sorting the country list.
+
+Used by the ``warm_country_choices`` management command and, if
+``DJANGOCMS_FORM_BUILDER_COUNTRIES_PREWARM`` is set, on startup.
+"""
+
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.utils.translation import override
+
+from .choices import (
+    build_country_table,
+    get_cache,
+    get_cache_key,
+    get_choices_key,
+    get_countries_first,
+    get_country_selection,
+)
+
+# Configurations of fields without countries_first and limits, always prewarmed
+DEFAULT_CONFIGURATIONS = {((), True, "", None), ((), False, "", None)}
+
+
+def _sort_key(configuration):
+    # None (all countries) sorts before any selection
+    countries_first, required, placeholder, countries = configuration
+    return countries_first, required, placeholder, countries is not None, countries or ()
+
+
+def get_field_configurations():
+    """
+    Return the distinct configurations of all CountryField plugins.
+
+    Returns:
+        list: Sorted (countries_first, required, placeholder, countries)
+        tuples, including the default configurations
+    """
+    from .models import CountryField
+
+    configurations = set(DEFAULT_CONFIGURATIONS)
+    plugins = CountryField.objects.filter(plugin_type="CountryFieldPlugin")
+    for config in plugins.values_list("config", flat=True).iterator():
+        config = config or {}
+        configurations.add(
+            (
+                get_countries_first(config),
+                bool(config.get("field_required", False)),
+                config.get("field_placeholder", "") or "",
+                get_country_selection(config),
+            )
+        )
+    return sorted(configurations, key=_sort_key)
+
+
+def prewarm(languages=None, configurations=None, store=False):
+    """
+    Build the choice tables and options for languages and configurations.
+
+    Args:
+        languages: Language codes, defaults to all ``settings.LANGUAGES``
+        configurations: (countries_first, required, placeholder, countries) tuples,
+            defaults to get_field_configurations()
+        store: Rebuild the country table of every language and overwrite
+            it in the Django cache instead of reusing tables stored before
+
+    Returns:
+        list: Keys of the prewarmed tables, see get_choices_key()
+    """
+    from .widgets import get_rendered_options
+
+    if languages is None:
+        languages = [code for code, name in settings.LANGUAGES]
+    if configurations is None:
+        configurations = get_field_configurations()
+
+    keys = []
+    for language in languages:
+        with override(language):
+            if store:
+                get_cache().set(get_cache_key(language), build_country_table())
+            for countries_first, required, placeholder, countries in configurations:
+                key = get_choices_key(countries_first, required, placeholder, countries=countries)
+                get_rendered_options(key)
+                keys.append(key)
+    return keys
+
+
+def prewarm_in_background():
+    """
+    Prewarm the tables in a daemon thread.
+
+    Avoids querying the database during app initialization. If the plugin
+    table is not available (e.g. before migrating), only the default
+    configurations are prewarmed.
+
+    Returns:
+        threading.Thread: The started thread
+    """
+
+    def run():
+        try:
+            try:
+                configurations = get_field_configurations()
+            except DatabaseError:
+                configurations = sorted(DEFAULT_CONFIGURATIONS, key=_sort_key)
+            prewarm(configurations=configurations)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=run, name="warm_country_choices", daemon=True)
+    thread.start()
+    return thread
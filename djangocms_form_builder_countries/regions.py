@@ -0,0 +1,85 @@
+"""
+Built-in region presets.
+
+The ``countries_only`` and ``countries_exclude`` options of a country
+field accept regions besides country codes. Regions are stored as their
+name prefixed with REGION_PREFIX (e.g. ``"@EU"``), as country codes added
+with ``COUNTRIES_OVERRIDE`` may use the same letters (e.g. ``"EU"``).
+Their countries are fixed tables, expanded once per configuration.
+"""
+
+from django.utils.translation import gettext_lazy as _
+
+REGION_PREFIX = "@"
+
+EU = frozenset(
+    {
+        "AT",
+        "BE",
+        "BG",
+        "CY",
+        "CZ",
+        "DE",
+        "DK",
+        "EE",
+        "ES",
+        "FI",
+        "FR",
+        "GR",
+        "HR",
+        "HU",
+        "IE",
+        "IT",
+        "LT",
+        "LU",
+        "LV",
+        "MT",
+        "NL",
+        "PL",
+        "PT",
+        "RO",
+        "SE",
+        "SI",
+        "SK",
+    }
+)
+EEA = EU | {"IS", "LI", "NO"}
+DACH = frozenset({"AT", "CH", "DE"})
+
+# Region names mapped to their label and countries
+REGIONS = {
+    "EU": (_("European Union (EU)"), EU),
+    "EEA": (_("European Economic Area (EEA)"), EEA),
+    "DACH": (_("Germany, Austria, Switzerland (DACH)"), DACH),
+}
+
+
+def get_region_choices():
+    """
+    Return the regions as choices of the countries_only and countries_exclude options.
+
+    Returns:
+        list: (value, label) pairs, values prefixed with REGION_PREFIX
+    """
+    return [(f"{REGION_PREFIX}{name}", label) for name, (label, codes) in REGIONS.items()]
+
+
+def expand_codes(codes):
+    """
+    Replace regions in a list of country codes by their countries.
+
+    Unknown regions expand to no countries.
+
+    Args:
+        codes: Normalized country codes and prefixed region names
+
+    Returns:
+        frozenset: Country codes
+    """
+    expanded = set()
+    for code in codes:
+        if code.startswith(REGION_PREFIX):
+            expanded.update(REGIONS.get(code[len(REGION_PREFIX) :], (None, ()))[1])
+        else:
+            expanded.add(code)
+    return frozenset(expanded)
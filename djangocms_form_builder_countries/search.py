@@ -0,0 +1,204 @@
+"""
+Prefix search over country names.
+
+Backs the country search endpoint used by the remote select mode. The
+index is a sorted array of normalized search keys per language, searched
+with bisect, and built from the same choice table as the inline select.
+
+Keys are casefolded and stripped of diacritics, so "osterreich",
+"turkiye" or "cote d'ivoire" find their countries. Besides the localized
+name, every country is indexed under its English, official and former
+names and its ISO alpha-2 and alpha-3 codes.
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+
+from django.dispatch import receiver
+from django.utils.translation import get_language, override
+from django_countries import countries
+
+from .choices import CHOICES_CACHE_SIZE, choices_cleared, get_all_countries, normalize_codes
+from .constants import SEARCH_LIMIT
+
+# Letters NFKD does not decompose into a base letter and apostrophes,
+# which are dropped so that "cote divoire" matches as well
+TRANSLITERATIONS = str.maketrans(
+    {
+        "æ": "ae",
+        "œ": "oe",
+        "ø": "o",
+        "đ": "d",
+        "ð": "d",
+        "þ": "th",
+        "ł": "l",
+        "ı": "i",
+        "'": "",
+        "’": "",
+        "ʼ": "",
+        "‘": "",
+    }
+)
+
+# German style transliteration, indexed as an alternative ("Oesterreich")
+UMLAUTS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue"})
+
+NON_ALPHANUMERIC = re.compile(r"[\W_]+")
+
+
+def normalize_text(text, umlauts=False):
+    """
+    Return the search key for a text.
+
+    Casefolds, transliterates and strips diacritics, and collapses
+    punctuation and whitespace into single spaces.
+    """
+    text = str(text).casefold()
+    if umlauts:
+        text = text.translate(UMLAUTS)
+    text = unicodedata.normalize("NFKD", text.translate(TRANSLITERATIONS))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return NON_ALPHANUMERIC.sub(" ", text).strip()
+
+
+def get_search_keys(text):
+    """
+    Return all keys a text is indexed under.
+
+    Next to the normalized text itself this includes its German style
+    transliteration and the text starting at each further word, so that
+    "states" finds "United States".
+    """
+    keys = set()
+    for key in {normalize_text(text), normalize_text(text, umlauts=True)}:
+        words = key.split(" ")
+        keys.update(" ".join(words[i:]) for i in range(len(words)))
+    keys.discard("")
+    return keys
+
+
+class CountrySearchIndex:
+    """
+    Sorted prefix index over the country names of one language.
+
+    Args:
+        choices: (code, name) pairs in display order
+        alternate_names: Optional mapping of country codes to further
+            names or codes the country should be found by
+    """
+
+    __slots__ = ("keys", "codes", "names", "positions")
+
+    def __init__(self, choices, alternate_names=None):
+        self.names = {}
+        self.positions = {}
+        for position, (code, name) in enumerate(choices):
+            self.names[code] = str(name)
+            self.positions[code] = position
+
+        alternate_names = alternate_names or {}
+        entries = set()
+        for code, name in self.names.items():
+            for text in (name, code, *alternate_names.get(code, ())):
+                entries.update((key, code) for key in get_search_keys(text))
+        entries = sorted(entries)
+        self.keys = [key for key, code in entries]
+        self.codes = [code for key, code in entries]
+
+    def lookup(self, query):
+        """
+        Return the countries with a search key starting with query.
+
+        Returns:
+            dict: Matching country codes mapped to 0 for an exact key
+            match (e.g. an ISO code) or 1 for a prefix match
+        """
+        prefix = normalize_text(query)
+        matches = {}
+        if not prefix:
+            return matches
+        index = bisect_left(self.keys, prefix)
+        while index < len(self.keys) and self.keys[index].startswith(prefix):
+            code = self.codes[index]
+            rank = 0 if self.keys[index] == prefix else 1
+            matches[code] = min(rank, matches.get(code, rank))
+            index += 1
+        return matches
+
+    def search(self, query, countries_first=(), limit=SEARCH_LIMIT, countries=None):
+        """
+        Search countries by name or code prefix.
+
+        Matches are ordered like the inline select: countries from
+        ``countries_first`` in their configured order, then exact matches,
+        then all others in display order. An empty query returns the
+        ``countries_first`` countries only. If ``countries`` is given, only
+        those countries are returned.
+
+        Returns:
+            list: (code, name) pairs
+        """
+        first_order = {code: i for i, code in enumerate(normalize_codes(countries_first)) if code in self.names}
+        if query:
+            matches = self.lookup(query)
+        else:
+            matches = dict.fromkeys(first_order, 0)
+        if countries is not None:
+            countries = set(normalize_codes(countries))
+            matches = {code: rank for code, rank in matches.items() if code in countries}
+        ordered = sorted(
+            matches,
+            key=lambda code: (first_order.get(code, len(first_order)), matches[code], self.positions[code]),
+        )
+        return [(code, self.names[code]) for code in ordered[:limit]]
+
+
+def get_alternate_names():
+    """
+    Return further names and codes for each country.
+
+    Includes the English name, the official ISO name, former names and
+    the alpha-3 code. Names are evaluated in the active language.
+    """
+    from django_countries.data import COUNTRIES
+
+    with override(None):
+        english_names = {code: countries.name(code) for code in countries.countries}
+    return {
+        code: [
+            english_name,
+            COUNTRIES.get(code, ""),
+            *countries.OLD_NAMES.get(code, ()),
+            countries.alpha3(code),
+        ]
+        for code, english_name in english_names.items()
+    }
+
+
+@lru_cache(maxsize=CHOICES_CACHE_SIZE)
+def _build_index(language):
+    with override(language):
+        return CountrySearchIndex(get_all_countries(), get_alternate_names())
+
+
+def get_search_index(language=None):
+    """Return the search index for a language (default: the active language)."""
+    return _build_index(language or get_language())
+
+
+def search_countries(query, countries_first=(), limit=SEARCH_LIMIT, language=None, countries=None):
+    """
+    Search countries by name or code prefix in a language.
+
+    Returns:
+        list: (code, name) pairs, see CountrySearchIndex.search()
+    """
+    return get_search_index(language).search(query, countries_first, limit, countries)
+
+
+@receiver(choices_cleared)
+def clear_search_index(**kwargs):
+    """Drop search indexes together with the choice tables."""
+    _build_index.cache_clear()
@@ -0,0 +1,93 @@
+/*
+ * Static country lists for djangocms-form-builder-countries.
+ *
+ * Fills selects rendered in the static mode (select[data-country-list])
+ * with the countries of the static list of their language. The countries
+ * of data-countries-first come first, followed by a separator and all
+ * other countries, like the drop down rendered by the server. Fields
+ * limited to some countries list them in data-countries. Each list is
+ * fetched once per page.
+ */
+(function () {
+    "use strict";
+
+    var SEPARATOR = "---";
+    var lists = {};
+
+    function load(url) {
+        if (!lists[url]) {
+            lists[url] = fetch(url, {headers: {Accept: "application/json"}}).then(function (response) {
+                return response.ok ? response.json() : {countries: []};
+            });
+        }
+        return lists[url];
+    }
+
+    function createOption(value, label) {
+        var option = document.createElement("option");
+        option.value = value;
+        option.textContent = label;
+        return option;
+    }
+
+    function fill(select, countries) {
+        var selected = select.value;
+        if (select.dataset.countries !== undefined) {
+            var allowed = select.dataset.countries.split(",");
+            countries = countries.filter(function (country) {
+                return allowed.indexOf(country[0]) !== -1;
+            });
+        }
+        var names = {};
+        countries.forEach(function (country) {
+            names[country[0]] = country[1];
+        });
+        var first = (select.dataset.countriesFirst || "").split(",").filter(function (code) {
+            return code in names;
+        });
+
+        var fragment = document.createDocumentFragment();
+        Array.prototype.forEach.call(select.options, function (option) {
+            if (option.value === "") {
+                fragment.appendChild(option.cloneNode(true));
+            }
+        });
+        first.forEach(function (code) {
+            fragment.appendChild(createOption(code, names[code]));
+        });
+        if (first.length) {
+            var separator = createOption(SEPARATOR, SEPARATOR);
+            separator.disabled = true;
+            fragment.appendChild(separator);
+        }
+        countries.forEach(function (country) {
+            if (first.indexOf(country[0]) === -1) {
+                fragment.appendChild(createOption(country[0], country[1]));
+            }
+        });
+
+        select.innerHTML = "";
+        select.appendChild(fragment);
+        select.value = selected;
+    }
+
+    function enhance(select) {
+        if (select.dataset.countryListReady) {
+            return;
+        }
+        select.dataset.countryListReady = "1";
+        load(select.dataset.countryList).then(function (data) {
+            fill(select, data.countries);
+        });
+    }
+
+    function init() {
+        document.querySelectorAll("select[data-country-list]").forEach(enhance);
+    }
+
+    if (document.readyState === "loading") {
+        document.addEventListener("DOMContentLoaded", init);
+    } else {
+        init();
+    }
+})();
@@ -0,0 +1,92 @@
+/*
+ * Country search for djangocms-form-builder-countries.
+ *
+ * Enhances selects rendered in the remote mode (select[data-country-search])
+ * with a search input. Matching countries are fetched from the country
+ * search endpoint and replace the options of the select, which keeps
+ * submitting the country code.
+ */
+(function () {
+    "use strict";
+
+    var DEBOUNCE_MS = 200;
+
+    function replaceOptions(select, results) {
+        var selected = select.value;
+        var keep = [];
+        Array.prototype.forEach.call(select.options, function (option) {
+            if (option.value === "" || option.value === selected) {
+                keep.push(option);
+            }
+        });
+        select.innerHTML = "";
+        keep.forEach(function (option) {
+            select.appendChild(option);
+        });
+        results.forEach(function (result) {
+            if (result.code === selected) {
+                return;
+            }
+            var option = document.createElement("option");
+            option.value = result.code;
+            option.textContent = result.name;
+            select.appendChild(option);
+        });
+    }
+
+    function search(select, query) {
+        var params = new URLSearchParams({
+            q: query,
+            first: select.dataset.countriesFirst || "",
+            language: select.dataset.language || "",
+        });
+        if (select.dataset.countries !== undefined) {
+            params.set("countries", select.dataset.countries);
+        }
+        return fetch(select.dataset.countrySearch + "?" + params.toString(), {
+            headers: {Accept: "application/json"},
+        })
+            .then(function (response) {
+                return response.ok ? response.json() : {results: []};
+            })
+            .then(function (data) {
+                replaceOptions(select, data.results);
+            });
+    }
+
+    function enhance(select) {
+        if (select.dataset.countrySearchReady) {
+            return;
+        }
+        select.dataset.countrySearchReady = "1";
+
+        var input = document.createElement("input");
+        input.type = "search";
+        input.className = "form-control mb-1";
+        input.autocomplete = "off";
+        if (select.id) {
+            input.setAttribute("aria-controls", select.id);
+        }
+        select.parentNode.insertBefore(input, select);
+
+        var timer = null;
+        input.addEventListener("input", function () {
+            window.clearTimeout(timer);
+            timer = window.setTimeout(function () {
+                search(select, input.value.trim());
+            }, DEBOUNCE_MS);
+        });
+        // Offer the priority countries before anything was typed
+        search(select, "");
+    }
+
+    function init() {
+        document.querySelectorAll("select[data-country-search]").forEach(enhance);
+    }
+
+    if (document.readyState === "loading") {
+        document.addEventListener("DOMContentLoaded", init);
+    } else {
+        init();
+    }
+})();
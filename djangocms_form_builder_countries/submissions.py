@@ -0,0 +1,165 @@
+"""
+Form submissions per country.
+
+Counts the form entries stored by djangocms-form-builder per submitted
+country. Only the values of country fields are read from the database,
+entry by entry in chunks, and added to a running count, so memory use does
+not depend on the number of entries. Every country selected in a multiple
+country field counts as a submission of that country; the bitmasks those
+fields store are decoded without parsing JSON lists.
+
+Used by the ``country_submissions`` management command and the
+"Submissions per country" admin view.
+"""
+
+from collections import Counter
+
+from django.db.models.fields.json import KeyTextTransform
+from djangocms_form_builder.entry_model import FormEntry
+from djangocms_form_builder.models import Form
+
+from .choices import get_country_names
+from .country_sets import decode_countries
+
+# Number of entries fetched from the database at once
+CHUNK_SIZE = 2000
+
+
+# Plugin types of the country fields counted as submissions
+COUNTRY_PLUGIN_TYPES = ("CountryFieldPlugin", "CountryMultiFieldPlugin")
+
+
+def get_all_country_fields(form_names=None, plugin_types=COUNTRY_PLUGIN_TYPES):
+    """
+    Return the field names of the country fields of every form, per plugin type.
+
+    Reads the country field plugins with one query and the plugins of their
+    placeholders, with the names of the forms among them, with another. The
+    forms of the fields are found by walking up the parents in Python.
+
+    Args:
+        form_names: Only return these forms, defaults to all forms
+        plugin_types: Plugin types of the country fields to return
+
+    Returns:
+        dict: Plugin types mapped to dicts of form names mapped to sets of
+        country field names
+    """
+    from cms.models import CMSPlugin
+
+    from .models import CountryField
+
+    fields = {plugin_type: {} for plugin_type in plugin_types}
+    plugins = CountryField.objects.filter(plugin_type__in=plugin_types, parent__isnull=False)
+    plugins = list(plugins.values_list("plugin_type", "placeholder_id", "parent_id", "config"))
+    if not plugins:
+        return fields
+
+    parents = {}
+    forms = {}
+    form_name_lookup = f"{Form._meta.get_field('cmsplugin_ptr').related_query_name()}__form_name"
+    tree = CMSPlugin.objects.filter(placeholder_id__in={placeholder_id for _, placeholder_id, _, _ in plugins})
+    for pk, parent_id, plugin_type, form_name in tree.values_list("pk", "parent_id", "plugin_type", form_name_lookup):
+        parents[pk] = parent_id
+        if plugin_type == "FormPlugin" and form_name and (form_names is None or form_name in form_names):
+            forms[pk] = form_name
+
+    for plugin_type, _, parent_id, config in plugins:
+        field_name = config.get("field_name")
+        if not field_name:
+            continue
+        while parent_id is not None:
+            if parent_id in forms:
+                fields[plugin_type].setdefault(forms[parent_id], set()).add(field_name)
+            parent_id = parents.get(parent_id)
+    return fields
+
+
+def get_country_fields(form_names=None, plugin_type="CountryFieldPlugin"):
+    """
+    Return the field names of the country fields of every form.
+
+    Args:
+        form_names: Only return these forms, defaults to all forms
+        plugin_type: "CountryMultiFieldPlugin" to return the multiple
+            country fields instead
+
+    Returns:
+        dict: Form names mapped to sets of country field names
+    """
+    return get_all_country_fields(form_names, (plugin_type,))[plugin_type]
+
+
+def iter_field_values(fields, chunk_size=CHUNK_SIZE):
+    """
+    Yield the submitted values of fields, without the rest of the entries.
+
+    Forms sharing the same field names are read with one query.
+
+    Args:
+        fields: Form names mapped to field names, see get_country_fields()
+        chunk_size: Number of entries fetched from the database at once
+
+    Yields:
+        str: Submitted values, None for fields missing from an entry
+    """
+    forms_by_fields = {}
+    for form_name, field_names in fields.items():
+        forms_by_fields.setdefault(tuple(sorted(field_names)), []).append(form_name)
+
+    for field_names, forms in forms_by_fields.items():
+        values = FormEntry.objects.filter(form_name__in=forms).values_list(
+            *(KeyTextTransform(field_name, "entry_data") for field_name in field_names)
+        )
+        for row in values.iterator(chunk_size=chunk_size):
+            yield from row
+
+
+def count_submissions(form_names=None, chunk_size=CHUNK_SIZE, fields=None):
+    """
+    Count the submitted country codes of country fields.
+
+    Entries are streamed with ``iterator(chunk_size=...)`` and only the
+    country values are selected, not the whole ``entry_data``.
+
+    Args:
+        form_names: Only count entries of these forms, defaults to all forms
+            with country fields
+        chunk_size: Number of entries fetched from the database at once
+        fields: Country fields as returned by get_all_country_fields(), to
+            reuse the fields already read by the caller
+
+    Returns:
+        Counter: Country codes mapped to the number of submissions, without
+        empty values
+    """
+    if fields is None:
+        fields = get_all_country_fields(form_names)
+    elif form_names is not None:
+        fields = {
+            plugin_type: {form_name: names for form_name, names in forms.items() if form_name in form_names}
+            for plugin_type, forms in fields.items()
+        }
+    counts = Counter()
+    values = iter_field_values(fields.get("CountryFieldPlugin", {}), chunk_size)
+    counts.update(code for code in values if code)
+    for mask in iter_field_values(fields.get("CountryMultiFieldPlugin", {}), chunk_size):
+        if mask:
+            counts.update(decode_countries(mask))
+    return counts
+
+
+def get_submissions_per_country(form_names=None, chunk_size=CHUNK_SIZE, fields=None):
+    """
+    Return the number of submissions per country, most submitted first.
+
+    Takes the same arguments as count_submissions().
+
+    Returns:
+        list: (code, name, count) tuples, with names in the active language.
+        Codes that are no longer selectable are named by their code.
+    """
+    names = get_country_names()
+    counts = count_submissions(form_names, chunk_size, fields)
+    ranking = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return [(code, names.get(code, code), count) for code, count in ranking]
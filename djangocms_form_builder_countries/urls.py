@@ -0,0 +1,18 @@
+"""
+URL configuration for djangocms-form-builder-countries.
+
+Include in the project's URL configuration to enable the remote
+country select mode::
+
+    path("countries/", include("djangocms_form_builder_countries.urls")),
+"""
+
+from django.urls import path
+
+from . import views
+
+app_name = "djangocms_form_builder_countries"
+
+urlpatterns = [
+    path("search/", views.country_search, name="search"),
+]
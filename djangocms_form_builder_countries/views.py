@@ -0,0 +1,52 @@
+"""
+Views for the country field.
+
+Provides the JSON endpoint answering country prefix searches for
+fields using the remote select mode.
+"""
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.translation import get_language
+from django.views.decorators.http import require_GET
+
+from .constants import SEARCH_LIMIT, SEARCH_MAX_LIMIT
+
+
+@require_GET
+def country_search(request):
+    """
+    Return countries whose name or ISO code starts with the query.
+
+    Matching ignores case and accents, see search.py.
+
+    Query parameters:
+        q: Name or code prefix to search for
+        first: Comma separated country codes to rank first
+        countries: Comma separated country codes to limit the results to
+        language: Language of the names (defaults to the active language)
+        limit: Maximum number of results
+    """
+    language = request.GET.get("language", "")
+    if language not in dict(settings.LANGUAGES):
+        language = get_language()
+    try:
+        limit = min(max(int(request.GET.get("limit", SEARCH_LIMIT)), 1), SEARCH_MAX_LIMIT)
+    except ValueError:
+        limit = SEARCH_LIMIT
+    countries_first = [code for code in request.GET.get("first", "").split(",") if code]
+    countries = None
+    if "countries" in request.GET:
+        countries = [code for code in request.GET["countries"].split(",") if code]
+    # The search index is imported on first use, as the URL configuration is
+    # loaded on startup
+    from .search import search_countries
+
+    results = search_countries(
+        request.GET.get("q", "").strip(),
+        countries_first=countries_first,
+        limit=limit,
+        language=language,
+        countries=countries,
+    )
+    return JsonResponse({"results": [{"code": code, "name": name} for code, name in results]})
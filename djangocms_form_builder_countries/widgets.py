@@ -0,0 +1,240 @@
+"""
+Widgets for the country field.
+
+Rendering a select through Django's widget machinery builds an option
+dict and renders a template for each of the 250+ countries. The option
+list only depends on the language and the field configuration, so the
+CachedCountrySelect renders it once and only marks the selected option
+on each render.
+"""
+
+from functools import lru_cache
+
+from django import forms
+from django.dispatch import receiver
+from django.urls import NoReverseMatch, reverse
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from django.utils.translation import override
+from djangocms_form_builder import constants
+
+from . import metrics
+from .choices import CHOICES_CACHE_SIZE, SEPARATOR, choices_cleared, get_choices_for_key, get_country_names
+from .country_lists import get_country_list, get_published_url
+from .search import get_search_index
+
+# Same markup as Django's select.html / select_option.html templates
+OPTION_HTML = '\n  <option value="{}"{}>{}</option>\n'
+
+
+class RenderedOptions:
+    """
+    Pre-rendered ``<option>`` elements of a select.
+
+    Keeps the joined HTML and the position of the first option for each
+    value, so that marking an option as selected is a single splice.
+    """
+
+    __slots__ = ("html", "positions")
+
+    def __init__(self, choices):
+        parts = []
+        self.positions = {}
+        length = 0
+        for index, (value, label) in enumerate(choices):
+            value = str(value)
+            # Separators (ours and django-countries' COUNTRIES_FIRST_BREAK)
+            # must never be picked
+            disabled = " disabled" if value == SEPARATOR[0] or (value == "" and index > 0) else ""
+            option = format_html(OPTION_HTML, value, mark_safe(disabled), label)
+            if value not in self.positions:
+                selected = format_html(OPTION_HTML, value, mark_safe(disabled + " selected"), label)
+                self.positions[value] = (length, length + len(option), selected)
+            parts.append(option)
+            length += len(option)
+        self.html = "".join(parts)
+
+    def render(self, values):
+        """Return the options HTML with the first matching value selected."""
+        for value in values:
+            if value in self.positions:
+                start, end, selected = self.positions[value]
+                return mark_safe(self.html[:start] + selected + self.html[end:])
+        return mark_safe(self.html)
+
+    def render_multiple(self, values):
+        """Return the options HTML with all matching values selected."""
+        spans = sorted(self.positions[value] for value in set(values) if value in self.positions)
+        parts = []
+        last = 0
+        for start, end, selected in spans:
+            parts.append(self.html[last:start])
+            parts.append(selected)
+            last = end
+        parts.append(self.html[last:])
+        return mark_safe("".join(parts))
+
+
+@lru_cache(maxsize=CHOICES_CACHE_SIZE)
+def get_rendered_options(key):
+    """Return the pre-rendered options of the choice table identified by key."""
+    language = key[0]
+    with override(language):
+        metrics.count("options.miss")
+        return RenderedOptions(get_choices_for_key(key))
+
+
+@receiver(choices_cleared)
+def clear_rendered_options(**kwargs):
+    """Drop pre-rendered options together with the choice tables."""
+    get_rendered_options.cache_clear()
+
+
+class CachedCountrySelect(forms.Select):
+    """
+    Select widget rendering its options from a shared HTML fragment.
+
+    Args:
+        cache_key: Key of the choice table as returned by
+            ``choices.get_choices_key()``. Without a key the options are
+            rendered from ``choices`` on every render.
+    """
+
+    template_name = "djangocms_form_builder_countries/widgets/country_select.html"
+
+    def __init__(self, attrs=None, choices=(), cache_key=None):
+        super().__init__(attrs, choices)
+        self.cache_key = cache_key
+
+    @metrics.timed("render")
+    def render(self, name, value, attrs=None, renderer=None):
+        return super().render(name, value, attrs, renderer)
+
+    def get_context(self, name, value, attrs):
+        # Skip ChoiceWidget.get_context, which builds an option dict per choice
+        context = forms.Widget.get_context(self, name, value, attrs)
+        if self.cache_key is not None:
+            metrics.count("options.lookup")
+            options = get_rendered_options(self.cache_key)
+        else:
+            options = RenderedOptions(self.choices)
+        context["widget"]["options"] = options.render(context["widget"]["value"])
+        return context
+
+
+class DeferredCountrySelect(CachedCountrySelect):
+    """
+    Select widget shipping only the blank and the selected option.
+
+    Base of the widgets whose other options are loaded by a script,
+    configured with the attributes returned by ``get_script_attrs()``.
+    Renders all options like CachedCountrySelect when the script has
+    nothing to load from or no cache key is given, which is always the
+    case for this class itself.
+    """
+
+    def get_script_attrs(self, language):
+        """Return the attributes configuring the script, or None to render all options."""
+        return None
+
+    def get_names(self, language):
+        """Return the country codes mapped to the names of the selected options."""
+        return get_country_names(language)
+
+    def get_context(self, name, value, attrs):
+        if self.cache_key is None:
+            return super().get_context(name, value, attrs)
+        language, countries_first, required, placeholder, countries = self.cache_key
+        script_attrs = self.get_script_attrs(language)
+        if script_attrs is None:
+            return super().get_context(name, value, attrs)
+
+        context = forms.Widget.get_context(self, name, value, attrs)
+        names = self.get_names(language)
+        values = context["widget"]["value"]
+
+        choices = []
+        first_choice = next(iter(self.choices), None)
+        if first_choice is not None and first_choice[0] == "":
+            choices.append(first_choice)
+        choices.extend(
+            (code, names[code]) for code in values[:1] if code in names and (countries is None or code in countries)
+        )
+
+        context["widget"]["options"] = RenderedOptions(choices).render(values)
+        context["widget"]["attrs"].update(script_attrs)
+        context["widget"]["attrs"]["data-countries-first"] = ",".join(countries_first)
+        if countries is not None:
+            context["widget"]["attrs"]["data-countries"] = ",".join(countries)
+        return context
+
+
+class RemoteCountrySelect(DeferredCountrySelect):
+    """
+    Select widget searching countries through the country search endpoint.
+
+    All countries but the selected one are searched by
+    ``country-search.js``. Renders all options when the endpoint is not
+    part of the URL configuration.
+    """
+
+    def get_script_attrs(self, language):
+        try:
+            url = reverse("djangocms_form_builder_countries:search")
+        except NoReverseMatch:
+            return None
+        return {"data-country-search": url, "data-language": language}
+
+    def get_names(self, language):
+        return get_search_index(language).names
+
+
+class StaticCountrySelect(DeferredCountrySelect):
+    """
+    Select widget loading countries from the static country list.
+
+    All countries but the selected one are loaded from the static country
+    list of the language by ``country-list.js``, which puts the
+    ``countries_first`` of the field first. Renders all options when the
+    list is not published as static file.
+    """
+
+    def get_script_attrs(self, language):
+        url = get_published_url(get_country_list(language))
+        if url is None:
+            return None
+        return {"data-country-list": url}
+
+
+class CachedCountrySelectMultiple(CachedCountrySelect):
+    """
+    Multiple select widget rendering its options from a shared HTML fragment.
+
+    Used by CountryMultiField, see CachedCountrySelect.
+    """
+
+    allow_multiple_selected = True
+
+    def get_context(self, name, value, attrs):
+        context = forms.Widget.get_context(self, name, value, attrs)
+        if self.cache_key is not None:
+            metrics.count("options.lookup")
+            options = get_rendered_options(self.cache_key)
+        else:
+            options = RenderedOptions(self.choices)
+        context["widget"]["options"] = options.render_multiple(context["widget"]["value"])
+        context["widget"]["attrs"]["multiple"] = True
+        return context
+
+    def value_from_datadict(self, data, files, name):
+        return forms.SelectMultiple.value_from_datadict(self, data, files, name)
+
+    def value_omitted_from_data(self, data, files, name):
+        # An unselected multiple select is not part of the submitted data
+        return False
+
+
+# The form builder frontends pick CSS classes by widget class name
+for widget_class in (CachedCountrySelect, RemoteCountrySelect, StaticCountrySelect):
+    constants.attr_dict.setdefault(widget_class.__name__, constants.attr_dict.get("Select", {}))
+constants.attr_dict.setdefault(CachedCountrySelectMultiple.__name__, constants.attr_dict.get("SelectMultiple", {}))
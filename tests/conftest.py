@@ -1,11 +1,211 @@
 """
 Pytest configuration for djangocms-form-builder-countries tests.
 
-Provides fixtures for testing Django CMS plugins.
+Provides fixtures for testing Django CMS plugins and form entries, the
+GeoIP fixture databases and the timing fixtures used by the benchmark
+suite.
 """
 
+import asyncio
+import json
+import platform
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
 import pytest
 
+BENCHMARK_PACKAGES = ("Django", "django-cms", "djangocms-form-builder", "django-countries")
+
+benchmark_results = pytest.StashKey()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark", "country field benchmarks")
+    group.addoption(
+        "--bench-rounds",
+        type=int,
+        default=20,
+        help="Number of timed rounds per benchmark (default: 20).",
+    )
+    group.addoption(
+        "--bench-json",
+        default=None,
+        metavar="PATH",
+        help="Write benchmark results as JSON to PATH.",
+    )
+    group.addoption(
+        "--bench-concurrency",
+        default="1,4,16",
+        metavar="LEVELS",
+        help="Comma separated concurrency levels of the concurrency benchmarks (default: 1,4,16).",
+    )
+
+
+def pytest_configure(config):
+    config.stash[benchmark_results] = []
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config.stash.get(benchmark_results, [])
+    if not results:
+        return
+    terminalreporter.section("country field benchmarks")
+    for result in results:
+        line = f"{result['name']:<70} median {result['median_us']:>10.1f} us  min {result['min_us']:>10.1f} us"
+        if "throughput_rps" in result:
+            line += f"  p99 {result['p99_us']:>10.1f} us  {result['throughput_rps']:>8.1f} req/s"
+        if "per_field_ratio" in result:
+            line += f"  per field x{result['per_field_ratio']:.2f}"
+        terminalreporter.write_line(line)
+
+
+def pytest_sessionfinish(session):
+    path = session.config.getoption("--bench-json")
+    results = session.config.stash.get(benchmark_results, [])
+    if not path or not results:
+        return
+    environment = {"python": platform.python_version(), "implementation": platform.python_implementation()}
+    for package in BENCHMARK_PACKAGES:
+        try:
+            environment[package] = version(package)
+        except PackageNotFoundError:
+            environment[package] = None
+    with open(path, "w") as file:
+        json.dump({"environment": environment, "benchmarks": results}, file, indent=2)
+
+
+@pytest.fixture(autouse=True)
+def clear_choices_cache():
+    """Start every test with empty in-process and Django caches."""
+    from django.core.cache import cache
+
+    from djangocms_form_builder_countries.choices import clear_cache
+
+    cache.clear()
+    clear_cache()
+    yield
+    cache.clear()
+    clear_cache()
+
+
+@pytest.fixture
+def bench(request):
+    """
+    Time a callable and record the result for the benchmark report.
+
+    Call as ``bench(func, setup=None, variant=None, **params)``. ``setup``
+    runs before every round and is not timed. ``variant`` distinguishes
+    several benchmarks timed by one test. Returns the statistics in
+    microseconds.
+    """
+    rounds = request.config.getoption("--bench-rounds")
+
+    def run(func, setup=None, variant=None, **params):
+        if setup is not None:
+            setup()
+        func()  # warm up imports and lazy module state
+        timings = []
+        for _ in range(rounds):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1e6)
+        result = {
+            "name": request.node.name if variant is None else f"{request.node.name}[{variant}]",
+            "group": request.node.originalname,
+            "params": params,
+            "rounds": rounds,
+            "min_us": min(timings),
+            "max_us": max(timings),
+            "mean_us": statistics.fmean(timings),
+            "median_us": statistics.median(timings),
+            "stdev_us": statistics.stdev(timings) if rounds > 1 else 0.0,
+        }
+        request.config.stash[benchmark_results].append(result)
+        return result
+
+    return run
+
+
+def get_statistics(timings):
+    """Return the statistics of timings in microseconds."""
+    timings = sorted(timings)
+    return {
+        "rounds": len(timings),
+        "min_us": timings[0],
+        "max_us": timings[-1],
+        "mean_us": statistics.fmean(timings),
+        "median_us": statistics.median(timings),
+        "p99_us": timings[min(len(timings) - 1, round(len(timings) * 0.99))],
+        "stdev_us": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+@pytest.fixture
+def bench_concurrency(request):
+    """
+    Send requests concurrently and record throughput and latency per level.
+
+    Call as ``bench_concurrency(send, mode, **params)``. In mode
+    ``"threads"`` ``send(index)`` is called from a thread pool, in mode
+    ``"asyncio"`` ``send`` is a coroutine function awaited by tasks on one
+    event loop. For every level of ``--bench-concurrency``, ``--bench-rounds``
+    requests (at least two per concurrent client) are sent after one warm-up
+    request per client. Returns the results by level.
+    """
+    rounds = request.config.getoption("--bench-rounds")
+    levels = [int(level) for level in request.config.getoption("--bench-concurrency").split(",")]
+
+    def timed(send, index):
+        start = time.perf_counter()
+        send(index)
+        return (time.perf_counter() - start) * 1e6
+
+    async def timed_async(send, index, semaphore):
+        async with semaphore:
+            start = time.perf_counter()
+            await send(index)
+            return (time.perf_counter() - start) * 1e6
+
+    def run_threads(send, level, count):
+        with ThreadPoolExecutor(max_workers=level) as executor:
+            list(executor.map(send, range(level)))
+            start = time.perf_counter()
+            timings = list(executor.map(lambda index: timed(send, index), range(count)))
+            return timings, time.perf_counter() - start
+
+    async def run_asyncio(send, level, count):
+        semaphore = asyncio.Semaphore(level)
+        await asyncio.gather(*(send(index) for index in range(level)))
+        start = time.perf_counter()
+        timings = await asyncio.gather(*(timed_async(send, index, semaphore) for index in range(count)))
+        return timings, time.perf_counter() - start
+
+    def run(send, mode, **params):
+        results = {}
+        for level in levels:
+            count = max(rounds, 2 * level)
+            if mode == "threads":
+                timings, elapsed = run_threads(send, level, count)
+            else:
+                timings, elapsed = asyncio.run(run_asyncio(send, level, count))
+            result = {
+                "name": f"{request.node.name}[{mode}-{level}]",
+                "group": request.node.originalname,
+                "params": {**params, "mode": mode, "concurrency": level},
+                **get_statistics(timings),
+                "throughput_rps": count / elapsed,
+            }
+            request.config.stash[benchmark_results].append(result)
+            results[level] = result
+        return results
+
+    return run
+
 
 @pytest.fixture
 def country_field_config():
@@ -34,3 +234,37 @@ def country_field_config():
             "field_placeholder": "Please select your country",
         },
     }
+
+
+@pytest.fixture
+def placeholder(db):
+    """Create a page and return its content placeholder."""
+    from cms.api import create_page
+    from cms.models import PageContent
+
+    page = create_page("Contact", "base.html", "en")
+    return PageContent.admin_manager.get(page=page, language="en").get_placeholders().get(slot="content")
+
+
+def add_entries(form_name, *entries):
+    """Store form entries with the given entry data and return their ids."""
+    from djangocms_form_builder.entry_model import FormEntry
+
+    return [FormEntry.objects.create(form_name=form_name, entry_data=entry).pk for entry in entries]
+
+
+# GeoIP fixture databases, written by data/write_geoip_databases.py
+GEOIP_DATABASE = Path(__file__).resolve().parent / "data" / "countries.mmdb"
+GEOIP_DATABASE_IPV4 = GEOIP_DATABASE.with_name("countries-ipv4.mmdb")
+
+
+@pytest.fixture
+def geoip_database(settings):
+    """Configure the GeoIP fixture database, skipping the test without the geoip extra."""
+    from djangocms_form_builder_countries.geoip import clear_cache
+
+    pytest.importorskip("maxminddb")
+
+    settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_GEOIP_DATABASE = GEOIP_DATABASE
+    yield GEOIP_DATABASE
+    clear_cache()
@@ -0,0 +1,48 @@
+"""
+Write the GeoIP fixture databases of the tests.
+
+The databases are checked in, run this script with ``mmdb-writer``
+installed to change them::
+
+    pip install mmdb-writer
+    python tests/data/write_geoip_databases.py
+
+Networks are taken from the ranges reserved for documentation.
+203.0.113.0/24 is split to test networks below a /24.
+"""
+
+from pathlib import Path
+
+from mmdb_writer import MMDBWriter
+from netaddr import IPSet
+
+NETWORKS = {
+    "192.0.2.0/24": {"country": {"iso_code": "AT", "names": {"de": "Österreich", "en": "Austria"}}},
+    "198.51.100.0/24": {"country": {"iso_code": "CH"}, "registered_country": {"iso_code": "DE"}},
+    "203.0.113.0/25": {"country": {"iso_code": "DE"}},
+    "203.0.113.128/25": {"country": {"iso_code": "LI"}},
+    "100.64.0.0/10": {"registered_country": {"iso_code": "NL"}},
+    "2001:db8::/32": {"country": {"iso_code": "FR"}},
+}
+
+
+def write(path, ip_version):
+    """Write the networks of an IP version to a database, IPv4 networks are included in IPv6 databases."""
+    writer = MMDBWriter(
+        ip_version=ip_version,
+        database_type="Test-Country",
+        languages=["en"],
+        description={"en": "Test database"},
+        ipv4_compatible=ip_version == 6,
+    )
+    for network, data in NETWORKS.items():
+        if ip_version == 4 and ":" in network:
+            continue
+        writer.insert_network(IPSet([network]), data)
+    writer.to_db_file(str(path))
+
+
+if __name__ == "__main__":
+    directory = Path(__file__).resolve().parent
+    write(directory / "countries.mmdb", ip_version=6)
+    write(directory / "countries-ipv4.mmdb", ip_version=4)
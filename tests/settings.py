@@ -4,6 +4,8 @@ Django settings for testing djangocms-form-builder-countries.
 Minimal configuration for running tests.
 """
 
+from pathlib import Path
+
 SECRET_KEY = "test-secret-key-not-for-production"
 
 DEBUG = True
@@ -22,10 +24,12 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.admin",
     "django.contrib.messages",
+    "django.contrib.staticfiles",
     "cms",
     "menus",
     "treebeard",
     "sekizai",
+    "django_countries",
     "djangocms_form_builder",
     "djangocms_form_builder_countries",
 ]
@@ -48,7 +52,7 @@ ROOT_URLCONF = "tests.urls"
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [],
+        "DIRS": [Path(__file__).parent / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
@@ -75,6 +79,8 @@ USE_TZ = True
 
 SITE_ID = 1
 
+STATIC_URL = "/static/"
+
 CMS_TEMPLATES = [
     ("base.html", "Base Template"),
 ]
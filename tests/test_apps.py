@@ -0,0 +1,137 @@
+"""
+Tests for the application config.
+
+Tests the modules imported and the import time spent on them when Django
+is set up with the app installed.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+# Share of the time of django.setup() spent executing the package's own
+# modules, not counting the third-party modules they import. Both are
+# measured in the same interpreter, so the budget holds on slow machines and
+# under coverage. About four times the share measured on a developer machine.
+IMPORT_TIME_BUDGET_SHARE = 0.1
+
+# Modules imported on startup: the app config, models and admin, and the
+# modules Django CMS (cms_plugins) and the URL configuration (urls) load
+MODULES_ON_STARTUP = {
+    "djangocms_form_builder_countries",
+    "djangocms_form_builder_countries.admin",
+    "djangocms_form_builder_countries.apps",
+    "djangocms_form_builder_countries.cms_plugins",
+    "djangocms_form_builder_countries.constants",
+    "djangocms_form_builder_countries.forms",
+    "djangocms_form_builder_countries.metrics",
+    "djangocms_form_builder_countries.models",
+    "djangocms_form_builder_countries.urls",
+    "djangocms_form_builder_countries.views",
+}
+
+# Times the execution of the package's modules, excluding the modules they
+# import, and the whole of django.setup() in a fresh interpreter.
+# ``python -X importtime`` is not used, as it does not report modules
+# imported by importlib.import_module(), which is how Django imports apps,
+# models and admin modules.
+MEASURE_SETUP = textwrap.dedent(
+    """
+    import json
+    import sys
+    import time
+
+    PACKAGE = "djangocms_form_builder_countries"
+    timings = {}
+    stack = []
+
+
+    class TimingLoader:
+        def __init__(self, loader):
+            self.loader = loader
+
+        def __getattr__(self, name):
+            return getattr(self.loader, name)
+
+        def exec_module(self, module):
+            # Time spent in imports nested in a module is not its own
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                self.loader.exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - start
+                timings[module.__name__] = elapsed - stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+
+
+    class TimingFinder:
+        @staticmethod
+        def find_spec(name, path=None, target=None):
+            for finder in sys.meta_path:
+                if finder is TimingFinder or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    if hasattr(spec.loader, "exec_module"):
+                        spec.loader = TimingLoader(spec.loader)
+                    return spec
+            return None
+
+
+    sys.meta_path.insert(0, TimingFinder)
+
+    import django
+
+    start = time.perf_counter()
+    django.setup()
+    setup = time.perf_counter() - start
+
+    modules = sorted(name for name in sys.modules if name == PACKAGE or name.startswith(PACKAGE + "."))
+    package = sum(timings.get(name, 0.0) for name in modules)
+    print(json.dumps({"modules": modules, "milliseconds": 1000 * package, "setup_milliseconds": 1000 * setup}))
+    """
+)
+
+
+class TestStartup:
+    """Tests the cost of installing the app."""
+
+    def measure_setup(self):
+        """Set up Django in a fresh interpreter and return the package's modules, their import time and the setup time."""
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": "tests.settings"}
+
+        result = subprocess.run(
+            [sys.executable, "-c", MEASURE_SETUP],
+            cwd=Path(__file__).resolve().parent.parent,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+
+        assert result.returncode == 0, result.stderr
+        return json.loads(result.stdout.splitlines()[-1])
+
+    def test_heavy_modules_are_not_imported_on_startup(self):
+        """Test that the country tables, search, widgets and exports are imported on first use only."""
+        measured = self.measure_setup()
+
+        assert set(measured["modules"]) <= MODULES_ON_STARTUP
+
+    def test_import_time_budget(self):
+        """Test that importing the package stays within its share of the time of django.setup()."""
+        # Take the best of a few runs, the first one may read cold files
+        measured = min(
+            (self.measure_setup() for _ in range(3)),
+            key=lambda measured: measured["milliseconds"] / measured["setup_milliseconds"],
+        )
+        budget = IMPORT_TIME_BUDGET_SHARE * measured["setup_milliseconds"]
+
+        assert measured["milliseconds"] < budget, (
+            f"Importing the package took {measured['milliseconds']:.1f} ms of the "
+            f"{measured['setup_milliseconds']:.1f} ms spent in django.setup(), the budget is {budget:.1f} ms"
+        )
@@ -0,0 +1,257 @@
+"""
+Benchmarks for the country field hot paths.
+
+Measures field construction, plugin rendering, admin form
+initialization and bound form validation for several languages and
+field configurations, and form construction with many country fields. The default run uses few rounds and acts as a
+smoke test; use ``tox -e benchmark`` (or ``pytest -m benchmark
+--bench-rounds=200 --bench-json=benchmark.json``) for comparable numbers.
+"""
+
+import pytest
+from django import forms
+from django.template.loader import get_template
+from django.utils import translation
+
+pytestmark = pytest.mark.benchmark
+
+LANGUAGES = ("en", "de")
+
+# Long priority list: EU member states plus EEA/EFTA and a few more
+LONG_COUNTRIES_FIRST = [
+    "DE", "AT", "CH", "LI", "FR", "IT", "ES", "PT", "NL", "BE", "LU", "DK", "SE", "FI", "NO", "IS",
+    "IE", "PL", "CZ", "SK", "HU", "SI", "HR", "RO", "BG", "GR", "CY", "MT", "EE", "LV", "LT", "GB",
+]  # fmt: skip
+
+COUNTRIES_FIRST = {
+    "no_first": [],
+    "long_first": LONG_COUNTRIES_FIRST,
+}
+
+
+@pytest.fixture(params=LANGUAGES)
+def language(request):
+    """Run the benchmark with each language active."""
+    with translation.override(request.param):
+        yield request.param
+
+
+@pytest.fixture(params=sorted(COUNTRIES_FIRST))
+def countries_first(request):
+    """Run the benchmark without and with a long countries_first list."""
+    return request.param
+
+
+@pytest.fixture(params=[True, False], ids=["required", "optional"])
+def required(request):
+    """Run the benchmark for required and optional fields."""
+    return request.param
+
+
+@pytest.fixture
+def instance(countries_first, required):
+    """Create an unsaved CountryField plugin instance for the configuration."""
+    from djangocms_form_builder_countries.models import CountryField
+
+    return CountryField(
+        config={
+            "field_name": "country",
+            "field_label": "Country",
+            "field_required": required,
+            "countries_first": COUNTRIES_FIRST[countries_first],
+        }
+    )
+
+
+@pytest.fixture
+def params(language, countries_first, required):
+    """Parameters recorded with each benchmark result."""
+    return {"language": language, "countries_first": countries_first, "required": required}
+
+
+def clear_cache():
+    from djangocms_form_builder_countries.choices import clear_cache
+
+    clear_cache()
+
+
+def build_form(instance, data=None):
+    """Build a frontend form containing the country field of instance."""
+    name, field = instance.get_form_field()
+    form_class = type("CountryForm", (forms.Form,), {name: field})
+    return form_class(data)
+
+
+class TestFieldConstructionBenchmarks:
+    """Benchmarks for CountryField.get_form_field."""
+
+    def test_get_form_field_cold(self, bench, instance, params):
+        """Build the form field with empty caches."""
+        bench(instance.get_form_field, setup=clear_cache, cache="cold", **params)
+
+    def test_get_form_field_warm(self, bench, instance, params):
+        """Build the form field with warm caches."""
+        bench(instance.get_form_field, cache="warm", **params)
+
+
+class TestRenderBenchmarks:
+    """Benchmarks for rendering the CountryFieldPlugin."""
+
+    def test_plugin_render(self, bench, instance, params):
+        """Build the form and render the plugin through its framework template."""
+        from sekizai.context import SekizaiContext
+
+        from djangocms_form_builder_countries.cms_plugins import CountryFieldPlugin
+
+        plugin = CountryFieldPlugin()
+
+        def render():
+            context = SekizaiContext({"form": build_form(instance), "instance": instance})
+            context = plugin.render(context, instance, None)
+            template = get_template(plugin.get_render_template(context, instance, None))
+            return template.template.render(context)
+
+        bench(render, **params)
+
+
+class TestValidationBenchmarks:
+    """Benchmarks for validating submitted forms."""
+
+    def test_bound_form_validation(self, bench, instance, params):
+        """Build a bound form and validate a submitted country code."""
+
+        def validate():
+            form = build_form(instance, {"country": "ZW"})
+            assert form.is_valid()
+
+        bench(validate, **params)
+
+
+class TestManyFieldsBenchmarks:
+    """Benchmarks for forms with several country fields."""
+
+    FIELD_COUNTS = (1, 5, 20)
+
+    def create_instances(self, count):
+        """Create country fields alternating between two configurations."""
+        from djangocms_form_builder_countries.models import CountryField
+
+        return [
+            CountryField(
+                config={
+                    "field_name": f"country_{i}",
+                    "countries_first": LONG_COUNTRIES_FIRST if i % 2 else [],
+                }
+            )
+            for i in range(count)
+        ]
+
+    def test_build_form_fields(self, bench, language):
+        """Build and validate forms with 1, 5 and 20 country fields, reporting the cost per field."""
+        from djangocms_form_builder_countries.models import build_form_fields
+
+        timings = {}
+        for count in self.FIELD_COUNTS:
+            instances = self.create_instances(count)
+            data = {f"country_{i}": "ZW" for i in range(count)}
+
+            def build(instances=instances, data=data):
+                form_class = type("CountryForm", (forms.Form,), dict(build_form_fields(instances)))
+                assert form_class(data).is_valid()
+
+            timings[count] = bench(build, variant=f"fields={count}", language=language, fields=count)
+
+        # Cost per field relative to a form with one field, about 1 or less
+        # when the cost grows at most linearly. Reported, not asserted, as
+        # wall-clock ratios depend on the machine and its load.
+        for count, result in timings.items():
+            result["per_field_ratio"] = result["min_us"] / count / timings[1]["min_us"]
+
+
+class TestAdminFormBenchmarks:
+    """Benchmarks for the structure board configuration form."""
+
+    def test_country_field_form_init(self, bench, language):
+        """Instantiate the CountryFieldForm."""
+        from djangocms_form_builder_countries.forms import CountryFieldForm
+
+        bench(CountryFieldForm, language=language)
+
+    def test_country_field_form_render(self, bench, language):
+        """Instantiate the CountryFieldForm and render its country list."""
+        from djangocms_form_builder_countries.forms import CountryFieldForm
+
+        bench(lambda: str(CountryFieldForm()["countries_first"]), language=language)
+
+
+class TestGeoIPBenchmarks:
+    """Benchmarks for preselecting the client's country."""
+
+    @pytest.mark.parametrize("address", ["192.0.2.1", "203.0.113.200", "2001:db8::1"])
+    def test_country_lookup(self, bench, geoip_database, address):
+        """Look up the country of an address of a memoized network."""
+        from djangocms_form_builder_countries.geoip import get_country_code
+
+        bench(lambda: get_country_code(address), address=address)
+
+    def test_get_form_field_with_preselection(self, bench, geoip_database, language):
+        """Build a field preselecting the client's country, compared to test_get_form_field_warm."""
+        from django.test import RequestFactory
+
+        from djangocms_form_builder_countries.models import CountryField
+
+        instance = CountryField(config={"field_name": "country", "countries_preselect": True})
+        request = RequestFactory().get("/", REMOTE_ADDR="192.0.2.1")
+
+        bench(lambda: instance.get_form_field(request=request), language=language)
+
+
+class TestLimitedCountriesBenchmarks:
+    """Benchmarks for fields limited to some countries."""
+
+    @pytest.mark.parametrize("countries_only", [[], ["@EEA", "CH"]], ids=["all", "eea"])
+    def test_plugin_render_limited(self, bench, language, countries_only):
+        """Build and render a field offering all countries or the EEA and Switzerland only."""
+        from djangocms_form_builder_countries.models import CountryField
+
+        instance = CountryField(config={"field_name": "country", "countries_only": countries_only})
+
+        def render():
+            name, field = instance.get_form_field()
+            return field.widget.render(name, None)
+
+        bench(render, language=language, countries_only=",".join(countries_only) or "all")
+
+
+class TestCountrySetBenchmarks:
+    """Benchmarks for the bitmasks of multiple country fields."""
+
+    def test_has_country(self, bench):
+        """Check a selection of all EEA countries for one country."""
+        from djangocms_form_builder_countries.country_sets import encode_countries, has_country
+        from djangocms_form_builder_countries.regions import EEA
+
+        mask = encode_countries(EEA)
+
+        bench(lambda: has_country(mask, "DE"))
+
+    def test_decode_countries(self, bench):
+        """Decode a selection of all EEA countries."""
+        from djangocms_form_builder_countries.country_sets import decode_countries, encode_countries
+        from djangocms_form_builder_countries.regions import EEA
+
+        mask = encode_countries(EEA)
+
+        bench(lambda: decode_countries(mask))
+
+    def test_multi_field_render(self, bench, language):
+        """Build and render a multiple country field with a few selected countries."""
+        from djangocms_form_builder_countries.models import CountryMultiField
+
+        instance = CountryMultiField(config={"field_name": "markets"})
+
+        def render():
+            name, field = instance.get_form_field()
+            return field.widget.render(name, ["AT", "CH", "DE"])
+
+        bench(render, language=language)
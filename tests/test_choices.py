@@ -0,0 +1,628 @@
+"""
+Tests for the cached country choice tables.
+
+Tests that choice tables are memoized per language and configuration
+and that the cache is invalidated when django-countries settings change.
+"""
+
+import pytest
+from django.test import override_settings
+from django.utils import translation
+
+
+class TestNormalizeCodes:
+    """Tests for normalize_codes."""
+
+    def test_uppercases_codes(self):
+        """Test that codes are uppercased."""
+        from djangocms_form_builder_countries.choices import normalize_codes
+
+        assert normalize_codes(["de", "At"]) == ("DE", "AT")
+
+    def test_removes_duplicates_keeping_order(self):
+        """Test that duplicates are removed and the first position is kept."""
+        from djangocms_form_builder_countries.choices import normalize_codes
+
+        assert normalize_codes(["CH", "de", "CH", "DE"]) == ("CH", "DE")
+
+    def test_empty_values(self):
+        """Test that None and empty lists normalize to an empty tuple."""
+        from djangocms_form_builder_countries.choices import normalize_codes
+
+        assert normalize_codes(None) == ()
+        assert normalize_codes([]) == ()
+
+
+class TestGetCountriesFirst:
+    """Tests for reading countries_first from a field config."""
+
+    def test_normalized_config_is_used_as_is(self):
+        """Test that configs saved by CountryFieldForm skip the normalization."""
+        from djangocms_form_builder_countries.choices import get_countries_first
+        from djangocms_form_builder_countries.constants import CONFIG_VERSION, CONFIG_VERSION_KEY
+
+        config = {"countries_first": ["CH", "DE"], CONFIG_VERSION_KEY: CONFIG_VERSION}
+
+        assert get_countries_first(config) == ("CH", "DE")
+
+    def test_legacy_config_is_upgraded(self):
+        """Test that configs saved before are normalized and upgraded in place."""
+        from djangocms_form_builder_countries.choices import get_countries_first
+        from djangocms_form_builder_countries.constants import CONFIG_VERSION, CONFIG_VERSION_KEY
+
+        config = {"countries_first": ["de", "AT", "DE"]}
+
+        assert get_countries_first(config) == ("DE", "AT")
+        assert config == {"countries_first": ["DE", "AT"], CONFIG_VERSION_KEY: CONFIG_VERSION}
+
+    def test_missing_countries_first(self):
+        """Test that configs without countries_first return an empty tuple."""
+        from djangocms_form_builder_countries.choices import get_countries_first
+
+        assert get_countries_first({}) == ()
+        assert get_countries_first({"countries_first": None}) == ()
+
+
+class TestGetCountryChoices:
+    """Tests for get_country_choices memoization."""
+
+    def test_repeated_calls_share_table(self):
+        """Test that identical configurations return the same cached table."""
+        from djangocms_form_builder_countries.choices import get_country_choices
+
+        first = get_country_choices(["DE", "AT"], required=True)
+        second = get_country_choices(["DE", "AT"], required=True)
+
+        assert first is second
+
+    def test_concurrent_misses_build_table_once(self, monkeypatch):
+        """Test that threads missing the memo at the same time share the table built by the first one."""
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        from django.core.cache.backends.dummy import DummyCache
+
+        from djangocms_form_builder_countries import choices
+
+        build_country_table = choices.build_country_table
+        builds = []
+
+        def slow_build():
+            builds.append(None)
+            time.sleep(0.05)
+            return build_country_table()
+
+        monkeypatch.setattr(choices, "get_cache", lambda: DummyCache("dummy", {}))
+        monkeypatch.setattr(choices, "build_country_table", slow_build)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            tables = list(executor.map(lambda index: choices.get_country_table("de"), range(8)))
+
+        assert len(builds) == 1
+        assert all(table is tables[0] for table in tables)
+
+    def test_normalized_configurations_share_table(self):
+        """Test that case and duplicates in countries_first do not create new entries."""
+        from djangocms_form_builder_countries.choices import _build_choices, get_country_choices
+
+        get_country_choices(["DE", "AT"], required=True)
+        get_country_choices(["de", "at", "DE"], required=True)
+
+        assert _build_choices.cache_info().misses == 1
+        assert _build_choices.cache_info().hits == 1
+
+    def test_distinct_configurations_get_distinct_tables(self):
+        """Test that required and placeholder are part of the cache key."""
+        from djangocms_form_builder_countries.choices import get_country_choices
+
+        required = get_country_choices(required=True)
+        optional = get_country_choices(required=False)
+        placeholder = get_country_choices(required=False, placeholder="Pick one")
+
+        assert required[0][0] != ""
+        assert optional[0] == ("", "Select a country")
+        assert placeholder[0] == ("", "Pick one")
+
+    def test_tables_are_cached_per_language(self):
+        """Test that each language gets its own translated table."""
+        from djangocms_form_builder_countries.choices import get_country_choices
+
+        with translation.override("en"):
+            english = dict(get_country_choices(required=True))
+        with translation.override("de"):
+            german = dict(get_country_choices(required=True))
+        with translation.override("en"):
+            english_again = dict(get_country_choices(required=True))
+
+        assert english["DE"] == "Germany"
+        assert german["DE"] == "Deutschland"
+        assert english_again["DE"] == "Germany"
+
+    def test_tables_are_immutable(self):
+        """Test that shared tables cannot be modified by callers."""
+        from djangocms_form_builder_countries.choices import get_country_choices
+
+        choices = get_country_choices()
+
+        with pytest.raises(TypeError):
+            choices[0] = ("XX", "Nowhere")
+        assert not hasattr(choices, "append")
+
+    def test_configurations_share_country_table(self):
+        """Test that all configurations of a language are views over one table."""
+        from djangocms_form_builder_countries.choices import get_country_choices
+
+        with translation.override("en"):
+            plain = get_country_choices(required=True)
+            ordered = get_country_choices(["DE", "AT"], placeholder="Pick one")
+        with translation.override("de"):
+            german = get_country_choices(required=True)
+
+        assert plain.table is ordered.table
+        assert german.table is not plain.table
+
+    def test_cache_is_bounded(self):
+        """Test that the cache has a maximum size."""
+        from djangocms_form_builder_countries.choices import CHOICES_CACHE_SIZE, _build_choices
+
+        assert _build_choices.cache_info().maxsize == CHOICES_CACHE_SIZE
+
+
+class TestCountrySelection:
+    """Tests for limiting the selectable countries."""
+
+    def test_all_countries_by_default(self):
+        """Test that configs without limits select all countries."""
+        from djangocms_form_builder_countries.choices import get_country_selection
+
+        assert get_country_selection({}) is None
+        assert get_country_selection({"countries_only": [], "countries_exclude": []}) is None
+
+    @pytest.mark.parametrize(
+        "config, expected",
+        [
+            ({"countries_only": ["de", "CH", "XX"]}, ("CH", "DE")),
+            ({"countries_only": ["@DACH", "LI"], "countries_exclude": ["AT"]}, ("CH", "DE", "LI")),
+            ({"countries_only": ["@EEA"], "countries_exclude": ["@EU"]}, ("IS", "LI", "NO")),
+            ({"countries_only": ["DE"], "countries_exclude": ["DE"]}, ()),
+        ],
+    )
+    def test_only_and_exclude(self, config, expected):
+        """Test that regions are expanded, and exclusions applied to the offered countries."""
+        from djangocms_form_builder_countries.choices import get_country_selection
+
+        assert get_country_selection(config) == expected
+
+    def test_exclude_only(self):
+        """Test that exclusions without countries_only apply to all countries."""
+        from djangocms_form_builder_countries.choices import get_country_codes, get_country_selection
+
+        selection = get_country_selection({"countries_exclude": ["@EU"]})
+
+        assert len(selection) == len(get_country_codes()) - 27
+        assert "DE" not in selection
+        assert "CH" in selection
+
+    def test_selections_are_memoized(self):
+        """Test that each distinct pair of lists is expanded once."""
+        from djangocms_form_builder_countries.choices import get_country_selection, get_valid_codes
+
+        selection = get_country_selection({"countries_only": ["@DACH"]})
+
+        assert get_country_selection({"countries_only": ["@DACH"]}) is selection
+        assert get_valid_codes(selection) is get_valid_codes(selection)
+        assert get_valid_codes(selection) == {"AT", "CH", "DE"}
+
+    def test_honors_countries_only_setting(self, settings):
+        """Test that countries removed by COUNTRIES_ONLY are never selectable."""
+        from djangocms_form_builder_countries.choices import get_country_selection
+
+        settings.COUNTRIES_ONLY = ["DE", "FR"]
+
+        assert get_country_selection({"countries_only": ["@DACH"]}) == ("DE",)
+
+    @pytest.mark.parametrize("language", ["en", "de"])
+    def test_choices_shrink(self, language):
+        """Test that limited choices hold the selected countries in display order."""
+        from djangocms_form_builder_countries.choices import get_country_choices, get_country_table
+
+        with translation.override(language):
+            choices = get_country_choices(required=True, countries=["DE", "AT", "CH"])
+            table = get_country_table()
+
+        assert len(choices) == 3
+        assert list(choices) == [choice for choice in table.choices if choice[0] in {"AT", "CH", "DE"}]
+
+    def test_countries_first_outside_selection(self):
+        """Test that countries shown first are dropped if they are not selectable."""
+        from djangocms_form_builder_countries.choices import SEPARATOR, get_country_choices
+
+        with translation.override("en"):
+            choices = get_country_choices(countries_first=["FR", "CH"], required=True, countries=["AT", "CH", "DE"])
+            without_first = get_country_choices(countries_first=["FR"], required=True, countries=["AT", "CH", "DE"])
+
+        assert list(choices) == [("CH", "Switzerland"), SEPARATOR, ("AT", "Austria"), ("DE", "Germany")]
+        assert list(without_first) == [("AT", "Austria"), ("DE", "Germany"), ("CH", "Switzerland")]
+
+    def test_key_includes_countries(self):
+        """Test that limited and unlimited configurations have distinct keys and tables."""
+        from djangocms_form_builder_countries.choices import get_choices_key, get_country_choices
+
+        with translation.override("en"):
+            assert get_choices_key(countries=["de", "AT"])[4] == ("AT", "DE")
+            assert get_choices_key()[4] is None
+            assert get_country_choices(countries=["DE"]) is not get_country_choices()
+
+
+class TestCountryChoices:
+    """Tests for the CountryChoices view."""
+
+    def create_choices(self, order=(1, -1, 0, 2), blank_label="Pick one"):
+        """Create a view over a small country table."""
+        from djangocms_form_builder_countries.choices import CountryChoices, CountryTable
+
+        table = CountryTable([("AT", "Austria"), ("DE", "Germany"), ("FR", "France")])
+        return CountryChoices(table, order, blank_label)
+
+    def test_iteration(self):
+        """Test that the view yields the blank choice, the ordered countries and the separator."""
+        assert list(self.create_choices()) == [
+            ("", "Pick one"),
+            ("DE", "Germany"),
+            ("---", "---"),
+            ("AT", "Austria"),
+            ("FR", "France"),
+        ]
+
+    def test_indexing(self):
+        """Test that indexing matches the iteration order."""
+        choices = self.create_choices()
+
+        assert len(choices) == 5
+        assert [choices[i] for i in range(-5, 5)] == list(choices) * 2
+        assert choices[1:3] == (("DE", "Germany"), ("---", "---"))
+        with pytest.raises(IndexError):
+            choices[5]
+
+    def test_without_blank_choice(self):
+        """Test that required fields get no blank choice."""
+        choices = self.create_choices(order=range(3), blank_label=None)
+
+        assert len(choices) == 3
+        assert choices[0] == ("AT", "Austria")
+
+    def test_equality(self):
+        """Test that views compare equal to sequences with the same choices."""
+        choices = self.create_choices(order=range(3), blank_label=None)
+
+        assert choices == (("AT", "Austria"), ("DE", "Germany"), ("FR", "France"))
+        assert choices != (("AT", "Austria"),)
+
+    def test_copies_share_view(self):
+        """Test that copying fields and widgets does not copy the choices."""
+        import copy
+
+        from djangocms_form_builder_countries.choices import get_country_choices
+
+        choices = get_country_choices()
+
+        assert copy.copy(choices) is choices
+        assert copy.deepcopy(choices) is choices
+
+    def test_fields_keep_view(self):
+        """Test that country fields and their widgets use the view without copying it into lists."""
+        import copy
+
+        from djangocms_form_builder_countries.choices import get_country_choices
+        from djangocms_form_builder_countries.fields import CountryChoiceField, CountrySetField
+
+        choices = get_country_choices(["DE"])
+
+        for field in (CountryChoiceField(choices=choices), CountrySetField(choices=choices)):
+            copied = copy.deepcopy(field)
+
+            assert field.choices is choices
+            assert field.widget.choices is choices
+            assert copied.choices is choices
+            assert copied.widget.choices is choices
+
+    def test_table_is_picklable(self):
+        """Test that country tables can be stored in the Django cache."""
+        import pickle
+
+        from djangocms_form_builder_countries.choices import get_country_table
+
+        table = get_country_table("en")
+        restored = pickle.loads(pickle.dumps(table))
+
+        assert restored.choices == table.choices
+        assert restored.positions == table.positions
+
+
+class TestAllocations:
+    """Tests for the memory allocated per field build."""
+
+    def measure_peak(self, func):
+        """Return the peak memory in bytes allocated while calling func."""
+        import gc
+        import tracemalloc
+
+        func()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            func()
+            return tracemalloc.get_traced_memory()[1] - start
+        finally:
+            tracemalloc.stop()
+
+    def test_get_form_field_does_not_copy_choices(self):
+        """Test that building a field allocates the same for all countries as for a few."""
+        from unittest.mock import Mock
+
+        from djangocms_form_builder_countries.models import CountryField
+
+        few = Mock(field_name="country", config={"countries_first": ["DE", "AT"], "countries_only": ["AT", "CH", "DE"]})
+        all_countries = Mock(field_name="country", config={"countries_first": ["DE", "AT"]})
+
+        few_peak = self.measure_peak(lambda: CountryField.get_form_field(few))
+        all_peak = self.measure_peak(lambda: CountryField.get_form_field(all_countries))
+
+        # Even a shallow list of the 250 choices takes 2 KB
+        assert all_peak < few_peak + 1024
+
+    def test_country_multiple_choice_field_does_not_copy_choices(self):
+        """Test that the multiple choice field validates without copying the country list."""
+        from djangocms_form_builder_countries.forms import CountryMultipleChoiceField
+
+        few = [("AT", "Austria"), ("CH", "Switzerland"), ("DE", "Germany")]
+
+        few_peak = self.measure_peak(lambda: CountryMultipleChoiceField(choices=few).clean(["DE"]))
+        all_peak = self.measure_peak(lambda: CountryMultipleChoiceField().clean(["DE"]))
+
+        assert all_peak < few_peak + 1024
+
+
+class TestCacheInvalidation:
+    """Tests for invalidation on settings changes."""
+
+    def test_countries_setting_change_clears_cache(self):
+        """Test that changing a COUNTRIES_* setting rebuilds the tables."""
+        from djangocms_form_builder_countries.choices import get_country_choices
+
+        before = get_country_choices(required=True)
+        assert len(before) > 2
+
+        with override_settings(COUNTRIES_ONLY=["DE", "AT"]):
+            only = get_country_choices(required=True)
+            assert {code for code, name in only} == {"DE", "AT"}
+
+        after = get_country_choices(required=True)
+        assert len(after) == len(before)
+
+    def test_unrelated_setting_change_keeps_cache(self, settings):
+        """Test that other settings do not invalidate the tables."""
+        from djangocms_form_builder_countries.choices import get_country_choices
+
+        before = get_country_choices(required=True)
+        settings.SOME_UNRELATED_SETTING = True
+
+        assert get_country_choices(required=True) is before
+
+
+class TestAsyncCountryTable:
+    """Tests for loading country tables with the async cache API."""
+
+    @pytest.fixture
+    def cache(self, monkeypatch):
+        """Replace the Django cache by one that only allows async access."""
+        from unittest.mock import AsyncMock, Mock
+
+        from djangocms_form_builder_countries import choices
+
+        cache = Mock()
+        cache.aget = AsyncMock(return_value=None)
+        cache.aset = AsyncMock()
+        cache.get.side_effect = cache.set.side_effect = AssertionError("sync cache access")
+        monkeypatch.setattr(choices, "get_cache", lambda: cache)
+        return cache
+
+    def test_same_table_as_sync(self):
+        """Test that the async and sync functions return the same shared table."""
+        import asyncio
+
+        from djangocms_form_builder_countries.choices import aget_country_table, get_country_table
+
+        table = asyncio.run(aget_country_table("de"))
+
+        assert table is get_country_table("de")
+        assert dict(table.choices)["DE"] == "Deutschland"
+
+    def test_uses_async_cache_api(self, cache):
+        """Test that tables are read and stored with aget/aset, and memoized for the sync path."""
+        import asyncio
+
+        from djangocms_form_builder_countries.choices import aget_country_table, get_cache_key, get_country_choices
+
+        with translation.override("de"):
+            table = asyncio.run(aget_country_table())
+            asyncio.run(aget_country_table())
+            choices = get_country_choices(["AT"])
+
+        cache.aget.assert_awaited_once_with(get_cache_key("de"))
+        cache.aset.assert_awaited_once_with(get_cache_key("de"), table)
+        assert choices.table is table
+
+    def test_concurrent_tasks_build_table_once(self, cache):
+        """Test that tasks waiting for the cache at the same time share the table built by the first one."""
+        import asyncio
+        from unittest.mock import patch
+
+        from djangocms_form_builder_countries import choices
+
+        async def miss(key):
+            await asyncio.sleep(0.01)
+
+        async def load():
+            return await asyncio.gather(*(choices.aget_country_table("de") for _ in range(8)))
+
+        cache.aget.side_effect = miss
+
+        with patch.object(choices, "build_country_table", wraps=choices.build_country_table) as build_country_table:
+            tables = asyncio.run(load())
+
+        assert build_country_table.call_count == 1
+        assert all(table is tables[0] for table in tables)
+
+    def test_reads_stored_table(self, cache):
+        """Test that tables stored by other processes are used."""
+        import asyncio
+
+        from djangocms_form_builder_countries.choices import CountryTable, aget_country_table
+
+        cache.aget.return_value = CountryTable([("XX", "Stored")])
+
+        table = asyncio.run(aget_country_table("en"))
+
+        assert table.choices == (("XX", "Stored"),)
+        cache.aset.assert_not_awaited()
+
+
+class TestSharedChoices:
+    """Tests for sharing choice tables through the Django cache under versioned keys."""
+
+    @pytest.fixture(params=["locmem", "filebased"])
+    def shared_cache(self, request, settings, tmp_path, monkeypatch):
+        """Share the choices through a local memory or file based cache, checking the version on every lookup."""
+        from django.core.cache import caches
+
+        from djangocms_form_builder_countries import choices
+
+        backends = {
+            "locmem": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "shared-choices",
+            },
+            "filebased": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": str(tmp_path / "cache"),
+            },
+        }
+        settings.CACHES = {**settings.CACHES, "countries": backends[request.param]}
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_CACHE = "countries"
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_SHARED_CHOICES = True
+        monkeypatch.setattr(choices, "VERSION_CHECK_INTERVAL", 0)
+        yield caches["countries"]
+        caches["countries"].clear()
+
+    def start_process(self):
+        """Forget everything memoized in this process, as a newly started worker would."""
+        from djangocms_form_builder_countries import choices
+
+        choices.clear_cache()
+        choices._version.update(version=None, checked=None)
+
+    def test_other_process_reads_shared_tables(self, shared_cache):
+        """Test that a new process reads the country table and order instead of building them."""
+        from unittest.mock import patch
+
+        from djangocms_form_builder_countries import choices
+
+        with translation.override("de"):
+            built = tuple(choices.get_country_choices(["CH", "AT"]))
+            self.start_process()
+
+            with (
+                patch.object(choices, "build_country_table", side_effect=AssertionError("table was built")),
+                patch.object(choices, "build_order", side_effect=AssertionError("order was built")),
+            ):
+                read = tuple(choices.get_country_choices(["CH", "AT"]))
+
+        assert read == built
+        assert read[1:4] == (("CH", "Schweiz"), ("AT", "Österreich"), choices.SEPARATOR)
+
+    def test_version_bump_drops_memoized_tables(self, shared_cache):
+        """Test that processes drop their memoized tables once another process bumped the version."""
+        from djangocms_form_builder_countries import choices
+
+        before = choices.get_country_choices(required=True)
+        assert choices.get_country_choices(required=True) is before
+
+        shared_cache.incr(choices.VERSION_KEY)
+
+        after = choices.get_country_choices(required=True)
+        assert after is not before
+        assert tuple(after) == tuple(before)
+        assert choices.get_local_version() == shared_cache.get(choices.VERSION_KEY)
+
+    def test_version_is_checked_once_per_interval(self, shared_cache, monkeypatch):
+        """Test that the memoized tables are used until the version is read again."""
+        from djangocms_form_builder_countries import choices
+
+        monkeypatch.setattr(choices, "VERSION_CHECK_INTERVAL", 60)
+        before = choices.get_country_choices(required=True)
+        shared_cache.incr(choices.VERSION_KEY)
+
+        assert choices.get_country_choices(required=True) is before
+
+    def test_versioned_keys(self, shared_cache):
+        """Test that tables are stored under new keys after a bump."""
+        from djangocms_form_builder_countries import choices
+
+        table_key = choices.get_cache_key("en")
+        order_key = choices.get_choices_cache_key(("en", ("DE",)))
+
+        choices.bump_cache_version()
+
+        assert choices.get_cache_key("en") != table_key
+        assert choices.get_choices_cache_key(("en", ("DE",))) != order_key
+
+    def test_missing_version_is_replaced(self, shared_cache):
+        """Test that a new version is started when the stored one is gone, e.g. evicted."""
+        from djangocms_form_builder_countries import choices
+
+        before = choices.get_country_choices(required=True)
+        version = choices.get_local_version()
+        shared_cache.delete(choices.VERSION_KEY)
+
+        assert choices.get_country_choices(required=True) is not before
+        assert choices.get_local_version() not in (None, version)
+
+    def test_settings_change_bumps_version(self, shared_cache):
+        """Test that changing a COUNTRIES_* setting starts a new version."""
+        from djangocms_form_builder_countries import choices
+
+        version = choices.get_cache_version()
+
+        with override_settings(COUNTRIES_ONLY=["DE", "AT"]):
+            assert choices.get_cache_version() != version
+            assert {code for code, name in choices.get_country_choices(required=True)} == {"DE", "AT"}
+
+    @pytest.mark.django_db
+    def test_saving_and_deleting_country_fields_bump_version(self, shared_cache):
+        """Test that all processes reload the tables after a country field was saved or deleted."""
+        from cms.api import add_plugin, create_page
+        from cms.models import PageContent
+
+        from djangocms_form_builder_countries import choices
+
+        page = create_page("Contact", "base.html", "en")
+        placeholder = PageContent.admin_manager.get(page=page).get_placeholders().get(slot="content")
+        versions = [choices.get_cache_version()]
+
+        plugin = add_plugin(placeholder, "CountryFieldPlugin", "en", config={"countries_first": ["DE"]})
+        versions.append(choices.get_cache_version())
+        plugin.delete()
+        versions.append(choices.get_cache_version())
+
+        assert len(set(versions)) == 3
+
+    def test_disabled_by_default(self):
+        """Test that no version is stored unless choices are shared."""
+        from djangocms_form_builder_countries import choices
+
+        choices.get_country_choices(["DE"])
+
+        assert choices.get_cache().get(choices.VERSION_KEY) is None
@@ -2,9 +2,11 @@
 Tests for CMS plugin registration and configuration.
 
 Tests the CountryFieldPlugin registration with Django CMS
-and its fieldset configuration.
+its fieldset configuration and its cache declarations.
 """
 
+import pytest
+
 
 class TestCountryFieldPlugin:
     """Tests for CountryFieldPlugin configuration."""
@@ -78,6 +80,40 @@ class TestCountryFieldPlugin:
         name = str(CountryFieldPlugin.name)
         assert "country" in name.lower()
 
+    def test_render_template_for_select_mode(self):
+        """Test that the inline select uses the form builder field template."""
+        from unittest.mock import Mock
+
+        from djangocms_form_builder_countries.cms_plugins import CountryFieldPlugin
+
+        instance = Mock(config={"countries_mode": "select"})
+        template = CountryFieldPlugin.get_render_template(CountryFieldPlugin, {}, instance, None)
+
+        assert template == CountryFieldPlugin.field_template
+        assert template.endswith("/widgets/base.html")
+
+    def test_render_template_for_remote_mode(self):
+        """Test that the remote mode wraps the field template to add the search script."""
+        from unittest.mock import Mock
+
+        from django.template.loader import get_template
+
+        from djangocms_form_builder_countries.cms_plugins import CountryFieldPlugin
+
+        instance = Mock(config={"countries_mode": "remote"})
+        template = CountryFieldPlugin.get_render_template(CountryFieldPlugin, {}, instance, None)
+
+        assert template == "djangocms_form_builder_countries/country_search.html"
+        assert "country-search.js" in get_template(template).template.source
+
+    def test_fieldsets_include_countries_mode(self):
+        """Test that the country list mode can be configured."""
+        from djangocms_form_builder_countries.cms_plugins import CountryFieldPlugin
+
+        options = dict(CountryFieldPlugin.fieldsets)[CountryFieldPlugin.fieldsets[1][0]]
+
+        assert "countries_mode" in options["fields"]
+
 
 class TestAppConfiguration:
     """Tests for Django app configuration."""
@@ -120,3 +156,129 @@ class TestPackageMetadata:
         assert parts[1].isdigit()
         # Patch might have additional suffixes like 'a1', 'b2', 'rc1'
         assert parts[2][0].isdigit()
+
+
+@pytest.fixture
+def page(settings):
+    """Create a page with a country field in English and German, served under language prefixes."""
+    from cms.api import add_plugin, create_page, create_page_content
+    from cms.models import PageContent
+    from django.core.cache import cache
+
+    settings.MIDDLEWARE = [
+        *settings.MIDDLEWARE[:2],
+        "django.middleware.locale.LocaleMiddleware",
+        *settings.MIDDLEWARE[2:],
+    ]
+    # django CMS 4.1 only picks the page language from the URL prefix
+    settings.ROOT_URLCONF = "tests.urls_i18n"
+    page = create_page("Contact", "base.html", "en", slug="contact")
+    create_page_content("de", "Kontakt", page, slug="contact", template="base.html")
+    for language in ("en", "de"):
+        placeholder = PageContent.admin_manager.get(page=page, language=language).get_placeholders().get(slot="content")
+        form = add_plugin(placeholder, "FormPlugin", language, form_name="contact")
+        add_plugin(placeholder, "CountryFieldPlugin", language, target=form, config={"field_name": "country"})
+    cache.clear()
+    yield page
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestPluginCache:
+    """Tests for the cache declarations of CountryFieldPlugin."""
+
+    def test_cacheable(self):
+        """Test that unbound selects can be cached without varying on headers."""
+        from django.test import RequestFactory
+
+        from djangocms_form_builder_countries.cms_plugins import CountryFieldPlugin
+
+        plugin = CountryFieldPlugin()
+        request = RequestFactory().get("/")
+
+        assert CountryFieldPlugin.cache is True
+        assert plugin.get_cache_expiration(request, None, None) is None
+        assert not plugin.get_vary_cache_on(request, None, None)
+
+    def test_submitted_data_is_not_cached(self):
+        """Test that renders for submitted data expire immediately."""
+        from cms.constants import EXPIRE_NOW
+        from django.test import RequestFactory
+
+        from djangocms_form_builder_countries.cms_plugins import CountryFieldPlugin
+
+        request = RequestFactory().post("/", {"country": "DE"})
+
+        assert CountryFieldPlugin().get_cache_expiration(request, None, None) == EXPIRE_NOW
+
+    @pytest.mark.parametrize("plugin_class", ["CountryFieldPlugin", "CountryMultiFieldPlugin"])
+    def test_csrf_cookie_httponly_is_read_per_render(self, plugin_class, settings):
+        """Test that renders expire immediately once CSRF_COOKIE_HTTPONLY is set, after the plugins were imported."""
+        from cms.constants import EXPIRE_NOW
+        from django.test import RequestFactory
+
+        from djangocms_form_builder_countries import cms_plugins
+
+        plugin = getattr(cms_plugins, plugin_class)()
+        request = RequestFactory().get("/")
+
+        settings.CSRF_COOKIE_HTTPONLY = True
+        assert plugin.get_cache_expiration(request, None, None) == EXPIRE_NOW
+
+        settings.CSRF_COOKIE_HTTPONLY = False
+        assert plugin.get_cache_expiration(request, None, None) is None
+
+    def test_placeholder_does_not_vary_on_accept_language(self, page):
+        """Test that placeholders with a country field are not stored once per Accept-Language header."""
+        from django.test import RequestFactory
+
+        placeholder = page.get_admin_content("en").get_placeholders().get(slot="content")
+
+        assert "accept-language" not in placeholder.get_vary_cache_on(RequestFactory().get("/"))
+
+    def test_cached_pages_do_not_leak_languages(self, page):
+        """Test that cached renders are served in their own language only."""
+        from unittest.mock import patch
+
+        from django.test import Client
+        from django.utils import translation
+
+        from djangocms_form_builder_countries.cms_plugins import CountryFieldPlugin
+
+        clients = {"en": Client(), "de": Client()}
+        names = {"en": b"Germany", "de": b"Deutschland"}
+
+        # LocaleMiddleware leaves the language of the last request active
+        with (
+            translation.override(translation.get_language()),
+            patch.object(CountryFieldPlugin, "render", autospec=True, side_effect=CountryFieldPlugin.render) as render,
+        ):
+            for _ in range(3):
+                for language in ("de", "en"):
+                    response = clients[language].get("/contact/", headers={"accept-language": language}, follow=True)
+                    other = "en" if language == "de" else "de"
+                    assert names[language] in response.content
+                    assert names[other] not in response.content
+
+        # Every language is rendered once, later requests are served from the cache
+        assert render.call_count == 2
+
+    def test_accept_language_variants_share_cache(self, page):
+        """Test that headers resolving to the same language are served from one cached render."""
+        from unittest.mock import patch
+
+        from django.test import Client
+        from django.utils import translation
+
+        from djangocms_form_builder_countries.cms_plugins import CountryFieldPlugin
+
+        # LocaleMiddleware leaves the language of the last request active
+        with (
+            translation.override(translation.get_language()),
+            patch.object(CountryFieldPlugin, "render", autospec=True, side_effect=CountryFieldPlugin.render) as render,
+        ):
+            for header in ("de", "de-DE,de;q=0.9", "de-AT,en;q=0.5", "de-CH"):
+                response = Client().get("/contact/", headers={"accept-language": header}, follow=True)
+                assert b"Deutschland" in response.content
+
+        assert render.call_count == 1
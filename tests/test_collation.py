@@ -0,0 +1,185 @@
+"""
+Tests for precollated country orderings.
+
+Tests writing and reading collation files, building country tables from
+them, the fallbacks to sorting and the collate_countries management
+command.
+"""
+
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@pytest.fixture
+def collation_path(tmp_path, settings):
+    """Configure a collation file path and return it."""
+    path = tmp_path / "countries.collation"
+    settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_COLLATION = path
+    return path
+
+
+def sorted_table(language):
+    """Return the country table of a language as sorted by django-countries."""
+    from django.utils.translation import override
+    from django_countries import countries
+
+    from djangocms_form_builder_countries.choices import CountryTable
+
+    with override(language):
+        return CountryTable(countries)
+
+
+class TestCollation:
+    """Tests for building country tables from a collation file."""
+
+    def test_tables_match_sorted_tables(self, collation_path):
+        """Test that tables built from the file equal the sorted tables."""
+        from djangocms_form_builder_countries.choices import get_country_table
+        from djangocms_form_builder_countries.collation import collate, write_collation
+
+        write_collation(collation_path, {"en": collate("en"), "de": collate("de")})
+
+        assert get_country_table("de").choices == sorted_table("de").choices
+        assert get_country_table("en").choices == sorted_table("en").choices
+
+    def test_stored_order_is_used(self, collation_path):
+        """Test that the country order is read from the file instead of sorting."""
+        from djangocms_form_builder_countries.choices import get_country_table
+        from djangocms_form_builder_countries.collation import collate, write_collation
+
+        write_collation(collation_path, {"de": collate("de")[::-1]})
+
+        table = get_country_table("de")
+
+        assert table.choices == sorted_table("de").choices[::-1]
+        assert dict(table.choices)["DE"] == "Deutschland"
+
+    def test_file_is_memory_mapped(self, collation_path):
+        """Test that the file is memory-mapped instead of read into memory."""
+        import mmap
+
+        from djangocms_form_builder_countries.collation import (
+            _load_collation,
+            collate,
+            get_collated_codes,
+            write_collation,
+        )
+
+        write_collation(collation_path, {"en": collate("en")})
+
+        assert get_collated_codes("en") == collate("en")
+        assert isinstance(_load_collation(str(collation_path)).buffer, mmap.mmap)
+
+    def test_countries_first_break(self, collation_path, settings):
+        """Test that the break after COUNTRIES_FIRST is restored."""
+        from djangocms_form_builder_countries.choices import get_country_table
+        from djangocms_form_builder_countries.collation import collate, write_collation
+
+        settings.COUNTRIES_FIRST = ["CH", "AT"]
+        settings.COUNTRIES_FIRST_BREAK = "-----"
+        write_collation(collation_path, {"en": collate("en")})
+
+        table = get_country_table("en")
+
+        assert table.choices == sorted_table("en").choices
+        assert table.choices[2] == ("", "-----")
+
+    def test_file_written_under_another_language(self, collation_path, settings):
+        """Test that the file is used whichever language was active when it was written."""
+        from django.utils.translation import gettext_lazy, override
+
+        from djangocms_form_builder_countries.choices import get_countries_fingerprint
+        from djangocms_form_builder_countries.collation import collate, get_collated_codes, write_collation
+
+        settings.COUNTRIES_OVERRIDE = {"DE": gettext_lazy("Germany")}
+        order = collate("en")[::-1]
+        with override("de"):
+            get_countries_fingerprint.cache_clear()
+            write_collation(collation_path, {"en": order})
+
+        get_countries_fingerprint.cache_clear()
+        with override("en"):
+            assert get_collated_codes("en") == order
+
+
+class TestFallback:
+    """Tests for sorting when the collation file cannot be used."""
+
+    def test_changed_countries_settings(self, collation_path, settings):
+        """Test that files written for other COUNTRIES_* settings are ignored."""
+        from djangocms_form_builder_countries.choices import get_country_table
+        from djangocms_form_builder_countries.collation import collate, write_collation
+
+        write_collation(collation_path, {"en": collate("en")})
+
+        settings.COUNTRIES_ONLY = ["DE", "AT", "CH"]
+        assert get_country_table("en").choices == (("AT", "Austria"), ("DE", "Germany"), ("CH", "Switzerland"))
+
+        del settings.COUNTRIES_ONLY
+        settings.COUNTRIES_OVERRIDE = {"DE": "Germany (Federal Republic)"}
+        assert dict(get_country_table("en").choices)["DE"] == "Germany (Federal Republic)"
+
+    def test_missing_language(self, collation_path):
+        """Test that languages missing from the file are sorted."""
+        from djangocms_form_builder_countries.choices import get_country_table
+        from djangocms_form_builder_countries.collation import collate, write_collation
+
+        write_collation(collation_path, {"en": collate("en")[::-1]})
+
+        assert get_country_table("de").choices == sorted_table("de").choices
+
+    @pytest.mark.parametrize("content", [None, b"", b"not a collation file"])
+    def test_unreadable_file(self, collation_path, content):
+        """Test that missing and invalid files are ignored."""
+        from djangocms_form_builder_countries.choices import get_country_table
+
+        if content is not None:
+            collation_path.write_bytes(content)
+
+        assert get_country_table("en").choices == sorted_table("en").choices
+
+    def test_multiple_names_are_not_collated(self, settings):
+        """Test that orders which cannot be restored from codes are skipped."""
+        from djangocms_form_builder_countries.collation import collate
+
+        settings.COUNTRIES_OVERRIDE = {"DE": {"names": ["Germany", "Deutschland"]}}
+
+        assert collate("en") is None
+
+
+class TestCollateCountriesCommand:
+    """Tests for the collate_countries management command."""
+
+    def test_collates_all_languages(self, collation_path):
+        """Test that every language in LANGUAGES is written to the configured file."""
+        from djangocms_form_builder_countries.collation import collate, get_collated_codes
+
+        stdout = StringIO()
+
+        call_command("collate_countries", stdout=stdout)
+
+        assert f"Collated 2 language(s) into {collation_path}." in stdout.getvalue()
+        assert get_collated_codes("de") == collate("de")
+        assert get_collated_codes("en") == collate("en")
+
+    def test_output_and_language(self, tmp_path):
+        """Test that --output and --language select the file and languages."""
+        from djangocms_form_builder_countries.collation import Collation
+
+        path = tmp_path / "de.collation"
+
+        call_command("collate_countries", output=str(path), language=["de"], stdout=StringIO())
+
+        assert list(Collation(path.read_bytes()).languages) == ["de"]
+
+    def test_requires_path(self):
+        """Test that a path has to be configured or given."""
+        with pytest.raises(CommandError, match="--output"):
+            call_command("collate_countries", stdout=StringIO())
+
+    def test_unknown_language(self, collation_path):
+        """Test that languages missing from LANGUAGES are rejected."""
+        with pytest.raises(CommandError, match="Unknown language"):
+            call_command("collate_countries", language=["xx"], stdout=StringIO())
@@ -0,0 +1,138 @@
+"""
+Concurrency benchmarks for rendering pages with country fields.
+
+Renders a CMS page with a form and a CountryFieldPlugin through Django's
+test client, alternating between English and German, from a thread pool
+(as threaded WSGI workers do) and from tasks on one asyncio event loop
+(as ASGI servers do). Reports throughput and p50/p99 latency per
+concurrency level (``--bench-concurrency``), and checks that every
+response is rendered in its own language and that the shared country
+tables are built once per language, not once per thread.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db(transaction=True)]
+
+# Language of every request (URL prefix and Accept-Language) and a country name only rendered in it
+LANGUAGES = {"en": "Germany", "de": "Deutschland"}
+
+# Number of requests sent at once before the tables are built
+COLD_REQUESTS = 16
+
+
+@pytest.fixture
+def page_urls(settings):
+    """Create a page with a country field in every language and return its URL per language."""
+    from cms.api import add_plugin, create_page, create_page_content
+    from cms.models import PageContent
+    from django.core.cache import cache
+
+    from djangocms_form_builder_countries.choices import clear_cache
+
+    # Render the plugins on every request instead of serving cached pages
+    settings.CMS_PAGE_CACHE = False
+    settings.CMS_PLACEHOLDER_CACHE = False
+    settings.CMS_PLUGIN_CACHE = False
+    settings.MIDDLEWARE = [
+        *settings.MIDDLEWARE[:2],
+        "django.middleware.locale.LocaleMiddleware",
+        *settings.MIDDLEWARE[2:],
+    ]
+    # django CMS 4.1 only picks the page language from the URL prefix
+    settings.ROOT_URLCONF = "tests.urls_i18n"
+    page = create_page("Contact", "base.html", "en", slug="contact")
+    create_page_content("de", "Kontakt", page, slug="contact", template="base.html")
+    for language in LANGUAGES:
+        placeholder = PageContent.admin_manager.get(page=page, language=language).get_placeholders().get(slot="content")
+        form = add_plugin(placeholder, "FormPlugin", language, form_name="contact")
+        add_plugin(
+            placeholder,
+            "CountryFieldPlugin",
+            language,
+            target=form,
+            config={"field_name": "country", "field_label": "Country", "countries_first": ["DE", "AT", "CH"]},
+        )
+    cache.clear()
+    clear_cache()
+    return {language: page.get_absolute_url(language) for language in LANGUAGES}
+
+
+@pytest.fixture
+def table_builds(monkeypatch):
+    """Count the country tables built, by language."""
+    from collections import Counter
+
+    from django.utils.translation import get_language
+
+    from djangocms_form_builder_countries import choices
+
+    builds = Counter()
+    lock = threading.Lock()
+    build_country_table = choices.build_country_table
+
+    def counted():
+        with lock:
+            builds[get_language()] += 1
+        return build_country_table()
+
+    monkeypatch.setattr(choices, "build_country_table", counted)
+    return builds
+
+
+def check(response, language):
+    """Check that a response is the page rendered in the requested language."""
+    assert response.status_code == 200
+    for other, name in LANGUAGES.items():
+        assert (name.encode() in response.content) == (other == language)
+
+
+def assert_tables_shared(table_builds):
+    """Check that the country tables were built once per language, not once per thread or task."""
+    assert table_builds == dict.fromkeys(LANGUAGES, 1)
+
+
+class TestConcurrentRenderBenchmarks:
+    """Benchmarks for rendering a page with a country field concurrently."""
+
+    def test_threads(self, bench_concurrency, page_urls, table_builds):
+        """Render the page from a thread pool, one test client per language and thread."""
+        from django.test import Client
+
+        local = threading.local()
+        languages = list(LANGUAGES)
+
+        def send(index):
+            if not hasattr(local, "clients"):
+                local.clients = {language: Client() for language in languages}
+            language = languages[index % len(languages)]
+            check(local.clients[language].get(page_urls[language], headers={"accept-language": language}), language)
+
+        with ThreadPoolExecutor(max_workers=COLD_REQUESTS) as executor:
+            list(executor.map(send, range(COLD_REQUESTS)))
+        bench_concurrency(send, "threads")
+
+        assert_tables_shared(table_builds)
+
+    def test_asyncio(self, bench_concurrency, page_urls, table_builds):
+        """Render the page from tasks on one event loop through the ASGI handler."""
+        from django.test import AsyncClient
+
+        languages = list(LANGUAGES)
+        clients = {language: AsyncClient() for language in languages}
+
+        async def send(index):
+            language = languages[index % len(languages)]
+            check(await clients[language].get(page_urls[language], headers={"accept-language": language}), language)
+
+        async def send_cold():
+            await asyncio.gather(*(send(index) for index in range(COLD_REQUESTS)))
+
+        asyncio.run(send_cold())
+        bench_concurrency(send, "asyncio")
+
+        assert_tables_shared(table_builds)
@@ -0,0 +1,350 @@
+"""
+Tests for static country lists.
+
+Tests building and writing the country lists, the build_country_lists
+management command, the static files finder and the select widget of the
+static mode.
+"""
+
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import translation
+
+
+@pytest.fixture
+def lists_dir(tmp_path, settings):
+    """Configure a directory for the country lists and return it."""
+    path = tmp_path / "lists"
+    settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_LISTS_DIR = str(path)
+    return path
+
+
+class TestCountryList:
+    """Tests for building country lists."""
+
+    @pytest.mark.parametrize("language", ["en", "de"])
+    def test_content_matches_country_table(self, language):
+        """Test that a list holds the countries of the language's table in order."""
+        from djangocms_form_builder_countries.choices import get_country_table
+        from djangocms_form_builder_countries.country_lists import get_country_list
+
+        country_list = get_country_list(language)
+        data = json.loads(country_list.content)
+
+        assert data["language"] == language
+        assert [tuple(country) for country in data["countries"]] == list(get_country_table(language).choices)
+
+    def test_name_contains_content_hash(self):
+        """Test that lists are named by language and content hash."""
+        import hashlib
+
+        from djangocms_form_builder_countries.country_lists import get_country_list
+
+        country_list = get_country_list("de")
+        digest = hashlib.md5(country_list.content).hexdigest()[:12]
+
+        assert country_list.name == f"djangocms_form_builder_countries/countries/de.{digest}.json"
+        assert country_list.url == f"/static/{country_list.name}"
+
+    def test_active_language(self):
+        """Test that the list of the active language is returned by default."""
+        from djangocms_form_builder_countries.country_lists import get_country_list
+
+        with translation.override("de"):
+            assert get_country_list() is get_country_list("de")
+
+    def test_changed_countries_change_name(self, settings):
+        """Test that a list is renamed when the countries change."""
+        from djangocms_form_builder_countries.country_lists import get_country_list
+
+        name = get_country_list("en").name
+        settings.COUNTRIES_ONLY = ["AT", "CH", "DE"]
+        country_list = get_country_list("en")
+
+        assert country_list.name != name
+        assert [code for code, label in json.loads(country_list.content)["countries"]] == ["AT", "DE", "CH"]
+
+
+class TestWriteCountryLists:
+    """Tests for writing country lists."""
+
+    def test_writes_all_languages(self, tmp_path):
+        """Test that the lists of all languages are written."""
+        from djangocms_form_builder_countries.country_lists import write_country_lists
+
+        country_lists = write_country_lists(tmp_path)
+
+        assert [country_list.language for country_list in country_lists] == ["en", "de"]
+        for country_list in country_lists:
+            assert (tmp_path / country_list.name).read_bytes() == country_list.content
+
+    def test_keeps_existing_lists(self, tmp_path, settings):
+        """Test that written lists are not rewritten, and previous lists are kept."""
+        from djangocms_form_builder_countries.country_lists import write_country_lists
+
+        (previous,) = write_country_lists(tmp_path, ["en"])
+        path = tmp_path / previous.name
+        modified = path.stat().st_mtime_ns
+        write_country_lists(tmp_path, ["en"])
+        settings.COUNTRIES_ONLY = ["DE"]
+        (current,) = write_country_lists(tmp_path, ["en"])
+
+        assert path.stat().st_mtime_ns == modified
+        assert (tmp_path / current.name).exists()
+        assert not list(tmp_path.rglob("*.tmp"))
+
+
+class TestBuildCountryListsCommand:
+    """Tests for the build_country_lists management command."""
+
+    def test_writes_all_languages(self, lists_dir):
+        """Test that the lists of all languages are written to the configured directory."""
+        stdout = StringIO()
+
+        call_command("build_country_lists", stdout=stdout)
+
+        assert len(list(lists_dir.rglob("*.json"))) == 2
+        assert "2 language(s)" in stdout.getvalue()
+
+    def test_output_and_language(self, tmp_path):
+        """Test that --output and --language select the directory and the languages."""
+        call_command("build_country_lists", output=str(tmp_path), language=["de"], stdout=StringIO())
+
+        assert [path.name.split(".")[0] for path in tmp_path.rglob("*.json")] == ["de"]
+
+    def test_requires_directory(self):
+        """Test that the command fails without a directory."""
+        with pytest.raises(CommandError, match="--output"):
+            call_command("build_country_lists", stdout=StringIO())
+
+    def test_unknown_language(self, lists_dir):
+        """Test that the command fails for languages not in LANGUAGES."""
+        with pytest.raises(CommandError, match="xx"):
+            call_command("build_country_lists", language=["xx"], stdout=StringIO())
+
+
+class TestCountryListFinder:
+    """Tests for the static files finder."""
+
+    def test_find(self, lists_dir):
+        """Test that current lists are found and written, other paths are not found."""
+        from djangocms_form_builder_countries.country_lists import get_country_list
+        from djangocms_form_builder_countries.finders import CountryListFinder
+
+        name = get_country_list("de").name
+        finder = CountryListFinder()
+
+        assert finder.find(name) == str(lists_dir / name)
+        assert finder.find(name, find_all=True) == [str(lists_dir / name)]
+        assert (lists_dir / name).exists()
+        assert finder.find("djangocms_form_builder_countries/countries/de.0.json") is None
+        assert finder.find("other/file.json", find_all=True) == []
+
+    def test_list(self, lists_dir):
+        """Test that the lists of all languages are listed."""
+        from djangocms_form_builder_countries.finders import CountryListFinder
+
+        listed = list(CountryListFinder().list([]))
+
+        assert len(listed) == 2
+        for name, storage in listed:
+            assert storage.exists(name)
+
+    def test_check(self, settings):
+        """Test that the finder reports a missing directory setting."""
+        from djangocms_form_builder_countries.finders import CountryListFinder
+
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_LISTS_DIR = None
+
+        assert [error.id for error in CountryListFinder().check()] == ["djangocms_form_builder_countries.E001"]
+        assert list(CountryListFinder().list([])) == []
+
+    def test_collectstatic(self, lists_dir, tmp_path, settings):
+        """Test that collectstatic collects the current lists."""
+        from django.contrib.staticfiles import finders
+
+        from djangocms_form_builder_countries.country_lists import get_country_list
+
+        settings.STATIC_ROOT = str(tmp_path / "static")
+        settings.STATICFILES_FINDERS = [
+            "django.contrib.staticfiles.finders.AppDirectoriesFinder",
+            "djangocms_form_builder_countries.finders.CountryListFinder",
+        ]
+        finders.get_finder.cache_clear()
+        try:
+            call_command("collectstatic", interactive=False, verbosity=0)
+        finally:
+            finders.get_finder.cache_clear()
+
+        for language in ("en", "de"):
+            country_list = get_country_list(language)
+            assert (tmp_path / "static" / country_list.name).read_bytes() == country_list.content
+        assert (tmp_path / "static/djangocms_form_builder_countries/js/country-list.js").exists()
+
+
+def create_widget(countries_first=(), required=True, placeholder=""):
+    """Create a static widget for a configuration in the active language."""
+    from djangocms_form_builder_countries.choices import get_choices_for_key, get_choices_key
+    from djangocms_form_builder_countries.widgets import StaticCountrySelect
+
+    key = get_choices_key(countries_first, required, placeholder)
+    return StaticCountrySelect(choices=get_choices_for_key(key), cache_key=key)
+
+
+@pytest.fixture
+def published_lists(tmp_path, settings):
+    """Publish the country lists of all languages in STATIC_ROOT, as collectstatic does."""
+    from djangocms_form_builder_countries.country_lists import write_country_lists
+
+    settings.STATIC_ROOT = str(tmp_path / "static")
+    write_country_lists(settings.STATIC_ROOT)
+    return settings.STATIC_ROOT
+
+
+@pytest.mark.usefixtures("published_lists")
+class TestStaticCountrySelect:
+    """Tests for StaticCountrySelect rendering."""
+
+    def test_renders_blank_option_only(self):
+        """Test that only the blank option is rendered without a value."""
+        widget = create_widget(countries_first=("DE", "AT"), required=False, placeholder="Pick one")
+
+        html = widget.render("country", None)
+
+        assert html.count("<option") == 1
+        assert '<option value="" selected>Pick one</option>' in html
+        assert 'data-countries-first="DE,AT"' in html
+
+    def test_renders_selected_option(self):
+        """Test that the selected country is rendered, so that it survives without JavaScript."""
+        widget = create_widget(required=False)
+
+        with translation.override("de"):
+            html = create_widget(required=False).render("country", "CH")
+
+        assert html.count("<option") == 2
+        assert '<option value="CH" selected>Schweiz</option>' in html
+        assert widget.render("country", "XX").count("<option") == 1
+
+    def test_links_list_of_language(self):
+        """Test that the widget links the list of the active language."""
+        from djangocms_form_builder_countries.country_lists import get_country_list
+
+        with translation.override("de"):
+            html = create_widget().render("country", None)
+
+        assert f'data-country-list="{get_country_list("de").url}"' in html
+
+    def test_limited_countries(self):
+        """Test that the widget passes the selectable countries to the script."""
+        from djangocms_form_builder_countries.choices import get_choices_for_key, get_choices_key
+        from djangocms_form_builder_countries.widgets import StaticCountrySelect
+
+        key = get_choices_key(required=True, countries=["LI", "CH"])
+        widget = StaticCountrySelect(choices=get_choices_for_key(key), cache_key=key)
+
+        assert 'data-countries="CH,LI"' in widget.render("country", None)
+        assert widget.render("country", "DE").count("<option") == 0
+
+    def test_without_cache_key(self):
+        """Test that all options are rendered without a cache key."""
+        from djangocms_form_builder_countries.widgets import StaticCountrySelect
+
+        widget = StaticCountrySelect(choices=[("", "---"), ("DE", "Germany"), ("AT", "Austria")])
+
+        assert widget.render("country", "AT").count("<option") == 3
+
+
+class TestUnpublishedLists:
+    """Tests for StaticCountrySelect rendering when the lists are not published."""
+
+    def test_renders_all_options_without_list(self, tmp_path, settings):
+        """Test that all options are rendered when the list was never collected."""
+        settings.STATIC_ROOT = str(tmp_path / "static")
+
+        html = create_widget().render("country", "AT")
+
+        assert html.count("<option") > 200
+        assert "data-country-list" not in html
+        assert '<option value="AT" selected>' in html
+
+    def test_renders_all_options_without_static_root(self):
+        """Test that all options are rendered when STATIC_ROOT is not set."""
+        assert create_widget().render("country", None).count("<option") > 200
+
+    def test_renders_all_options_without_manifest_entry(self, tmp_path, settings):
+        """Test that a list missing from the manifest of ManifestStaticFilesStorage does not fail the page."""
+        from djangocms_form_builder_countries.country_lists import get_country_list, write_country_lists
+
+        settings.STATIC_ROOT = str(tmp_path / "static")
+        settings.STORAGES = {
+            **settings.STORAGES,
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"},
+        }
+        # Written after collectstatic, so the manifest does not know it
+        write_country_lists(settings.STATIC_ROOT)
+        (tmp_path / "static" / "staticfiles.json").write_text('{"paths": {}, "version": "1.1"}')
+
+        html = create_widget().render("country", None)
+
+        assert html.count("<option") > 200
+        assert get_country_list().name not in html
+
+    def test_served_by_finder_in_development(self, lists_dir, settings):
+        """Test that lists the finders provide are linked with DEBUG."""
+        from djangocms_form_builder_countries.country_lists import get_country_list
+
+        settings.DEBUG = True
+        settings.STATICFILES_FINDERS = ["djangocms_form_builder_countries.finders.CountryListFinder"]
+
+        html = create_widget(required=False).render("country", None)
+
+        assert html.count("<option") == 1
+        assert f'data-country-list="{get_country_list().url}"' in html
+
+    def test_published_lookup_is_memoized(self, published_lists):
+        """Test that the storage is asked once per list, not on every render."""
+        from unittest.mock import patch
+
+        from django.contrib.staticfiles.storage import staticfiles_storage
+
+        with patch.object(staticfiles_storage, "exists", wraps=staticfiles_storage.exists) as exists:
+            for _ in range(3):
+                create_widget().render("country", None)
+
+        assert exists.call_count == 1
+
+
+@pytest.mark.django_db
+class TestStaticMode:
+    """Tests for country fields in the static mode."""
+
+    def test_form_field(self):
+        """Test that fields in the static mode use the static widget and validate all countries."""
+        from djangocms_form_builder_countries.models import CountryField
+        from djangocms_form_builder_countries.widgets import StaticCountrySelect
+
+        instance = CountryField(config={"field_name": "country", "countries_mode": "static"})
+        name, field = instance.get_form_field()
+
+        assert isinstance(field.widget, StaticCountrySelect)
+        assert field.clean("DE") == "DE"
+        with pytest.raises(Exception, match="valid choice"):
+            field.clean("XX")
+
+    def test_render_template(self):
+        """Test that the static mode wraps the field template to add the list script."""
+        from unittest.mock import Mock
+
+        from django.template.loader import get_template
+
+        from djangocms_form_builder_countries.cms_plugins import CountryFieldPlugin
+
+        instance = Mock(config={"countries_mode": "static"})
+        template = CountryFieldPlugin.get_render_template(CountryFieldPlugin, {}, instance, None)
+
+        assert template == "djangocms_form_builder_countries/country_list.html"
+        assert "country-list.js" in get_template(template).template.source
@@ -0,0 +1,302 @@
+"""
+Tests for the compact storage of country selections.
+
+Tests encoding and decoding bitmasks, membership tests in Python and in
+the database, the multiple country field and its plugin.
+"""
+
+import pytest
+from django.utils import translation
+
+
+class TestCountryIndex:
+    """Tests for the stable country index."""
+
+    def test_covers_all_countries(self):
+        """Test that every country of django-countries can be encoded."""
+        from django_countries.data import COUNTRIES
+
+        from djangocms_form_builder_countries.country_sets import BITMASK_BITS, COUNTRY_INDEX
+
+        assert set(COUNTRIES) <= set(COUNTRY_INDEX)
+        assert len(set(COUNTRY_INDEX)) == len(COUNTRY_INDEX) <= BITMASK_BITS
+
+    def test_positions_are_stable(self):
+        """Test that positions of stored masks do not move, as new codes are only appended."""
+        from djangocms_form_builder_countries.country_sets import COUNTRY_INDEX
+
+        assert COUNTRY_INDEX[:3] == ("AD", "AE", "AF")
+        assert COUNTRY_INDEX.index("DE") == 56
+        assert COUNTRY_INDEX[248] == "ZW"
+
+
+class TestEncoding:
+    """Tests for encoding and decoding bitmasks."""
+
+    @pytest.mark.parametrize("codes", [["AD"], ["DE", "AT", "CH"], ["ZW", "AD"], pytest.param(None, id="all")])
+    def test_round_trip(self, codes):
+        """Test that decoding returns the encoded countries in index order."""
+        from djangocms_form_builder_countries.country_sets import (
+            BITMASK_DIGITS,
+            COUNTRY_INDEX,
+            decode_countries,
+            encode_countries,
+        )
+
+        codes = COUNTRY_INDEX if codes is None else codes
+        mask = encode_countries(codes)
+
+        assert len(mask) == BITMASK_DIGITS
+        assert mask == mask.lower()
+        assert decode_countries(mask) == sorted(codes, key=COUNTRY_INDEX.index)
+
+    def test_empty_selection(self):
+        """Test that no selection is stored as empty string."""
+        from djangocms_form_builder_countries.country_sets import decode_countries, encode_countries
+
+        assert encode_countries([]) == ""
+        assert decode_countries("") == []
+        assert decode_countries(None) == []
+
+    def test_unknown_code(self):
+        """Test that codes missing from the index cannot be encoded."""
+        from djangocms_form_builder_countries.country_sets import encode_countries
+
+        with pytest.raises(KeyError):
+            encode_countries(["XK"])
+
+    def test_has_country(self):
+        """Test membership tests against the digit holding a country's bit."""
+        from djangocms_form_builder_countries.country_sets import COUNTRY_INDEX, encode_countries, has_country
+
+        mask = encode_countries(["DE", "AT", "CH"])
+
+        assert [code for code in COUNTRY_INDEX if has_country(mask, code)] == ["AT", "CH", "DE"]
+        assert not has_country(mask, "XK")
+        assert not has_country("", "DE")
+
+
+@pytest.mark.django_db
+class TestCountryLookup:
+    """Tests for filtering form entries by a selected country in the database."""
+
+    def test_filters_entries(self):
+        """Test that entries are matched by one character of their mask."""
+        from djangocms_form_builder.entry_model import FormEntry
+
+        from djangocms_form_builder_countries.country_sets import encode_countries, get_country_lookup
+
+        masks = {
+            "dach": encode_countries(["DE", "AT", "CH"]),
+            "de": encode_countries(["DE"]),
+            "first_last": encode_countries(["AD", "ZW"]),
+            "none": "",
+        }
+        for name, mask in masks.items():
+            FormEntry.objects.create(form_name="markets", entry_data={"name": name, "markets": mask})
+        FormEntry.objects.create(form_name="other", entry_data={"name": "missing"})
+
+        def matching(code):
+            entries = FormEntry.objects.filter(get_country_lookup("markets", code))
+            return sorted(entry.entry_data["name"] for entry in entries)
+
+        assert matching("DE") == ["dach", "de"]
+        assert matching("CH") == ["dach"]
+        assert matching("AD") == ["first_last"]
+        assert matching("ZW") == ["first_last"]
+        assert matching("FR") == []
+
+    def test_masks_of_a_narrower_width(self, monkeypatch):
+        """Test that masks written before BITMASK_BITS grew keep matching, and do not match new countries."""
+        from djangocms_form_builder.entry_model import FormEntry
+
+        from djangocms_form_builder_countries import country_sets
+
+        def set_index(index, digits):
+            monkeypatch.setattr(country_sets, "COUNTRY_INDEX", index)
+            monkeypatch.setattr(country_sets, "COUNTRY_INDEX_POSITIONS", {code: i for i, code in enumerate(index)})
+            monkeypatch.setattr(country_sets, "COUNTRY_BITS", {code: 1 << i for i, code in enumerate(index)})
+            monkeypatch.setattr(country_sets, "BITMASK_DIGITS", digits)
+
+        # Fill the index up to the width, write a mask, then double the width
+        width = country_sets.BITMASK_DIGITS
+        index = (*country_sets.COUNTRY_INDEX, *(f"Q{i}" for i in range(8 * width - len(country_sets.COUNTRY_INDEX))))
+        set_index(index[: 4 * width], width)
+        leftmost = index[4 * width - 4]
+        narrow = country_sets.encode_countries(["DE", leftmost])
+        set_index(index, 2 * width)
+        # The first new country is bit 0 of the digit left of the narrow mask, as leftmost is of its first digit
+        new = index[4 * width]
+        wide = country_sets.encode_countries(["DE", new])
+        FormEntry.objects.create(form_name="markets", entry_data={"name": "narrow", "markets": narrow})
+        FormEntry.objects.create(form_name="markets", entry_data={"name": "wide", "markets": wide})
+
+        def matching(code):
+            entries = FormEntry.objects.filter(country_sets.get_country_lookup("markets", code))
+            return sorted(entry.entry_data["name"] for entry in entries)
+
+        assert len(wide) == 2 * len(narrow)
+        assert country_sets.decode_countries(narrow) == ["DE", leftmost]
+        assert country_sets.has_country(narrow, leftmost)
+        assert not country_sets.has_country(narrow, new)
+        assert matching("DE") == ["narrow", "wide"]
+        assert matching(leftmost) == ["narrow"]
+        assert matching(new) == ["wide"]
+
+
+class TestCountrySetSelection:
+    """Tests for the countries offered by multiple country fields."""
+
+    def test_all_countries(self):
+        """Test that fields without limits offer all countries."""
+        from djangocms_form_builder_countries.country_sets import get_country_set_selection
+
+        assert get_country_set_selection({}) is None
+
+    def test_limits(self):
+        """Test that countries_only and countries_exclude apply."""
+        from djangocms_form_builder_countries.country_sets import get_country_set_selection
+
+        assert get_country_set_selection({"countries_only": ["@DACH"], "countries_exclude": ["DE"]}) == ("AT", "CH")
+
+    def test_countries_missing_from_index(self, settings):
+        """Test that countries added by COUNTRIES_OVERRIDE are not offered."""
+        from djangocms_form_builder_countries.choices import get_country_codes
+        from djangocms_form_builder_countries.country_sets import get_country_set_selection
+
+        settings.COUNTRIES_OVERRIDE = {"XK": "Kosovo"}
+        selection = get_country_set_selection({})
+
+        assert "XK" in get_country_codes()
+        assert "XK" not in selection
+        assert len(selection) == len(get_country_codes()) - 1
+        assert get_country_set_selection({"countries_only": ["XK", "DE"]}) == ("DE",)
+
+
+@pytest.mark.django_db
+class TestCountryMultiField:
+    """Tests for the form field of multiple country fields."""
+
+    def create_field(self, config=None):
+        """Build the form field of an unsaved CountryMultiField."""
+        from djangocms_form_builder_countries.models import CountryMultiField
+
+        return CountryMultiField(config={"field_name": "markets", **(config or {})}).get_form_field()
+
+    def test_cleans_to_bitmask(self):
+        """Test that the selected countries are cleaned to their bitmask."""
+        from djangocms_form_builder_countries.country_sets import decode_countries
+
+        name, field = self.create_field()
+        mask = field.clean(["DE", "CH", "DE"])
+
+        assert name == "markets"
+        assert decode_countries(mask) == ["CH", "DE"]
+        assert field.clean([]) == ""
+
+    def test_validates_offered_countries(self):
+        """Test that only offered countries are accepted."""
+        from django.core.exceptions import ValidationError
+
+        name, field = self.create_field({"countries_only": ["@EU"], "field_required": True})
+
+        assert len(field.choices) == 27
+        with pytest.raises(ValidationError):
+            field.clean(["CH"])
+        with pytest.raises(ValidationError):
+            field.clean([])
+
+    def test_renders_selected_countries(self):
+        """Test that the widget marks all selected countries and matches SelectMultiple markup."""
+        from django import forms
+
+        with translation.override("en"):
+            name, field = self.create_field({"countries_only": ["@DACH"]})
+            html = field.widget.render(name, ["AT", "CH"])
+            reference = forms.SelectMultiple(attrs=field.widget.attrs, choices=field.choices).render(name, ["AT", "CH"])
+
+        assert html == reference
+        assert html.count(" selected") == 2
+        assert " multiple" in html
+
+    def test_bound_form(self):
+        """Test that submitted lists are read and bitmask initial values decoded."""
+        from django import forms
+
+        from djangocms_form_builder_countries.country_sets import encode_countries
+
+        name, field = self.create_field()
+        form_class = type("MarketsForm", (forms.Form,), {name: field})
+        form = form_class(data={"markets": ["FR", "IT"]})
+
+        assert form.is_valid(), form.errors
+        assert form.cleaned_data["markets"] == encode_countries(["FR", "IT"])
+        unbound = form_class(initial={"markets": encode_countries(["IT"])})
+        assert 'value="IT" selected' in str(unbound["markets"])
+
+    def test_shares_choice_tables(self):
+        """Test that fields share the choice tables of single country fields."""
+        from djangocms_form_builder_countries.models import CountryField
+
+        name, field = self.create_field({"countries_only": ["@EEA"]})
+        config = {"field_name": "country", "countries_only": ["@EEA"], "field_required": True}
+        name, single = CountryField(config=config).get_form_field()
+
+        assert field.choices is single.choices
+
+
+@pytest.mark.django_db
+class TestCountryMultiFieldPlugin:
+    """Tests for the multiple country field plugin."""
+
+    def test_registered(self):
+        """Test that the plugin is registered with its model and form."""
+        from cms.plugin_pool import plugin_pool
+
+        from djangocms_form_builder_countries.cms_plugins import CountryMultiFieldPlugin
+        from djangocms_form_builder_countries.forms import CountryMultiFieldForm
+        from djangocms_form_builder_countries.models import CountryMultiField
+
+        assert plugin_pool.get_plugin("CountryMultiFieldPlugin") is CountryMultiFieldPlugin
+        assert CountryMultiFieldPlugin.model is CountryMultiField
+        assert CountryMultiFieldPlugin.form is CountryMultiFieldForm
+
+    def test_form_stores_limits(self):
+        """Test that the plugin form stores normalized limits in the config."""
+        from djangocms_form_builder_countries.forms import CountryMultiFieldForm
+        from djangocms_form_builder_countries.models import CountryMultiField
+
+        form = CountryMultiFieldForm(
+            data={"field_name": "markets", "countries_only": ["@EU", "CH", "CH"], "countries_exclude": ["DE"]},
+            instance=CountryMultiField(config={}),
+        )
+
+        assert form.is_valid(), form.errors
+        config = form.save(commit=False).config
+
+        assert config["countries_only"] == ["@EU", "CH"]
+        assert config["countries_exclude"] == ["DE"]
+        assert "countries_first" not in form.fields
+
+    def test_counted_per_country(self):
+        """Test that every selected country counts as a submission of that country."""
+        from cms.api import add_plugin, create_page
+        from cms.models import PageContent
+        from djangocms_form_builder.entry_model import FormEntry
+
+        from djangocms_form_builder_countries.country_sets import encode_countries
+        from djangocms_form_builder_countries.submissions import count_submissions
+
+        page = create_page("Contact", "base.html", "en")
+        placeholder = PageContent.admin_manager.get(page=page, language="en").get_placeholders().get(slot="content")
+        form = add_plugin(placeholder, "FormPlugin", "en", form_name="markets")
+        add_plugin(placeholder, "CountryMultiFieldPlugin", "en", target=form, config={"field_name": "markets"})
+        add_plugin(placeholder, "CountryFieldPlugin", "en", target=form, config={"field_name": "country"})
+        for entry_data in (
+            {"markets": encode_countries(["DE", "AT"]), "country": "DE"},
+            {"markets": encode_countries(["DE"])},
+            {"markets": ""},
+        ):
+            FormEntry.objects.create(form_name="markets", entry_data=entry_data)
+
+        assert count_submissions() == {"DE": 3, "AT": 1}
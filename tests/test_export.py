@@ -0,0 +1,234 @@
+"""
+Tests for the streaming export of form submissions.
+
+Tests keyset pagination, the CSV and NDJSON encodings, the
+export_country_submissions management command and the admin export view.
+"""
+
+import csv
+import io
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from tests.conftest import add_entries
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def contact_form(placeholder):
+    """Add a form named "contact" with a country field named "country"."""
+    from cms.api import add_plugin
+
+    form = add_plugin(placeholder, "FormPlugin", "en", form_name="contact")
+    add_plugin(placeholder, "CountryFieldPlugin", "en", target=form, config={"field_name": "country"})
+    return form
+
+
+def read_csv(data):
+    """Parse CSV data into a list of dicts."""
+    return list(csv.DictReader(io.StringIO(data)))
+
+
+class TestIterEntries:
+    """Tests for reading entries in chunks."""
+
+    def test_keyset_pagination(self, contact_form, django_assert_num_queries):
+        """Test that entries are read in chunks, one query per chunk."""
+        from djangocms_form_builder_countries.export import iter_entries
+
+        ids = add_entries("contact", *({"country": "DE"} for _ in range(5)))
+
+        with django_assert_num_queries(3):
+            chunks = list(iter_entries(["contact"], chunk_size=2))
+
+        assert [[entry[0] for entry in chunk] for chunk in chunks] == [ids[:2], ids[2:4], ids[4:]]
+
+    def test_after_and_limit(self, contact_form):
+        """Test that exports resume after an id and stop at the limit."""
+        from djangocms_form_builder_countries.export import iter_entries
+
+        ids = add_entries("contact", *({"country": "DE"} for _ in range(5)))
+
+        chunks = list(iter_entries(["contact"], after=ids[1], limit=2, chunk_size=10))
+
+        assert [entry[0] for chunk in chunks for entry in chunk] == ids[2:4]
+
+
+class TestExportEntries:
+    """Tests for encoding the entries."""
+
+    def test_csv(self, contact_form):
+        """Test that CSV rows hold the code, the localized name and the other data."""
+        from djangocms_form_builder_countries.export import export_entries
+
+        (pk,) = add_entries("contact", {"country": "AT", "name": "Anna"})
+        add_entries("other", {"country": "FR"})
+
+        rows = read_csv("".join(export_entries("csv", language="de")))
+
+        assert rows == [
+            {
+                "id": str(pk),
+                "form_name": "contact",
+                "created_at": rows[0]["created_at"],
+                "country": "AT",
+                "country_name": "Österreich",
+                "data": '{"name": "Anna"}',
+            }
+        ]
+
+    def test_ndjson(self, contact_form):
+        """Test that every entry is one JSON object with its country names."""
+        from djangocms_form_builder_countries.export import export_entries
+
+        add_entries("contact", {"country": "CH", "name": "Anna"}, {"country": ""})
+
+        lines = "".join(export_entries("ndjson", language="en")).splitlines()
+
+        entries = [json.loads(line) for line in lines]
+        assert [entry["data"] for entry in entries] == [{"country": "CH", "name": "Anna"}, {"country": ""}]
+        assert [entry["country_names"] for entry in entries] == [{"country": "Switzerland"}, {}]
+
+    def test_multiple_country_fields(self, contact_form, placeholder):
+        """Test that the bitmasks of multiple country fields are decoded."""
+        from cms.api import add_plugin
+
+        from djangocms_form_builder_countries.country_sets import encode_countries
+        from djangocms_form_builder_countries.export import export_entries
+
+        add_plugin(placeholder, "CountryMultiFieldPlugin", "en", target=contact_form, config={"field_name": "visited"})
+        (pk,) = add_entries("contact", {"country": "DE", "visited": encode_countries(["FR", "AT"]), "name": "Anna"})
+
+        rows = read_csv("".join(export_entries("csv", language="de")))
+        (entry,) = [json.loads(line) for line in "".join(export_entries("ndjson", language="en")).splitlines()]
+
+        assert [(row["visited"], row["visited_name"], row["data"]) for row in rows] == [
+            ("AT,FR", "Österreich; Frankreich", '{"name": "Anna"}')
+        ]
+        assert entry["country_names"] == {"country": "Germany", "visited": {"AT": "Austria", "FR": "France"}}
+
+    def test_one_chunk_at_a_time(self, contact_form):
+        """Test that a chunk is encoded before the next one is read."""
+        from djangocms_form_builder_countries.export import export_entries
+
+        add_entries("contact", *({"country": "DE"} for _ in range(3)))
+        progress = []
+
+        for data in export_entries("ndjson", chunk_size=2, progress=lambda *args: progress.append(args)):
+            assert len(data.splitlines()) == progress[-1][0]
+
+        assert [count for count, pk in progress] == [2, 1]
+
+    def test_unknown_format(self):
+        """Test that unknown formats are rejected."""
+        from djangocms_form_builder_countries.export import export_entries
+
+        with pytest.raises(ValueError, match="Unknown export format"):
+            list(export_entries("xml"))
+
+
+class TestExportCommand:
+    """Tests for the export_country_submissions management command."""
+
+    def test_writes_file(self, contact_form, tmp_path):
+        """Test that the export is written to --output and the last id reported."""
+        ids = add_entries("contact", {"country": "DE"}, {"country": "AT"})
+        path = tmp_path / "export.csv"
+        stderr = StringIO()
+
+        call_command("export_country_submissions", output=str(path), chunk_size=1, stderr=stderr)
+
+        assert [row["country_name"] for row in read_csv(path.read_text())] == ["Germany", "Austria"]
+        assert f"Exported 2 entries, last id {ids[-1]}." in stderr.getvalue()
+
+    def test_resume(self, contact_form):
+        """Test that --after resumes an export."""
+        ids = add_entries("contact", {"country": "DE"}, {"country": "AT"})
+        stdout = StringIO()
+
+        call_command("export_country_submissions", format="ndjson", after=ids[0], stdout=stdout, stderr=StringIO())
+
+        assert [json.loads(line)["id"] for line in stdout.getvalue().splitlines()] == ids[1:]
+
+    def test_reports_interruption(self, contact_form, monkeypatch):
+        """Test that the id to resume from is reported when the export fails."""
+        from djangocms_form_builder_countries import export
+
+        ids = add_entries("contact", {"country": "DE"}, {"country": "AT"})
+        encode_ndjson = export.encode_ndjson
+        calls = []
+
+        def failing_encode(*args):
+            calls.append(args)
+            if len(calls) > 1:
+                raise KeyboardInterrupt
+            return encode_ndjson(*args)
+
+        monkeypatch.setattr(export, "encode_ndjson", failing_encode)
+        stderr = StringIO()
+
+        with pytest.raises(KeyboardInterrupt):
+            call_command("export_country_submissions", format="ndjson", chunk_size=1, stdout=StringIO(), stderr=stderr)
+
+        assert f"Resume with --after {ids[0]}." in stderr.getvalue()
+
+    def test_invalid_language(self):
+        """Test that languages missing from LANGUAGES are rejected."""
+        with pytest.raises(CommandError, match="Unknown language"):
+            call_command("export_country_submissions", language="xx", stdout=StringIO())
+
+
+class TestExportView:
+    """Tests for the admin export view."""
+
+    def test_streams_csv(self, contact_form, admin_client):
+        """Test that the export is streamed as a CSV attachment."""
+        from django.urls import reverse
+
+        add_entries("contact", {"country": "DE"})
+
+        response = admin_client.get(reverse("admin:djangocms_form_builder_countries_countrysubmission_export"))
+
+        assert response.streaming
+        assert response["Content-Type"] == "text/csv; charset=utf-8"
+        assert "attachment" in response["Content-Disposition"]
+        data = b"".join(response.streaming_content).decode()
+        assert [row["country_name"] for row in read_csv(data)] == ["Germany"]
+
+    def test_ndjson_with_resume(self, contact_form, admin_client):
+        """Test the format, after and limit parameters."""
+        from django.urls import reverse
+
+        ids = add_entries("contact", {"country": "DE"}, {"country": "AT"}, {"country": "CH"})
+
+        response = admin_client.get(
+            reverse("admin:djangocms_form_builder_countries_countrysubmission_export"),
+            {"format": "ndjson", "after": ids[0], "limit": 1},
+        )
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [ids[1]]
+
+    def test_invalid_parameters(self, admin_client):
+        """Test that unknown formats and invalid ids are rejected."""
+        from django.urls import reverse
+
+        url = reverse("admin:djangocms_form_builder_countries_countrysubmission_export")
+
+        assert admin_client.get(url, {"format": "xml"}).status_code == 400
+        assert admin_client.get(url, {"after": "x"}).status_code == 400
+
+    def test_requires_permission(self, client, django_user_model):
+        """Test that staff users without permission cannot export."""
+        from django.urls import reverse
+
+        user = django_user_model.objects.create_user("staff", password="secret", is_staff=True)
+        client.force_login(user)
+
+        response = client.get(reverse("admin:djangocms_form_builder_countries_countrysubmission_export"))
+
+        assert response.status_code == 403
@@ -0,0 +1,114 @@
+"""
+Tests for the public country form field.
+
+Tests the CountryChoiceField used to validate submitted country codes.
+"""
+
+import copy
+
+import pytest
+from django import forms
+
+
+def create_field(required=True, countries_first=None):
+    """Create a CountryChoiceField with the cached choices for a configuration."""
+    from djangocms_form_builder_countries.choices import get_country_choices
+    from djangocms_form_builder_countries.fields import CountryChoiceField
+
+    return CountryChoiceField(
+        required=required,
+        choices=get_country_choices(countries_first or [], required=required),
+    )
+
+
+class TestCountryChoiceField:
+    """Tests for CountryChoiceField validation."""
+
+    def test_accepts_valid_code(self):
+        """Test that valid country codes are accepted."""
+        field = create_field()
+
+        assert field.clean("DE") == "DE"
+        assert field.clean("JP") == "JP"
+
+    def test_rejects_unknown_code(self):
+        """Test that unknown codes raise an invalid_choice error."""
+        field = create_field()
+
+        with pytest.raises(forms.ValidationError) as excinfo:
+            field.clean("XX")
+        assert excinfo.value.code == "invalid_choice"
+
+    def test_rejects_lowercase_code(self):
+        """Test that codes must match the submitted option values exactly."""
+        field = create_field()
+
+        with pytest.raises(forms.ValidationError):
+            field.clean("de")
+
+    def test_separator_is_not_a_valid_choice(self):
+        """Test that the separator value is never treated as a country."""
+        field = create_field(countries_first=["DE", "AT"])
+
+        assert ("---", "---") in field.choices
+        assert field.valid_value("") is False
+        assert field.valid_value("---") is False
+
+    def test_separator_fails_required_field(self):
+        """Test that submitting the separator on a required field is rejected."""
+        field = create_field(required=True, countries_first=["DE", "AT"])
+
+        with pytest.raises(forms.ValidationError) as excinfo:
+            field.clean("---")
+        assert excinfo.value.code == "invalid_choice"
+
+    def test_separator_fails_optional_field(self):
+        """Test that submitting the separator on an optional field is rejected."""
+        field = create_field(required=False, countries_first=["DE", "AT"])
+
+        with pytest.raises(forms.ValidationError) as excinfo:
+            field.clean("---")
+        assert excinfo.value.code == "invalid_choice"
+
+    def test_blank_on_optional_field_means_no_selection(self):
+        """Test that an empty submission on an optional field cleans to no country."""
+        field = create_field(required=False, countries_first=["DE", "AT"])
+
+        assert field.clean("") == ""
+
+    def test_valid_codes_is_frozenset(self):
+        """Test that validation uses a precomputed frozenset."""
+        field = create_field()
+
+        assert isinstance(field.valid_codes, frozenset)
+        assert "DE" in field.valid_codes
+        assert "" not in field.valid_codes
+
+    def test_custom_valid_codes(self):
+        """Test that the set of valid codes can be restricted."""
+        from djangocms_form_builder_countries.fields import CountryChoiceField
+
+        field = CountryChoiceField(choices=[("DE", "Germany"), ("AT", "Austria")], valid_codes=["DE", "AT"])
+
+        assert field.clean("AT") == "AT"
+        with pytest.raises(forms.ValidationError):
+            field.clean("CH")
+
+    def test_deepcopy_shares_choices(self):
+        """Test that copying the field for a form instance does not copy the choice table."""
+        field = create_field()
+
+        copied = copy.deepcopy(field)
+
+        assert copied.choices is field.choices
+        assert copied.valid_codes is field.valid_codes
+        assert copied.widget is not field.widget
+        assert list(copied.widget.choices) == list(field.widget.choices)
+
+    def test_form_validation(self):
+        """Test that a bound form validates the country field."""
+        field = create_field()
+        form_class = type("CountryForm", (forms.Form,), {"country": field})
+
+        assert form_class({"country": "CH"}).is_valid()
+        assert not form_class({"country": "XX"}).is_valid()
@@ -5,8 +5,15 @@ Tests the CountryFieldForm and CountryMultipleChoiceField
 used in the Django CMS admin interface.
 """
 
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
 import pytest
 from django import forms
+from django.utils import translation
 from django_countries import countries
 
 
@@ -20,7 +27,37 @@ class TestCountryMultipleChoiceField:
         field = CountryMultipleChoiceField()
 
         # Should have all countries
-        assert len(field.choices) == len(list(countries))
+        assert len(list(field.choices)) == len(list(countries))
+
+    def test_choices_follow_active_language(self):
+        """Test that the lazy choices are resolved in the current language."""
+        from djangocms_form_builder_countries.forms import CountryMultipleChoiceField
+
+        field = CountryMultipleChoiceField()
+
+        with translation.override("en"):
+            assert dict(field.choices)["DE"] == "Germany"
+        with translation.override("de"):
+            assert dict(field.choices)["DE"] == "Deutschland"
+
+    def test_search(self):
+        """Test that the field can search its choices through the country search index."""
+        from djangocms_form_builder_countries.forms import CountryMultipleChoiceField
+
+        field = CountryMultipleChoiceField()
+
+        with translation.override("de"):
+            assert field.search("osterr") == [("AT", "Österreich")]
+
+    def test_search_respects_custom_choices(self):
+        """Test that search results are restricted to the field's choices."""
+        from djangocms_form_builder_countries.forms import CountryMultipleChoiceField
+
+        field = CountryMultipleChoiceField(choices=[("AT", "Austria"), ("AU", "Australia")])
+
+        with translation.override("en"):
+            assert field.search("a") == [("AT", "Austria"), ("AU", "Australia")]
+            assert field.search("germ") == []
 
     def test_not_required_by_default(self):
         """Test that field is not required by default."""
@@ -126,3 +163,85 @@ class TestCountryFieldForm:
 
         label = str(form.fields["countries_first"].label)
         assert "first" in label.lower() or "countries" in label.lower()
+
+    def test_countries_first_is_normalized_on_save(self):
+        """Test that the stored countries_first is de-duplicated and the config marked as normalized."""
+        from djangocms_form_builder_countries.constants import CONFIG_VERSION, CONFIG_VERSION_KEY
+        from djangocms_form_builder_countries.forms import CountryFieldForm
+        from djangocms_form_builder_countries.models import CountryField
+
+        form = CountryFieldForm(
+            data={"field_name": "country", "countries_first": ["CH", "DE", "CH"]},
+            instance=CountryField(config={}),
+        )
+
+        assert form.is_valid(), form.errors
+        instance = form.save(commit=False)
+
+        assert instance.config["countries_first"] == ["CH", "DE"]
+        assert instance.config[CONFIG_VERSION_KEY] == CONFIG_VERSION
+
+    def test_region_and_country_limits(self):
+        """Test that countries_only and countries_exclude offer regions and countries, and are normalized on save."""
+        from djangocms_form_builder_countries.forms import CountryFieldForm
+        from djangocms_form_builder_countries.models import CountryField
+
+        form = CountryFieldForm(
+            data={"field_name": "country", "countries_only": ["@EEA", "CH", "CH"], "countries_exclude": ["@DACH"]},
+            instance=CountryField(config={}),
+        )
+
+        assert form.is_valid(), form.errors
+        instance = form.save(commit=False)
+
+        assert instance.config["countries_only"] == ["@EEA", "CH"]
+        assert instance.config["countries_exclude"] == ["@DACH"]
+        groups = [str(label) for label, choices in form.fields["countries_only"].choices]
+        assert groups == ["Regions", "Countries"]
+
+    def test_rejects_unknown_regions(self):
+        """Test that only built-in regions can be selected."""
+        from djangocms_form_builder_countries.forms import CountryFieldForm
+        from djangocms_form_builder_countries.models import CountryField
+
+        form = CountryFieldForm(
+            data={"field_name": "country", "countries_exclude": ["@NORDICS"]},
+            instance=CountryField(config={}),
+        )
+
+        assert not form.is_valid()
+        assert "countries_exclude" in form.errors
+
+
+class TestLazyCountryList:
+    """Tests that the country list is not evaluated at import time."""
+
+    def test_app_loading_does_not_evaluate_countries(self):
+        """Test that setting up Django with the app installed leaves the country list untouched."""
+        code = textwrap.dedent(
+            """
+            import django
+
+            django.setup()
+
+            from django_countries import countries
+
+            from djangocms_form_builder_countries import cms_plugins, forms  # noqa: F401
+            from djangocms_form_builder_countries.choices import _build_choices
+
+            assert not hasattr(countries, "_countries"), "country dict was built"
+            assert not hasattr(countries, "_iter_cache"), "country list was iterated"
+            assert _build_choices.cache_info().currsize == 0, "choice table was built"
+            """
+        )
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": "tests.settings"}
+
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).resolve().parent.parent,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+
+        assert result.returncode == 0, result.stderr
@@ -0,0 +1,262 @@
+"""
+Tests for the country lookup of client IP addresses.
+
+Tests lookups in the MaxMind DB fixture databases of tests/data, the
+memoized lookups, and preselecting the client's country in country fields.
+"""
+
+import pytest
+from django.test import RequestFactory
+
+
+@pytest.fixture(autouse=True)
+def clear_geoip_cache():
+    """Start every test with a closed database and no memoized lookups."""
+    from djangocms_form_builder_countries.geoip import clear_cache
+
+    clear_cache()
+    yield
+    clear_cache()
+
+
+@pytest.fixture
+def maxminddb():
+    """Skip tests reading databases when the geoip extra is not installed."""
+    return pytest.importorskip("maxminddb")
+
+
+@pytest.mark.usefixtures("maxminddb")
+class TestGetCountryCode:
+    """Tests for looking up the country of an IP address."""
+
+    @pytest.mark.parametrize("database", ["GEOIP_DATABASE", "GEOIP_DATABASE_IPV4"])
+    def test_ipv4_addresses(self, settings, database):
+        """Test IPv4 lookups in IPv4 and IPv6 databases."""
+        from djangocms_form_builder_countries.geoip import get_country_code
+        from tests import conftest
+
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_GEOIP_DATABASE = getattr(conftest, database)
+
+        assert get_country_code("192.0.2.1") == "AT"
+        assert get_country_code("192.0.2.255") == "AT"
+        assert get_country_code("203.0.113.1") == "DE"
+        assert get_country_code("203.0.113.200") == "LI"
+        assert get_country_code("8.8.8.8") is None
+
+    def test_ipv6_addresses(self, geoip_database):
+        """Test IPv6 lookups, including IPv4-mapped addresses."""
+        from djangocms_form_builder_countries.geoip import get_country_code
+
+        assert get_country_code("2001:db8::1") == "FR"
+        assert get_country_code("::ffff:192.0.2.9") == "AT"
+        assert get_country_code("2001:db9::1") is None
+
+    def test_ipv6_address_in_ipv4_database(self, settings):
+        """Test that IPv6 addresses are not found in IPv4 databases."""
+        from djangocms_form_builder_countries.geoip import get_country_code
+        from tests.conftest import GEOIP_DATABASE_IPV4
+
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_GEOIP_DATABASE = GEOIP_DATABASE_IPV4
+
+        assert get_country_code("2001:db8::1") is None
+
+    def test_prefers_country_over_registered_country(self, geoip_database):
+        """Test that the registered country is only used without a country."""
+        from djangocms_form_builder_countries.geoip import get_country_code
+
+        assert get_country_code("198.51.100.7") == "CH"
+        assert get_country_code("100.64.0.1") == "NL"
+
+    @pytest.mark.parametrize("address", ["", None, "not an address", "192.0.2.256"])
+    def test_invalid_addresses(self, geoip_database, address):
+        """Test that invalid addresses have no country."""
+        from djangocms_form_builder_countries.geoip import get_country_code
+
+        assert get_country_code(address) is None
+
+    @pytest.mark.parametrize("content", [b"", b"not a database", b"\xab\xcd\xefMaxMind.com\xe0"])
+    def test_unreadable_database(self, tmp_path, settings, content):
+        """Test that missing, empty and invalid files are ignored."""
+        from djangocms_form_builder_countries.geoip import get_country_code
+
+        path = tmp_path / "countries.mmdb"
+        path.write_bytes(content)
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_GEOIP_DATABASE = path
+
+        assert get_country_code("192.0.2.1") is None
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_GEOIP_DATABASE = tmp_path / "missing.mmdb"
+        assert get_country_code("192.0.2.1") is None
+
+    def test_prefix_countries_are_memoized(self, geoip_database):
+        """Test that addresses of the same /24 share the lookup of the prefix."""
+        from djangocms_form_builder_countries.geoip import _get_prefix_country, get_country_code
+
+        for host in range(1, 255):
+            get_country_code(f"192.0.2.{host}")
+        get_country_code("2001:db8::1")
+        get_country_code("2001:db8::2")
+
+        assert _get_prefix_country.cache_info().misses == 2
+        assert _get_prefix_country.cache_info().hits == 253 + 1
+
+    def test_split_prefixes_are_looked_up_per_address(self, geoip_database):
+        """Test that prefixes split into networks of several countries are not memoized as one country."""
+        from unittest.mock import patch
+
+        from djangocms_form_builder_countries import geoip
+
+        with patch.object(geoip, "_lookup", wraps=geoip._lookup) as lookup:
+            countries = [geoip.get_country_code(f"203.0.113.{host}") for host in (1, 127, 128, 254)]
+
+        assert countries == ["DE", "DE", "LI", "LI"]
+        # One lookup of the prefix, then one per address
+        assert lookup.call_count == 1 + 4
+
+    def test_database_is_mapped_once(self, geoip_database):
+        """Test that the database is memory-mapped once per process."""
+        from djangocms_form_builder_countries.geoip import _open_database, get_country_code
+
+        get_country_code("192.0.2.1")
+        database = _open_database(str(geoip_database))
+        get_country_code("198.51.100.1")
+
+        assert _open_database(str(geoip_database)) is database
+        assert _open_database.cache_info().currsize == 1
+        assert database.metadata().database_type == "Test-Country"
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("maxminddb")
+class TestPreselection:
+    """Tests for preselecting the client's country."""
+
+    def create_country_field(self, config):
+        """Create an unsaved CountryField with the given config."""
+        from djangocms_form_builder_countries.models import CountryField
+
+        return CountryField(config={"field_name": "country", **config})
+
+    def get_request(self, address):
+        """Return a GET request from an IP address."""
+        return RequestFactory().get("/", REMOTE_ADDR=address)
+
+    def test_preselects_client_country(self, geoip_database):
+        """Test that the client's country is the initial value of fields with countries_preselect."""
+        instance = self.create_country_field({"countries_preselect": True})
+
+        name, field = instance.get_form_field(request=self.get_request("192.0.2.1"))
+
+        assert field.initial == "AT"
+        assert field.widget.render(name, field.initial).count(" selected") == 1
+        assert '<option value="AT" selected>' in field.widget.render(name, field.initial)
+
+    def test_opt_in(self, geoip_database):
+        """Test that fields without countries_preselect keep the blank default."""
+        instance = self.create_country_field({})
+
+        name, field = instance.get_form_field(request=self.get_request("192.0.2.1"))
+
+        assert field.initial is None
+
+    @pytest.mark.parametrize("address", ["8.8.8.8", "junk"])
+    def test_unknown_country(self, geoip_database, address):
+        """Test that clients without a known country keep the blank default."""
+        instance = self.create_country_field({"countries_preselect": True})
+
+        name, field = instance.get_form_field(request=self.get_request(address))
+
+        assert field.initial is None
+
+    def test_only_selectable_countries(self, geoip_database, settings):
+        """Test that countries excluded by COUNTRIES_ONLY are not preselected."""
+        settings.COUNTRIES_ONLY = ["DE", "CH"]
+        instance = self.create_country_field({"countries_preselect": True})
+
+        name, field = instance.get_form_field(request=self.get_request("192.0.2.1"))
+
+        assert field.initial is None
+
+    def test_without_request(self, geoip_database):
+        """Test that fields built without a request keep the blank default."""
+        instance = self.create_country_field({"countries_preselect": True})
+
+        name, field = instance.get_form_field()
+
+        assert field.initial is None
+
+    def test_looks_up_once_per_form(self, geoip_database):
+        """Test that the client's country is looked up once for all fields of a form."""
+        from unittest.mock import patch
+
+        from djangocms_form_builder_countries import geoip
+        from djangocms_form_builder_countries.models import build_form_fields
+
+        instances = [self.create_country_field({"countries_preselect": True}) for _ in range(3)]
+
+        with patch.object(geoip, "get_request_country", wraps=geoip.get_request_country) as lookup:
+            fields = build_form_fields(instances, request=self.get_request("203.0.113.200"))
+
+        assert lookup.call_count == 1
+        assert [field.initial for name, field in fields] == ["LI"] * 3
+
+
+@pytest.mark.django_db
+class TestWithoutDatabase:
+    """Tests for country fields and lookups when no database can be read."""
+
+    def test_without_database(self, settings):
+        """Test that nothing is looked up without a configured database."""
+        from djangocms_form_builder_countries.geoip import get_country_code
+
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_GEOIP_DATABASE = None
+
+        assert get_country_code("192.0.2.1") is None
+
+    def test_requires_maxminddb(self, settings):
+        """Test that configuring a database without maxminddb installed is reported."""
+        from unittest.mock import patch
+
+        from django.core.exceptions import ImproperlyConfigured
+
+        from djangocms_form_builder_countries import geoip
+        from tests.conftest import GEOIP_DATABASE
+
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_GEOIP_DATABASE = GEOIP_DATABASE
+
+        with patch.object(geoip, "maxminddb", None), pytest.raises(ImproperlyConfigured):
+            geoip.get_country_code("192.0.2.1")
+
+    def test_preselection_without_database(self, settings):
+        """Test that fields preselecting the country keep the blank default without a configured database."""
+        from djangocms_form_builder_countries.models import CountryField
+
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_GEOIP_DATABASE = None
+        instance = CountryField(config={"field_name": "country", "countries_preselect": True})
+
+        name, field = instance.get_form_field(request=RequestFactory().get("/", REMOTE_ADDR="192.0.2.1"))
+
+        assert field.initial is None
+
+    def test_preselected_fields_are_not_cached(self, settings):
+        """Test that the CMS does not cache selects preselected by the client IP."""
+        from unittest.mock import Mock
+
+        from cms.constants import EXPIRE_NOW
+
+        from djangocms_form_builder_countries.cms_plugins import CountryFieldPlugin
+        from tests.conftest import GEOIP_DATABASE
+
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_GEOIP_DATABASE = GEOIP_DATABASE
+
+        plugin = CountryFieldPlugin()
+        request = RequestFactory().get("/", REMOTE_ADDR="192.0.2.1")
+
+        assert plugin.get_cache_expiration(request, Mock(config={"countries_preselect": True}), None) == EXPIRE_NOW
+        assert plugin.get_cache_expiration(request, Mock(config={}), None) is None
+
+    def test_form_stores_option(self):
+        """Test that the plugin form stores countries_preselect in the config."""
+        from djangocms_form_builder_countries.forms import CountryFieldForm
+
+        assert "countries_preselect" in CountryFieldForm._meta.entangled_fields["config"]
+        assert CountryFieldForm.base_fields["countries_preselect"].required is False
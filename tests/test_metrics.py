@@ -0,0 +1,129 @@
+"""
+Tests for the opt-in instrumentation.
+
+Tests the metrics backend setting and the values recorded for
+field construction, rendering and cache lookups.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+from django.utils import translation
+
+BACKEND = "djangocms_form_builder_countries.metrics.InMemoryMetricsBackend"
+
+
+@pytest.fixture
+def backend(settings):
+    """Enable the in-memory metrics backend."""
+    from djangocms_form_builder_countries import metrics
+
+    settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_METRICS = BACKEND
+    return metrics.backend
+
+
+def get_form_field(config):
+    """Build the form field of a country field with the given config."""
+    from djangocms_form_builder_countries.models import CountryField
+
+    return CountryField.get_form_field(Mock(field_name="country", config=config))
+
+
+class TestBackendSetting:
+    """Tests for loading the metrics backend."""
+
+    def test_disabled_by_default(self):
+        """Test that no backend is active without the setting."""
+        from djangocms_form_builder_countries import metrics
+
+        assert metrics.backend is None
+
+    def test_setting_loads_backend(self, backend):
+        """Test that the setting instantiates the configured backend."""
+        from djangocms_form_builder_countries.metrics import InMemoryMetricsBackend
+
+        assert isinstance(backend, InMemoryMetricsBackend)
+
+    def test_backends_implement_the_interface(self):
+        """Test that backends must implement every method of the interface."""
+        from djangocms_form_builder_countries.metrics import BaseMetricsBackend
+
+        class CountingBackend(BaseMetricsBackend):
+            def increment(self, metric, language):
+                pass
+
+        with pytest.raises(TypeError):
+            BaseMetricsBackend()
+        with pytest.raises(TypeError):
+            CountingBackend()
+
+    def test_removing_setting_disables_backend(self, settings):
+        """Test that instrumentation is switched off with the setting."""
+        from djangocms_form_builder_countries import metrics
+
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_METRICS = BACKEND
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_METRICS = None
+
+        assert metrics.backend is None
+
+    def test_disabled_records_nothing(self, monkeypatch):
+        """Test that instrumented code does not touch a backend when disabled."""
+        from djangocms_form_builder_countries import metrics
+
+        calls = []
+        monkeypatch.setattr(metrics.BaseMetricsBackend, "record", lambda *args: calls.append(args))
+        get_form_field({"field_required": True})
+
+        assert calls == []
+
+
+class TestRecordedMetrics:
+    """Tests for the recorded values."""
+
+    def test_get_form_field_duration_and_size(self, backend):
+        """Test that field construction time and choice list size are recorded."""
+        with translation.override("de"):
+            name, field = get_form_field({"field_required": False, "countries_first": ["DE"]})
+
+        assert len(backend.values["get_form_field.duration", "de"]) == 1
+        assert backend.values["get_form_field.duration", "de"][0] > 0
+        assert backend.values["get_form_field.choices", "de"] == [len(field.choices)]
+
+    def test_render_duration(self, backend):
+        """Test that rendering the select is timed."""
+        with translation.override("en"):
+            name, field = get_form_field({"field_required": True})
+            field.widget.render("country", "DE")
+
+        assert len(backend.values["render.duration", "en"]) == 1
+
+    def test_choices_cache_hit_ratio(self, backend):
+        """Test that choice table lookups and misses are counted per language."""
+        with translation.override("en"):
+            for _ in range(4):
+                get_form_field({"field_required": True})
+        with translation.override("de"):
+            get_form_field({"field_required": True})
+
+        assert backend.counters["choices.lookup", "en"] == 4
+        assert backend.counters["choices.miss", "en"] == 1
+        assert backend.hit_ratio("choices", "en") == 0.75
+        assert backend.hit_ratio("choices", "de") == 0
+        assert backend.hit_ratio("choices", "fr") is None
+
+    def test_options_cache_hit_ratio(self, backend):
+        """Test that pre-rendered option lookups are counted."""
+        with translation.override("en"):
+            name, field = get_form_field({"field_required": True})
+            field.widget.render("country", "DE")
+            field.widget.render("country", "AT")
+
+        assert backend.hit_ratio("options", "en") == 0.5
+
+    def test_reset(self, backend):
+        """Test that the in-memory backend can be reset."""
+        get_form_field({"field_required": True})
+        backend.reset()
+
+        assert not backend.values
+        assert not backend.counters
@@ -0,0 +1,42 @@
+"""
+Tests for the CountryTableMiddleware.
+"""
+
+import asyncio
+
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils import translation
+
+
+class TestCountryTableMiddleware:
+    """Tests for loading the country table before async requests."""
+
+    def test_async_request_loads_table(self):
+        """Test that async requests load the table of the active language before the view."""
+        from djangocms_form_builder_countries.choices import _build_table
+        from djangocms_form_builder_countries.middleware import CountryTableMiddleware
+
+        async def view(request):
+            assert _build_table.cache_info().currsize == 1
+            return HttpResponse()
+
+        middleware = CountryTableMiddleware(view)
+
+        with translation.override("de"):
+            response = asyncio.run(middleware(RequestFactory().get("/")))
+
+        assert response.status_code == 200
+        assert asyncio.iscoroutinefunction(middleware)
+
+    def test_sync_request_is_passed_through(self):
+        """Test that sync requests do not load the table."""
+        from djangocms_form_builder_countries.choices import _build_table
+        from djangocms_form_builder_countries.middleware import CountryTableMiddleware
+
+        middleware = CountryTableMiddleware(lambda request: HttpResponse())
+
+        response = middleware(RequestFactory().get("/"))
+
+        assert response.status_code == 200
+        assert _build_table.cache_info().currsize == 0
@@ -0,0 +1,40 @@
+"""
+Tests for the data migrations.
+
+Tests that the countries_first normalization migration upgrades
+existing country field configs.
+"""
+
+from importlib import import_module
+from unittest.mock import Mock
+
+import pytest
+
+
+@pytest.mark.django_db
+class TestNormalizeCountriesFirstMigration:
+    """Tests for the 0002_normalize_countries_first migration."""
+
+    def test_normalizes_existing_configs(self):
+        """Test that unnormalized configs are upgraded and other plugins are left alone."""
+        from django.apps import apps
+        from djangocms_form_builder.models import FormField
+
+        from djangocms_form_builder_countries.constants import CONFIG_VERSION, CONFIG_VERSION_KEY
+
+        migration = import_module("djangocms_form_builder_countries.migrations.0002_normalize_countries_first")
+        legacy = FormField.objects.create(
+            plugin_type="CountryFieldPlugin", language="en", position=0, config={"countries_first": ["de", "AT", "DE"]}
+        )
+        empty = FormField.objects.create(plugin_type="CountryFieldPlugin", language="en", position=1, config={})
+        other = FormField.objects.create(
+            plugin_type="SelectPlugin", language="en", position=2, config={"countries_first": ["de"]}
+        )
+
+        migration.normalize_countries_first(apps, Mock(connection=Mock(alias="default")))
+
+        for field in (legacy, empty, other):
+            field.refresh_from_db()
+        assert legacy.config == {"countries_first": ["DE", "AT"], CONFIG_VERSION_KEY: CONFIG_VERSION}
+        assert empty.config == {"countries_first": [], CONFIG_VERSION_KEY: CONFIG_VERSION}
+        assert other.config == {"countries_first": ["de"]}
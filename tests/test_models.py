@@ -10,6 +10,7 @@ Tests the proxy model functionality including:
 
 from unittest.mock import Mock
 
+import pytest
 from django import forms
 
 
@@ -109,7 +110,7 @@ class TestCountryFieldModel:
         assert choices[1][0] == "AT"
         assert choices[2][0] == "CH"
         # Separator after priority countries
-        assert choices[3] == ("", "---")
+        assert choices[3] == ("---", "---")
 
     def test_countries_first_case_insensitive(self):
         """Test that country codes are matched case-insensitively."""
@@ -141,7 +142,7 @@ class TestCountryFieldModel:
         name, form_field = field.get_form_field()
 
         # Should not have separator
-        separator_count = sum(1 for c in form_field.choices if c == ("", "---"))
+        separator_count = sum(1 for c in form_field.choices if c == ("---", "---"))
         assert separator_count == 0
 
     def test_widget_class(self):
@@ -197,3 +198,301 @@ class TestCountryFieldModel:
         choice_codes = [c[0] for c in choices]
         assert "XX" not in choice_codes
         assert "ZZ" not in choice_codes
+
+    def test_form_field_validates_against_code_set(self):
+        """Test that the generated field validates codes via CountryChoiceField."""
+        from djangocms_form_builder_countries.fields import CountryChoiceField
+
+        field = self.create_country_field(
+            {
+                "field_label": "Country",
+                "field_required": True,
+                "countries_first": ["DE", "AT"],
+            }
+        )
+
+        name, form_field = field.get_form_field()
+
+        assert isinstance(form_field, CountryChoiceField)
+        assert form_field.clean("AT") == "AT"
+        assert not form_field.valid_value("")
+
+    def test_remote_mode_widget(self):
+        """Test that the remote mode only swaps the widget and keeps validation."""
+        from djangocms_form_builder_countries.widgets import RemoteCountrySelect
+
+        inline = self.create_country_field({"field_required": True})
+        remote = self.create_country_field({"field_required": True, "countries_mode": "remote"})
+
+        inline_name, inline_field = inline.get_form_field()
+        remote_name, remote_field = remote.get_form_field()
+
+        assert isinstance(remote_field.widget, RemoteCountrySelect)
+        assert remote_field.choices == inline_field.choices
+        assert remote_field.valid_codes == inline_field.valid_codes
+
+    def test_get_form_field_accepts_request(self):
+        """Test that the form builder can pass the request without falling back to the old API."""
+        field = self.create_country_field({"field_required": True})
+        from djangocms_form_builder_countries.models import CountryField
+
+        name, form_field = CountryField.get_form_field(field, request=Mock())
+
+        assert name == "country"
+
+
+class TestBuildFormFields:
+    """Tests for building the fields of several country fields at once."""
+
+    def create_instances(self, *configs):
+        """Create mock CountryField instances named country_0, country_1, ..."""
+        return [Mock(field_name=f"country_{i}", config=config) for i, config in enumerate(configs)]
+
+    def test_keeps_order(self):
+        """Test that fields are returned in the order of the instances."""
+        from djangocms_form_builder_countries.models import build_form_fields
+
+        instances = self.create_instances({}, {}, {"field_required": True})
+
+        assert [name for name, field in build_form_fields(instances)] == ["country_0", "country_1", "country_2"]
+
+    def test_identical_configurations_share_choices(self):
+        """Test that fields with the same configuration share one choice table and cache key."""
+        from djangocms_form_builder_countries.models import build_form_fields
+
+        billing, shipping, nationality = build_form_fields(
+            self.create_instances(
+                {"countries_first": ["DE", "AT"], "field_label": "Billing"},
+                {"countries_first": ["de", "AT"], "field_label": "Shipping"},
+                {"countries_first": ["FR"]},
+            )
+        )
+
+        assert billing[1].choices is shipping[1].choices
+        assert billing[1].widget.cache_key is shipping[1].widget.cache_key
+        assert billing[1].valid_codes is nationality[1].valid_codes
+        assert nationality[1].choices is not billing[1].choices
+        assert (billing[1].label, shipping[1].label) == ("Billing", "Shipping")
+        assert billing[1].widget is not shipping[1].widget
+
+    def test_resolves_each_configuration_once(self):
+        """Test that each distinct configuration is looked up once per batch."""
+        from unittest.mock import patch
+
+        from djangocms_form_builder_countries import choices, models
+
+        instances = self.create_instances(*[{"countries_first": ["DE"]}] * 4, {"field_required": True})
+
+        with patch.object(choices, "get_choices_for_key", wraps=choices.get_choices_for_key) as get_choices_for_key:
+            models.build_form_fields(instances)
+
+        assert get_choices_for_key.call_count == 2
+
+
+class TestLimitedCountries:
+    """Tests for fields limited to some countries."""
+
+    def test_field_offers_and_accepts_selected_countries(self):
+        """Test that the choices, the rendered options and the valid codes shrink together."""
+        from django.core.exceptions import ValidationError
+        from django.utils import translation
+
+        from djangocms_form_builder_countries.models import build_form_fields
+
+        instance = Mock(
+            field_name="country",
+            config={"countries_only": ["@DACH", "LI"], "countries_exclude": ["AT"], "field_required": True},
+        )
+        with translation.override("en"):
+            ((name, field),) = build_form_fields([instance])
+            html = field.widget.render(name, None)
+
+        assert [code for code, label in field.choices] == ["DE", "LI", "CH"]
+        assert field.valid_codes == {"CH", "DE", "LI"}
+        assert html.count("<option") == 3
+        assert field.clean("LI") == "LI"
+        with pytest.raises(ValidationError):
+            field.clean("AT")
+
+    def test_limited_fields_share_tables(self):
+        """Test that fields with the same limits share their choices and valid codes."""
+        from djangocms_form_builder_countries.models import build_form_fields
+
+        fields = build_form_fields(
+            [
+                Mock(field_name="billing", config={"countries_only": ["@EU"]}),
+                Mock(field_name="shipping", config={"countries_only": ["@EU"]}),
+                Mock(field_name="nationality", config={}),
+            ]
+        )
+        (_, billing), (_, shipping), (_, nationality) = fields
+
+        assert billing.choices is shipping.choices
+        assert billing.valid_codes is shipping.valid_codes
+        assert len(billing.valid_codes) == 27
+        assert len(nationality.valid_codes) > 200
+
+    def test_preselects_selectable_countries_only(self):
+        """Test that the client's country is only preselected if the field offers it."""
+        from unittest.mock import patch
+
+        from djangocms_form_builder_countries import geoip
+        from djangocms_form_builder_countries.models import build_form_fields
+
+        instances = [
+            Mock(field_name="eu", config={"countries_only": ["@EU"], "countries_preselect": True}),
+            Mock(field_name="dach", config={"countries_only": ["@DACH"], "countries_preselect": True}),
+        ]
+        with patch.object(geoip, "get_request_country", return_value="CH"):
+            fields = build_form_fields(instances, request=Mock())
+
+        assert [field.initial for name, field in fields] == [None, "CH"]
+
+
+@pytest.mark.django_db
+class TestFormQueries:
+    """Tests for the queries issued when building forms with country fields."""
+
+    @pytest.mark.parametrize("count", [1, 5, 20])
+    def test_form_build_issues_no_queries(self, count, django_assert_num_queries):
+        """Test that building and validating a form does not query per country field."""
+        from django.contrib.auth.models import AnonymousUser
+        from django.test import RequestFactory
+        from djangocms_form_builder.cms_plugins.ajax_plugins import FormPlugin
+        from djangocms_form_builder.models import Form
+
+        from djangocms_form_builder_countries.choices import _build_choices, clear_cache
+        from djangocms_form_builder_countries.models import CountryField
+
+        for i in range(count):
+            CountryField.objects.create(
+                plugin_type="CountryFieldPlugin",
+                language="en",
+                position=i,
+                config={"field_name": f"country_{i}", "countries_first": ["DE", "AT"] if i % 2 else []},
+            )
+        fields = list(CountryField.objects.all())
+        for field in fields:
+            field.child_plugin_instances = []
+        request = RequestFactory().post("/", {f"country_{i}": "DE" for i in range(count)})
+        request.user = AnonymousUser()
+        plugin = FormPlugin()
+        plugin.instance = Form(form_name="contact")
+        plugin.instance.child_plugin_instances = fields
+        plugin.request = request
+        clear_cache()
+
+        with django_assert_num_queries(0):
+            form_class = plugin.create_form_class_from_plugins()
+            form = form_class(request.POST, request=request)
+            assert form.is_valid(), form.errors
+
+        assert _build_choices.cache_info().misses == min(count, 2)
+
+    @pytest.mark.django_db
+    def test_form_build_resolves_each_configuration_once(self):
+        """Test that the plugins of one form resolve each distinct configuration once per request."""
+        from unittest.mock import patch
+
+        from django.contrib.auth.models import AnonymousUser
+        from django.test import RequestFactory
+        from djangocms_form_builder.cms_plugins.ajax_plugins import FormPlugin
+        from djangocms_form_builder.models import Form
+
+        from djangocms_form_builder_countries import choices
+        from djangocms_form_builder_countries.models import CountryField
+
+        fields = [
+            CountryField(config={"field_name": f"country_{i}", "countries_first": ["DE", "AT"] if i % 2 else []})
+            for i in range(6)
+        ]
+        for field in fields:
+            field.child_plugin_instances = []
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        plugin = FormPlugin()
+        plugin.instance = Form(form_name="contact")
+        plugin.instance.child_plugin_instances = fields
+        plugin.request = request
+
+        with patch.object(choices, "get_choices_for_key", wraps=choices.get_choices_for_key) as get_choices_for_key:
+            plugin.create_form_class_from_plugins()
+            plugin.create_form_class_from_plugins()
+
+        assert get_choices_for_key.call_count == 2
+
+
+class TestAsyncFormField:
+    """Tests for CountryField.aget_form_field."""
+
+    @pytest.mark.parametrize("language", ["en", "de"])
+    def test_same_field_as_sync(self, language):
+        """Test that the async path builds the same field as the sync path."""
+        import asyncio
+
+        from django.utils import translation
+
+        from djangocms_form_builder_countries.choices import clear_cache
+        from djangocms_form_builder_countries.models import CountryField
+
+        instance = CountryField(config={"field_name": "country", "field_label": "Land", "countries_first": ["AT"]})
+        clear_cache()
+
+        with translation.override(language):
+            name, field = asyncio.run(instance.aget_form_field(request=None))
+            sync_name, sync_field = instance.get_form_field()
+
+        assert name == sync_name
+        assert field.choices is sync_field.choices
+        assert field.widget.cache_key == sync_field.widget.cache_key
+        assert (field.label, field.required, field.valid_codes) == (
+            sync_field.label,
+            sync_field.required,
+            sync_field.valid_codes,
+        )
+
+    def test_build_form_fields(self):
+        """Test that abuild_form_fields returns the fields of build_form_fields."""
+        import asyncio
+
+        from djangocms_form_builder_countries.models import abuild_form_fields, build_form_fields
+
+        instances = [Mock(field_name=f"country_{i}", config={}) for i in range(3)]
+
+        fields = asyncio.run(abuild_form_fields(instances))
+
+        assert [(name, field.choices) for name, field in fields] == [
+            (name, field.choices) for name, field in build_form_fields(instances)
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_shared_choices_in_database_cache(self, settings, monkeypatch):
+        """Test that shared choices are read from a database cache without blocking the event loop."""
+        import asyncio
+
+        from django.core.cache import caches
+        from django.core.management import call_command
+
+        from djangocms_form_builder_countries import choices
+        from djangocms_form_builder_countries.models import CountryField
+
+        settings.CACHES = {
+            **settings.CACHES,
+            "countries": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "countries_cache"},
+        }
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_CACHE = "countries"
+        call_command("createcachetable")
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_SHARED_CHOICES = True
+        monkeypatch.setattr(choices, "VERSION_CHECK_INTERVAL", 0)
+        instance = CountryField(config={"field_name": "c", "countries_first": ["DE"]})
+
+        stored = asyncio.run(instance.aget_form_field())[1].choices
+        # A new process reads the table and order stored by the first one
+        choices.clear_cache()
+        choices._version.update(version=None, checked=None)
+        read = asyncio.run(instance.aget_form_field())[1].choices
+
+        assert read is not stored
+        assert tuple(read) == tuple(stored)
+        assert read[1] == ("DE", "Germany")
+        assert caches["countries"].get(choices.get_choices_cache_key(("en", ("DE",), None))) == read.order
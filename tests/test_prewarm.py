@@ -0,0 +1,222 @@
+"""
+Tests for prewarming the country choice tables.
+
+Tests the Django cache tier of the choice tables, the
+warm_country_choices management command and the startup hook.
+"""
+
+from io import StringIO
+from unittest.mock import Mock
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+def create_country_field(config):
+    """Create a CountryField plugin with the given config."""
+    from djangocms_form_builder_countries.models import CountryField
+
+    return CountryField.objects.create(plugin_type="CountryFieldPlugin", language="en", position=0, config=config)
+
+
+class TestDjangoCacheTier:
+    """Tests for sharing choice tables through the Django cache."""
+
+    def test_built_tables_are_stored(self):
+        """Test that built country tables are written to the Django cache."""
+        from django.core.cache import cache
+
+        from djangocms_form_builder_countries.choices import get_cache_key, get_country_table
+
+        table = get_country_table("de")
+
+        assert cache.get(get_cache_key("de")).choices == table.choices
+
+    def test_stored_tables_are_reused(self, monkeypatch):
+        """Test that a process with an empty memo reads stored tables instead of building them."""
+        from djangocms_form_builder_countries import choices
+
+        table = choices.get_country_choices(["AT"])
+        choices._build_choices.cache_clear()
+        choices._build_table.cache_clear()
+        monkeypatch.setattr(choices, "build_country_table", Mock(side_effect=AssertionError("table was rebuilt")))
+
+        assert choices.get_country_choices(["AT"]) == table
+
+    def test_cache_key_depends_on_countries_settings(self):
+        """Test that tables stored for another country list are not read."""
+        from django.test import override_settings
+
+        from djangocms_form_builder_countries.choices import get_cache_key
+
+        before = get_cache_key("en")
+        with override_settings(COUNTRIES_ONLY=["DE", "AT"]):
+            assert get_cache_key("en") != before
+        assert get_cache_key("en") == before
+
+    def test_cache_key_does_not_depend_on_active_language(self, settings):
+        """Test that lazily translated settings give the same keys whichever language computes them first."""
+        from django.utils import translation
+        from django.utils.translation import gettext_lazy
+
+        from djangocms_form_builder_countries import choices
+
+        settings.COUNTRIES_OVERRIDE = {"DE": gettext_lazy("Germany")}
+        keys = []
+        for language in ("en", "de"):
+            choices.get_countries_fingerprint.cache_clear()
+            with translation.override(language):
+                keys.append(choices.get_cache_key("fr"))
+
+        assert keys[0] == keys[1]
+
+    def test_configured_cache_alias(self, settings):
+        """Test that the cache alias is taken from the settings."""
+        from django.core.cache import caches
+
+        from djangocms_form_builder_countries.choices import get_cache
+
+        settings.CACHES = {
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "countries": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+        }
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_CACHE = "countries"
+
+        assert get_cache() is caches["countries"]
+
+
+@pytest.mark.django_db
+class TestFieldConfigurations:
+    """Tests for collecting the configurations of existing plugins."""
+
+    def test_includes_defaults(self):
+        """Test that fields without countries_first are always covered."""
+        from djangocms_form_builder_countries.prewarm import get_field_configurations
+
+        assert get_field_configurations() == [((), False, "", None), ((), True, "", None)]
+
+    def test_distinct_plugin_configurations(self):
+        """Test that plugin configurations are normalized and de-duplicated."""
+        from djangocms_form_builder_countries.prewarm import get_field_configurations
+
+        create_country_field({"countries_first": ["de", "AT"], "field_required": True})
+        create_country_field({"countries_first": ["DE", "AT"], "field_required": True})
+        create_country_field({"countries_first": ["CH"], "field_placeholder": "Pick one"})
+
+        assert get_field_configurations() == [
+            ((), False, "", None),
+            ((), True, "", None),
+            (("CH",), False, "Pick one", None),
+            (("DE", "AT"), True, "", None),
+        ]
+
+    def test_limited_plugin_configurations(self):
+        """Test that the countries of limited fields are part of their configuration."""
+        from djangocms_form_builder_countries.prewarm import get_field_configurations
+
+        create_country_field({"countries_only": ["@DACH", "LI"], "countries_exclude": ["at"]})
+
+        assert get_field_configurations()[1] == ((), False, "", ("CH", "DE", "LI"))
+
+
+@pytest.mark.django_db
+class TestWarmCountryChoicesCommand:
+    """Tests for the warm_country_choices management command."""
+
+    def test_stores_tables_for_all_languages(self):
+        """Test that the country table of every language is stored in the cache."""
+        from django.core.cache import cache
+
+        from djangocms_form_builder_countries.choices import get_cache_key
+
+        create_country_field({"countries_first": ["DE", "AT", "CH"]})
+        stdout = StringIO()
+
+        call_command("warm_country_choices", stdout=stdout)
+
+        assert (
+            "Stored the country tables of 2 language(s) in cache 'default' and prewarmed 6 choice tables."
+            in stdout.getvalue()
+        )
+        assert dict(cache.get(get_cache_key("en")).choices)["DE"] == "Germany"
+        assert dict(cache.get(get_cache_key("de")).choices)["DE"] == "Deutschland"
+
+    def test_warms_in_process_caches(self):
+        """Test that the command process also keeps the tables and rendered options."""
+        from djangocms_form_builder_countries.choices import _build_choices, _build_table
+        from djangocms_form_builder_countries.widgets import get_rendered_options
+
+        call_command("warm_country_choices", stdout=StringIO())
+
+        assert _build_table.cache_info().currsize == 2
+        assert _build_choices.cache_info().currsize == 4
+        assert get_rendered_options.cache_info().currsize == 4
+
+    def test_overwrites_stored_tables(self):
+        """Test that stale tables in the cache are replaced."""
+        from django.core.cache import cache
+
+        from djangocms_form_builder_countries.choices import CountryTable, get_cache_key
+
+        cache.set(get_cache_key("en"), CountryTable([("XX", "Stale")]))
+
+        call_command("warm_country_choices", language=["en"], stdout=StringIO())
+
+        assert "XX" not in cache.get(get_cache_key("en")).positions
+
+    def test_single_language(self):
+        """Test that --language restricts the warmed languages."""
+        stdout = StringIO()
+
+        call_command("warm_country_choices", language=["de"], stdout=stdout)
+
+        assert "Stored the country tables of 1 language(s)" in stdout.getvalue()
+
+    def test_unknown_language(self):
+        """Test that languages missing from LANGUAGES are rejected."""
+        with pytest.raises(CommandError, match="Unknown language"):
+            call_command("warm_country_choices", language=["xx"], stdout=StringIO())
+
+
+class TestStartupHook:
+    """Tests for prewarming on startup."""
+
+    def test_disabled_by_default(self, monkeypatch):
+        """Test that ready() does not prewarm without the setting."""
+        from django.apps import apps
+
+        from djangocms_form_builder_countries import prewarm
+
+        started = Mock()
+        monkeypatch.setattr(prewarm, "prewarm_in_background", started)
+
+        apps.get_app_config("djangocms_form_builder_countries").ready()
+
+        started.assert_not_called()
+
+    def test_enabled_by_setting(self, monkeypatch, settings):
+        """Test that ready() starts prewarming when enabled."""
+        from django.apps import apps
+
+        from djangocms_form_builder_countries import prewarm
+
+        settings.DJANGOCMS_FORM_BUILDER_COUNTRIES_PREWARM = True
+        started = Mock()
+        monkeypatch.setattr(prewarm, "prewarm_in_background", started)
+
+        apps.get_app_config("djangocms_form_builder_countries").ready()
+
+        started.assert_called_once_with()
+
+    def test_background_prewarm_without_plugin_table(self, monkeypatch):
+        """Test that the default configurations are prewarmed if the database is not ready."""
+        from django.db import DatabaseError
+
+        from djangocms_form_builder_countries import prewarm
+        from djangocms_form_builder_countries.widgets import get_rendered_options
+
+        monkeypatch.setattr(prewarm, "get_field_configurations", Mock(side_effect=DatabaseError))
+
+        prewarm.prewarm_in_background().join()
+
+        assert get_rendered_options.cache_info().currsize == 4
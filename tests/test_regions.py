@@ -0,0 +1,52 @@
+"""
+Tests for the built-in region presets.
+"""
+
+import pytest
+
+
+class TestRegions:
+    """Tests for the region tables."""
+
+    def test_tables(self):
+        """Test the size and nesting of the region tables."""
+        from djangocms_form_builder_countries.regions import DACH, EEA, EU
+
+        assert len(EU) == 27
+        assert EEA - EU == {"IS", "LI", "NO"}
+        assert DACH - EU == {"CH"}
+
+    def test_codes_are_countries(self):
+        """Test that all regions consist of known country codes."""
+        from django_countries.data import COUNTRIES
+
+        from djangocms_form_builder_countries.regions import REGIONS
+
+        for _label, codes in REGIONS.values():
+            assert codes <= COUNTRIES.keys()
+
+    def test_region_choices(self):
+        """Test that regions are offered with prefixed values."""
+        from djangocms_form_builder_countries.regions import get_region_choices
+
+        assert [value for value, label in get_region_choices()] == ["@EU", "@EEA", "@DACH"]
+
+
+class TestExpandCodes:
+    """Tests for expanding regions into country codes."""
+
+    @pytest.mark.parametrize(
+        "codes, expected",
+        [
+            ((), set()),
+            (("DE", "FR"), {"DE", "FR"}),
+            (("@DACH", "LI"), {"AT", "CH", "DE", "LI"}),
+            (("@DACH", "DE"), {"AT", "CH", "DE"}),
+            (("@XX",), set()),
+        ],
+    )
+    def test_expand(self, codes, expected):
+        """Test that regions are replaced by their countries."""
+        from djangocms_form_builder_countries.regions import expand_codes
+
+        assert expand_codes(codes) == expected
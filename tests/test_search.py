@@ -0,0 +1,148 @@
+"""
+Tests for the country prefix search.
+
+Tests the per-language search index and its ordering rules.
+"""
+
+import pytest
+from django.utils import translation
+
+
+class TestNormalizeText:
+    """Tests for search key normalization."""
+
+    @pytest.mark.parametrize(
+        "text, key",
+        [
+            ("Österreich", "osterreich"),
+            ("Türkiye", "turkiye"),
+            ("Côte d'Ivoire", "cote divoire"),
+            ("Côte d’Ivoire", "cote divoire"),
+            ("Åland Islands", "aland islands"),
+            ("Færøerne", "faeroerne"),
+            ("Guinea-Bissau", "guinea bissau"),
+            ("Korea (the Republic of)", "korea the republic of"),
+        ],
+    )
+    def test_normalize_text(self, text, key):
+        """Test that keys are casefolded, transliterated and stripped of accents and punctuation."""
+        from djangocms_form_builder_countries.search import normalize_text
+
+        assert normalize_text(text) == key
+
+    def test_search_keys_include_umlaut_transliteration_and_words(self):
+        """Test that names are indexed with German transliteration and from each word on."""
+        from djangocms_form_builder_countries.search import get_search_keys
+
+        assert get_search_keys("Vereinigte Staaten") == {"vereinigte staaten", "staaten"}
+        assert get_search_keys("Österreich") == {"osterreich", "oesterreich"}
+
+
+class TestCountrySearchIndex:
+    """Tests for CountrySearchIndex."""
+
+    def test_prefix_lookup(self):
+        """Test that all names starting with the prefix are found."""
+        from djangocms_form_builder_countries.search import CountrySearchIndex
+
+        index = CountrySearchIndex([("DE", "Germany"), ("GE", "Georgia"), ("GH", "Ghana"), ("AT", "Austria")])
+
+        assert set(index.lookup("Ger")) == {"DE"}
+        assert set(index.lookup("ge")) == {"DE", "GE"}
+        assert index.lookup("x") == {}
+
+    def test_results_follow_display_order(self):
+        """Test that matches keep the order of the choice table."""
+        from djangocms_form_builder_countries.search import CountrySearchIndex
+
+        index = CountrySearchIndex([("BB", "Barbados"), ("BH", "Bahrain"), ("BS", "Bahamas")])
+
+        assert [code for code, name in index.search("ba")] == ["BB", "BH", "BS"]
+
+    def test_alternate_names(self):
+        """Test that alternate names are searchable and results show the display name."""
+        from djangocms_form_builder_countries.search import CountrySearchIndex
+
+        index = CountrySearchIndex([("DE", "Deutschland")], {"DE": ["Germany", "DEU"]})
+
+        assert index.search("germ") == [("DE", "Deutschland")]
+        assert index.search("deu") == [("DE", "Deutschland")]
+        assert index.search("de") == [("DE", "Deutschland")]
+
+    def test_exact_matches_ranked_before_prefix_matches(self):
+        """Test that an exact code match comes before names starting with the query."""
+        from djangocms_form_builder_countries.search import search_countries
+
+        results = search_countries("de", language="en")
+
+        assert results[0] == ("DE", "Germany")
+
+    @pytest.mark.parametrize(
+        "query, language, code",
+        [
+            ("Osterreich", "de", "AT"),
+            ("Oesterreich", "de", "AT"),
+            ("Turkiye", "en", "TR"),
+            ("Turkei", "de", "TR"),
+            ("Cote d'Ivoire", "en", "CI"),
+            ("cote divoire", "de", "CI"),
+            ("Austria", "de", "AT"),
+            ("AUT", "de", "AT"),
+            ("states", "en", "US"),
+        ],
+    )
+    def test_accent_and_transliteration_insensitive(self, query, language, code):
+        """Test that queries without accents, in English or as ISO codes find the country."""
+        from djangocms_form_builder_countries.search import search_countries
+
+        assert code in [result for result, name in search_countries(query, language=language)]
+
+    def test_countries_first_ranked_first(self):
+        """Test that countries_first matches come first in their configured order."""
+        from djangocms_form_builder_countries.search import search_countries
+
+        with translation.override("en"):
+            results = search_countries("a", countries_first=["AT", "au"])
+
+        assert [code for code, name in results[:2]] == ["AT", "AU"]
+        assert ("AF", "Afghanistan") in results
+
+    def test_empty_prefix_returns_countries_first(self):
+        """Test that an empty query suggests the priority countries."""
+        from djangocms_form_builder_countries.search import search_countries
+
+        with translation.override("en"):
+            results = search_countries("", countries_first=["DE", "AT", "XX"])
+
+        assert results == [("DE", "Germany"), ("AT", "Austria")]
+
+    def test_limit(self):
+        """Test that the number of results is limited."""
+        from djangocms_form_builder_countries.search import search_countries
+
+        assert len(search_countries("s", limit=3)) == 3
+
+    def test_index_per_language(self):
+        """Test that names are searched in the requested language."""
+        from djangocms_form_builder_countries.search import search_countries
+
+        assert search_countries("deutsch", language="de") == [("DE", "Deutschland")]
+        assert search_countries("deutsch", language="en") == []
+
+    def test_uses_same_data_as_select(self):
+        """Test that the index holds exactly the countries of the select."""
+        from djangocms_form_builder_countries.choices import get_country_choices
+        from djangocms_form_builder_countries.search import get_search_index
+
+        with translation.override("en"):
+            assert get_search_index().names == dict(get_country_choices(required=True))
+
+    def test_clear_cache_drops_indexes(self):
+        """Test that clearing the choice tables also rebuilds the index."""
+        from djangocms_form_builder_countries.choices import clear_cache
+        from djangocms_form_builder_countries.search import get_search_index
+
+        index = get_search_index("en")
+        clear_cache()
+
+        assert get_search_index("en") is not index
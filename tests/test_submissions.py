@@ -0,0 +1,221 @@
+"""
+Tests for counting form submissions per country.
+
+Tests finding the country fields of forms, streaming and counting the
+submitted countries, the country_submissions management command and the
+admin view.
+"""
+
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from tests.conftest import add_entries
+
+pytestmark = pytest.mark.django_db
+
+
+def add_form(placeholder, form_name, *field_names):
+    """Add a form with country fields of the given names."""
+    from cms.api import add_plugin
+
+    form = add_plugin(placeholder, "FormPlugin", "en", form_name=form_name)
+    for field_name in field_names:
+        add_plugin(placeholder, "CountryFieldPlugin", "en", target=form, config={"field_name": field_name})
+    return form
+
+
+class TestCountryFields:
+    """Tests for finding the country fields of forms."""
+
+    def test_fields_per_form(self, placeholder):
+        """Test that country fields are mapped to the names of their forms."""
+        from djangocms_form_builder_countries.submissions import get_country_fields
+
+        add_form(placeholder, "contact", "country")
+        add_form(placeholder, "shipping", "billing_country", "shipping_country")
+
+        assert get_country_fields() == {
+            "contact": {"country"},
+            "shipping": {"billing_country", "shipping_country"},
+        }
+        assert get_country_fields(["contact"]) == {"contact": {"country"}}
+
+    def test_nested_fields_and_plugin_types(self, placeholder):
+        """Test that fields nested in other plugins are found, separated by plugin type."""
+        from cms.api import add_plugin
+
+        from djangocms_form_builder_countries.submissions import get_all_country_fields
+
+        form = add_form(placeholder, "contact", "country")
+        row = add_plugin(placeholder, "FormPlugin", "en", target=form, form_name="")
+        add_plugin(placeholder, "CountryMultiFieldPlugin", "en", target=row, config={"field_name": "markets"})
+        add_plugin(placeholder, "CountryFieldPlugin", "en", config={"field_name": "outside"})
+
+        assert get_all_country_fields() == {
+            "CountryFieldPlugin": {"contact": {"country"}},
+            "CountryMultiFieldPlugin": {"contact": {"markets"}},
+        }
+
+    @pytest.mark.parametrize("count", [1, 5])
+    def test_queries_do_not_grow_with_fields(self, placeholder, count, django_assert_num_queries):
+        """Test that the fields of all forms are read with two queries."""
+        from djangocms_form_builder_countries.submissions import get_all_country_fields
+
+        for i in range(count):
+            add_form(placeholder, f"form_{i}", "billing_country", "shipping_country")
+
+        with django_assert_num_queries(2):
+            fields = get_all_country_fields()
+
+        assert len(fields["CountryFieldPlugin"]) == count
+
+
+class TestCountSubmissions:
+    """Tests for counting the submitted countries."""
+
+    def test_counts_country_fields_only(self, placeholder):
+        """Test that only values of country fields of forms with country fields are counted."""
+        from djangocms_form_builder_countries.submissions import count_submissions
+
+        add_form(placeholder, "contact", "country")
+        add_entries(
+            "contact",
+            {"country": "DE", "name": "Anna"},
+            {"country": "AT"},
+            {"country": "DE"},
+            {"country": ""},
+            {"name": "No country"},
+        )
+        add_entries("other", {"country": "FR"})
+
+        assert count_submissions() == {"DE": 2, "AT": 1}
+
+    def test_several_fields_and_forms(self, placeholder):
+        """Test that every country field of an entry is counted."""
+        from djangocms_form_builder_countries.submissions import count_submissions
+
+        add_form(placeholder, "contact", "country")
+        add_form(placeholder, "shipping", "billing_country", "shipping_country")
+        add_entries("contact", {"country": "CH"})
+        add_entries("shipping", {"billing_country": "CH", "shipping_country": "DE"})
+
+        assert count_submissions() == {"CH": 2, "DE": 1}
+        assert count_submissions(["shipping"]) == {"CH": 1, "DE": 1}
+
+    def test_names_and_order(self, placeholder):
+        """Test that countries are named in the active language, most submitted first."""
+        from django.utils.translation import override
+
+        from djangocms_form_builder_countries.submissions import get_submissions_per_country
+
+        add_form(placeholder, "contact", "country")
+        add_entries("contact", {"country": "AT"}, {"country": "DE"}, {"country": "DE"}, {"country": "XX"})
+
+        with override("de"):
+            rows = get_submissions_per_country()
+
+        assert rows == [("DE", "Deutschland", 2), ("AT", "Österreich", 1), ("XX", "XX", 1)]
+
+    def test_streams_entries(self, placeholder):
+        """Test that the memory peak does not grow with the number of entries."""
+        import tracemalloc
+
+        from djangocms_form_builder_countries.submissions import count_submissions
+
+        add_form(placeholder, "contact", "country")
+
+        def peak(entries):
+            add_entries("contact", *({"country": "DE", "message": "x" * 500} for _ in range(entries)))
+            tracemalloc.start()
+            try:
+                count_submissions(chunk_size=100)
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        small = peak(200)
+        large = peak(2000)
+
+        assert large < small * 1.5
+
+
+class TestCountrySubmissionsCommand:
+    """Tests for the country_submissions management command."""
+
+    def test_writes_csv(self, placeholder):
+        """Test that the counts are written as CSV."""
+        add_form(placeholder, "contact", "country")
+        add_entries("contact", {"country": "DE"}, {"country": "AT"}, {"country": "DE"})
+        stdout = StringIO()
+
+        call_command("country_submissions", "--form-name", "contact", stdout=stdout)
+
+        assert stdout.getvalue().splitlines() == ["code,country,submissions", "DE,Germany,2", "AT,Austria,1"]
+
+    def test_invalid_chunk_size(self):
+        """Test that the chunk size must be positive."""
+        with pytest.raises(CommandError, match="--chunk-size"):
+            call_command("country_submissions", "--chunk-size", "0", stdout=StringIO())
+
+
+class TestAdminView:
+    """Tests for the submissions per country admin view."""
+
+    def test_renders_counts(self, placeholder, admin_client):
+        """Test that the change list shows the submissions per country."""
+        from django.urls import reverse
+
+        add_form(placeholder, "contact", "country")
+        add_entries("contact", {"country": "DE"}, {"country": "DE"})
+
+        response = admin_client.get(reverse("admin:djangocms_form_builder_countries_countrysubmission_changelist"))
+
+        assert response.status_code == 200
+        assert response.context["rows"] == [("DE", "Germany", 2)]
+        assert response.context["form_names"] == ["contact"]
+        assert b"Germany" in response.content
+
+    def test_filters_by_form(self, placeholder, admin_client):
+        """Test that ?form_name= restricts the counted forms."""
+        from django.urls import reverse
+
+        add_form(placeholder, "contact", "country")
+        add_form(placeholder, "shipping", "country")
+        add_entries("contact", {"country": "DE"})
+        add_entries("shipping", {"country": "AT"})
+
+        url = reverse("admin:djangocms_form_builder_countries_countrysubmission_changelist")
+        response = admin_client.get(url, {"form_name": "shipping"})
+
+        assert response.context["rows"] == [("AT", "Austria", 1)]
+
+    def test_queries_do_not_grow_with_forms(self, placeholder, admin_client):
+        """Test that the change list reads the country fields once, whatever the number of forms."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.urls import reverse
+
+        url = reverse("admin:djangocms_form_builder_countries_countrysubmission_changelist")
+        admin_client.get(url)
+        queries = []
+        for i in range(3):
+            add_form(placeholder, f"form_{i}", "country")
+            add_entries(f"form_{i}", {"country": "DE"})
+            with CaptureQueriesContext(connection) as context:
+                admin_client.get(url)
+            queries.append(len(context))
+
+        assert queries[0] == queries[1] == queries[2]
+
+    def test_requires_permission(self, client, django_user_model):
+        """Test that staff users without permission cannot see the counts."""
+        from django.urls import reverse
+
+        user = django_user_model.objects.create_user("staff", password="secret", is_staff=True)
+        client.force_login(user)
+
+        response = client.get(reverse("admin:djangocms_form_builder_countries_countrysubmission_changelist"))
+
+        assert response.status_code == 403
@@ -0,0 +1,181 @@
+"""
+Tests for the update_countries_first management command.
+
+Tests selecting country fields by page, placeholder, language and
+current configuration, the set/add/remove operations, batching, the
+dry-run mode and cache invalidation.
+"""
+
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import CommandError, call_command
+
+pytestmark = pytest.mark.django_db
+
+COMMAND = "djangocms_form_builder_countries.management.commands.update_countries_first"
+
+
+def add_country_field(placeholder, countries_first, language="en"):
+    """Add a country field plugin with the given countries_first."""
+    from cms.api import add_plugin
+
+    return add_plugin(placeholder, "CountryFieldPlugin", language, config={"countries_first": countries_first})
+
+
+def get_countries_first(plugin):
+    """Return the stored countries_first of a plugin."""
+    plugin.refresh_from_db()
+    return plugin.config["countries_first"]
+
+
+def update(*args, **options):
+    """Run the command and return its output."""
+    stdout = StringIO()
+    call_command("update_countries_first", *args, stdout=stdout, **options)
+    return stdout.getvalue()
+
+
+class TestOperations:
+    """Tests for rewriting countries_first."""
+
+    def test_add(self, placeholder):
+        """Test that --add appends codes that are not in the list yet."""
+        dach = add_country_field(placeholder, ["DE", "AT", "CH"])
+        liechtenstein = add_country_field(placeholder, ["CH", "LI"])
+
+        output = update("--add", "li")
+
+        assert get_countries_first(dach) == ["DE", "AT", "CH", "LI"]
+        assert get_countries_first(liechtenstein) == ["CH", "LI"]
+        assert "Updated 1 country field." in output
+
+    def test_set(self, placeholder):
+        """Test that --set replaces the list."""
+        field = add_country_field(placeholder, ["DE"])
+
+        update("--set", "FR, be")
+
+        assert get_countries_first(field) == ["FR", "BE"]
+
+    def test_remove(self, placeholder):
+        """Test that --remove drops codes from the list."""
+        field = add_country_field(placeholder, ["DE", "AT", "CH"])
+
+        update("--remove", "AT")
+
+        assert get_countries_first(field) == ["DE", "CH"]
+
+    def test_unknown_code(self, placeholder):
+        """Test that unknown country codes are rejected."""
+        with pytest.raises(CommandError, match="Unknown country code"):
+            update("--add", "XX")
+
+    def test_operation_required(self):
+        """Test that exactly one operation has to be given."""
+        with pytest.raises(CommandError):
+            update()
+
+
+class TestSelection:
+    """Tests for selecting the fields to update."""
+
+    def test_by_current_configuration(self, placeholder):
+        """Test that --countries-first only matches fields with that list."""
+        dach = add_country_field(placeholder, ["de", "AT", "CH"])
+        germany = add_country_field(placeholder, ["DE"])
+
+        update("--countries-first", "DE,AT,CH", "--add", "LI")
+
+        assert get_countries_first(dach) == ["DE", "AT", "CH", "LI"]
+        assert get_countries_first(germany) == ["DE"]
+
+    def test_by_page(self, placeholder):
+        """Test that --page only matches fields on that page."""
+        from cms.api import create_page
+        from cms.models import PageContent
+
+        other_page = create_page("Other", "base.html", "en")
+        other_placeholder = (
+            PageContent.admin_manager.get(page=other_page, language="en").get_placeholders().get(slot="content")
+        )
+        field = add_country_field(placeholder, ["DE"])
+        other = add_country_field(other_placeholder, ["DE"])
+
+        update("--page", str(placeholder.page.pk), "--add", "AT")
+
+        assert get_countries_first(field) == ["DE", "AT"]
+        assert get_countries_first(other) == ["DE"]
+
+    def test_by_placeholder_and_language(self, placeholder):
+        """Test that --placeholder and --language narrow the selection."""
+        english = add_country_field(placeholder, ["DE"], language="en")
+        german = add_country_field(placeholder, ["DE"], language="de")
+
+        update("--placeholder", str(placeholder.pk), "--language", "de", "--add", "AT")
+
+        assert get_countries_first(english) == ["DE"]
+        assert get_countries_first(german) == ["DE", "AT"]
+
+
+class TestBatching:
+    """Tests for batched updates."""
+
+    def test_updates_in_batches(self, placeholder):
+        """Test that all fields are updated with one bulk update per batch."""
+        from djangocms_form_builder_countries.models import CountryField
+
+        fields = [add_country_field(placeholder, ["DE"]) for _ in range(5)]
+
+        with patch.object(CountryField.objects, "bulk_update", wraps=CountryField.objects.bulk_update) as bulk_update:
+            update("--add", "AT", "--batch-size", "2")
+
+        assert [len(call.args[0]) for call in bulk_update.call_args_list] == [2, 2, 1]
+        assert all(get_countries_first(field) == ["DE", "AT"] for field in fields)
+
+    def test_invalid_batch_size(self):
+        """Test that the batch size must be positive."""
+        with pytest.raises(CommandError, match="--batch-size"):
+            update("--add", "AT", "--batch-size", "0")
+
+    def test_dry_run(self, placeholder):
+        """Test that --dry-run reports changes without saving them."""
+        field = add_country_field(placeholder, ["DE"])
+
+        output = update("--add", "AT", "--dry-run", verbosity=2)
+
+        assert f"Field {field.pk} (en): DE -> DE,AT" in output
+        assert "Would update 1 country field." in output
+        assert get_countries_first(field) == ["DE"]
+
+
+class TestCacheInvalidation:
+    """Tests for invalidating derived caches."""
+
+    def test_invalidates_once(self, placeholder):
+        """Test that choice and CMS caches are invalidated once after all batches."""
+        for _ in range(3):
+            add_country_field(placeholder, ["DE"])
+
+        with (
+            patch(f"{COMMAND}.invalidate_choices") as invalidate_choices,
+            patch(f"{COMMAND}.invalidate_cms_page_cache") as invalidate_page_cache,
+            patch(f"{COMMAND}.clear_placeholder_cache") as clear_placeholder_cache,
+        ):
+            update("--add", "AT", "--batch-size", "1")
+
+        invalidate_choices.assert_called_once_with()
+        invalidate_page_cache.assert_called_once_with()
+        clear_placeholder_cache.assert_called_once()
+        assert clear_placeholder_cache.call_args.args[:2] == (placeholder, "en")
+
+    def test_no_invalidation_without_changes(self, placeholder):
+        """Test that caches are kept when no field changed."""
+        add_country_field(placeholder, ["DE", "AT"])
+
+        with patch(f"{COMMAND}.invalidate_choices") as invalidate_choices:
+            output = update("--add", "AT")
+
+        invalidate_choices.assert_not_called()
+        assert "Updated 0 country fields." in output
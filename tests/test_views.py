@@ -0,0 +1,69 @@
+"""
+Tests for the country search endpoint.
+"""
+
+import json
+
+import pytest
+from django.test import RequestFactory
+from django.urls import reverse
+
+
+@pytest.fixture
+def search():
+    """Call the country search view with query parameters."""
+    from djangocms_form_builder_countries.views import country_search
+
+    def get(**params):
+        request = RequestFactory().get(reverse("djangocms_form_builder_countries:search"), params)
+        response = country_search(request)
+        assert response.status_code == 200
+        return json.loads(response.content)["results"]
+
+    return get
+
+
+class TestCountrySearchView:
+    """Tests for the country_search view."""
+
+    def test_returns_matches(self, search):
+        """Test that matching countries are returned as code and name."""
+        results = search(q="switz", language="en")
+
+        assert results == [{"code": "CH", "name": "Switzerland"}]
+
+    def test_honors_countries_first(self, search):
+        """Test that priority countries are ranked first."""
+        results = search(q="a", first="AT,AU", language="en")
+
+        assert [result["code"] for result in results[:2]] == ["AT", "AU"]
+
+    def test_language_parameter(self, search):
+        """Test that names are returned in the requested language."""
+        assert search(q="schweiz", language="de") == [{"code": "CH", "name": "Schweiz"}]
+
+    def test_unknown_language_uses_active_language(self, search):
+        """Test that languages outside LANGUAGES are ignored."""
+        assert search(q="switz", language="xx") == [{"code": "CH", "name": "Switzerland"}]
+
+    def test_limit_is_bounded(self, search):
+        """Test that the limit is clamped and invalid values fall back to the default."""
+        from djangocms_form_builder_countries.constants import SEARCH_LIMIT, SEARCH_MAX_LIMIT
+
+        assert len(search(q="", first=",".join(["DE", "AT", "CH"]), limit="1")) == 1
+        assert len(search(q="s", limit="1000", language="en")) <= SEARCH_MAX_LIMIT
+        assert len(search(q="s", limit="many", language="en")) == SEARCH_LIMIT
+
+    def test_limits_countries(self, search):
+        """Test that results are limited to the countries parameter."""
+        assert search(q="s", countries="CH,DE", language="de") == [{"code": "CH", "name": "Schweiz"}]
+        assert search(q="", first="DE,FR", countries="DE,AT", language="en") == [{"code": "DE", "name": "Germany"}]
+        assert search(q="switz", countries="", language="en") == []
+
+    def test_rejects_post(self):
+        """Test that only GET requests are answered."""
+        from djangocms_form_builder_countries.views import country_search
+
+        request = RequestFactory().post("/countries/search/")
+
+        assert country_search(request).status_code == 405
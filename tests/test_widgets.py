@@ -0,0 +1,222 @@
+"""
+Tests for the country select widget.
+
+Tests that CachedCountrySelect renders the same markup as Django's
+Select widget while reusing pre-rendered option fragments.
+"""
+
+import pytest
+from django import forms
+from django.template import Context, Template
+from django.utils import translation
+
+
+def create_widget(countries_first=(), required=True, placeholder=""):
+    """Create a cached widget for a configuration in the active language."""
+    from djangocms_form_builder_countries.choices import get_choices_for_key, get_choices_key
+    from djangocms_form_builder_countries.widgets import CachedCountrySelect
+
+    key = get_choices_key(countries_first, required, placeholder)
+    return CachedCountrySelect(choices=get_choices_for_key(key), cache_key=key)
+
+
+class TestCachedCountrySelect:
+    """Tests for CachedCountrySelect rendering."""
+
+    @pytest.mark.parametrize("value", [None, "", "DE", "CH", "XX"])
+    def test_matches_select_markup(self, value):
+        """Test that the output is identical to forms.Select for configurations without separator."""
+        widget = create_widget(required=False)
+        reference = forms.Select(choices=widget.choices)
+
+        assert widget.render("country", value, attrs={"id": "id_country"}) == reference.render(
+            "country", value, attrs={"id": "id_country"}
+        )
+
+    def test_marks_bound_value_selected(self):
+        """Test that exactly the bound value is selected."""
+        widget = create_widget()
+
+        html = widget.render("country", "AT")
+
+        assert '<option value="AT" selected>Austria</option>' in html
+        assert html.count(" selected") == 1
+
+    def test_unknown_value_selects_nothing(self):
+        """Test that values outside the choices leave all options unselected."""
+        widget = create_widget()
+
+        assert " selected" not in widget.render("country", "XX")
+
+    def test_separator_is_disabled(self):
+        """Test that the separator cannot be picked in the browser."""
+        widget = create_widget(countries_first=["DE", "AT"], required=False)
+
+        html = widget.render("country", None)
+
+        assert '<option value="" selected>Select a country</option>' in html
+        assert '<option value="---" disabled>---</option>' in html
+
+    def test_separator_matches_select_markup_otherwise(self):
+        """Test that apart from the disabled separator the output equals forms.Select."""
+        widget = create_widget(countries_first=["DE", "AT"], required=False)
+        reference = forms.Select(choices=widget.choices)
+
+        html = widget.render("country", "DE").replace(" disabled", "")
+
+        assert html == reference.render("country", "DE")
+
+    def test_options_are_rendered_once_per_key(self):
+        """Test that repeated renders reuse the pre-rendered options."""
+        from djangocms_form_builder_countries.widgets import get_rendered_options
+
+        create_widget(["DE"]).render("country", "DE")
+        create_widget(["de"]).render("country", "FR")
+        create_widget(["DE"], required=False).render("country", None)
+
+        assert get_rendered_options.cache_info().misses == 2
+        assert get_rendered_options.cache_info().hits == 1
+
+    def test_options_are_rendered_per_language(self):
+        """Test that each language gets its own option fragment."""
+        with translation.override("de"):
+            german = create_widget()
+        with translation.override("en"):
+            english = create_widget()
+
+            assert ">Deutschland</option>" in german.render("country", None)
+            assert ">Germany</option>" in english.render("country", None)
+
+    def test_clear_cache_drops_rendered_options(self):
+        """Test that clearing the choice tables also clears the option fragments."""
+        from djangocms_form_builder_countries.choices import clear_cache
+        from djangocms_form_builder_countries.widgets import get_rendered_options
+
+        create_widget().render("country", None)
+        clear_cache()
+
+        assert get_rendered_options.cache_info().currsize == 0
+
+    def test_renders_without_cache_key(self):
+        """Test that the widget falls back to rendering its own choices."""
+        from djangocms_form_builder_countries.widgets import CachedCountrySelect
+
+        widget = CachedCountrySelect(choices=[("DE", "Germany"), ("AT", "Austria")])
+
+        html = widget.render("country", "AT")
+
+        assert html == forms.Select(choices=widget.choices).render("country", "AT")
+
+    def test_escapes_labels(self):
+        """Test that option labels are HTML escaped."""
+        from djangocms_form_builder_countries.widgets import CachedCountrySelect
+
+        widget = CachedCountrySelect(choices=[("", "<b>Pick</b>"), ("DE", "Germany")])
+
+        assert "&lt;b&gt;Pick&lt;/b&gt;" in widget.render("country", None)
+
+
+class TestDeferredCountrySelect:
+    """Tests for the base of the widgets loading their options by a script."""
+
+    def test_renders_all_options_without_script(self):
+        """Test that the base widget has no script to configure and renders like CachedCountrySelect."""
+        from djangocms_form_builder_countries.widgets import DeferredCountrySelect
+
+        reference = create_widget(countries_first=["DE"], required=False)
+        widget = DeferredCountrySelect(choices=reference.choices, cache_key=reference.cache_key)
+
+        assert widget.get_script_attrs("en") is None
+        assert widget.render("country", "AT") == reference.render("country", "AT")
+
+
+class TestRemoteCountrySelect:
+    """Tests for RemoteCountrySelect rendering."""
+
+    def create_remote_widget(self, countries_first=(), required=False):
+        """Create a remote widget for a configuration in the active language."""
+        from djangocms_form_builder_countries.choices import get_choices_for_key, get_choices_key
+        from djangocms_form_builder_countries.widgets import RemoteCountrySelect
+
+        key = get_choices_key(countries_first, required, "")
+        return RemoteCountrySelect(choices=get_choices_for_key(key), cache_key=key)
+
+    def test_renders_only_blank_and_selected_option(self):
+        """Test that the remote widget does not inline the country list."""
+        with translation.override("en"):
+            html = self.create_remote_widget().render("country", "AT")
+
+        assert html.count("<option") == 2
+        assert '<option value="">Select a country</option>' in html
+        assert '<option value="AT" selected>Austria</option>' in html
+
+    def test_required_field_without_value(self):
+        """Test that a required field without value ships no options."""
+        with translation.override("en"):
+            html = self.create_remote_widget(required=True).render("country", None)
+
+        assert "<option" not in html
+
+    def test_search_attributes(self):
+        """Test that the widget points the script to the search endpoint."""
+        with translation.override("de"):
+            html = self.create_remote_widget(countries_first=["de", "AT"]).render("country", None)
+
+        assert 'data-country-search="/countries/search/"' in html
+        assert 'data-language="de"' in html
+        assert 'data-countries-first="DE,AT"' in html
+
+    def test_limited_countries(self):
+        """Test that the widget passes the selectable countries to the script and hides other values."""
+        from djangocms_form_builder_countries.choices import get_choices_for_key, get_choices_key
+        from djangocms_form_builder_countries.widgets import RemoteCountrySelect
+
+        with translation.override("en"):
+            key = get_choices_key(countries=["DE", "AT"])
+            widget = RemoteCountrySelect(choices=get_choices_for_key(key), cache_key=key)
+            html = widget.render("country", "AT")
+            unknown = widget.render("country", "FR")
+
+        assert 'data-countries="AT,DE"' in html
+        assert '<option value="AT" selected>Austria</option>' in html
+        assert "France" not in unknown
+        assert "data-countries=" not in self.create_remote_widget().render("country", None)
+
+    def test_falls_back_without_endpoint(self, settings):
+        """Test that all options are rendered when the endpoint is not installed."""
+        settings.ROOT_URLCONF = "cms.urls"
+
+        html = self.create_remote_widget().render("country", None)
+
+        assert "data-country-search" not in html
+        assert html.count("<option") > 200
+
+
+class TestFrameworkRendering:
+    """Tests for rendering through the form builder templates."""
+
+    def test_widget_gets_select_css_class(self):
+        """Test that the form builder frontend styles the widget like a Select."""
+        from djangocms_form_builder import constants
+
+        from djangocms_form_builder_countries.widgets import CachedCountrySelect, RemoteCountrySelect
+
+        assert constants.attr_dict[CachedCountrySelect.__name__] == constants.attr_dict["Select"]
+        assert constants.attr_dict[RemoteCountrySelect.__name__] == constants.attr_dict["Select"]
+
+    def test_render_widget_tag(self):
+        """Test that the form builder render_widget tag renders the cached widget."""
+        from unittest.mock import Mock
+
+        from djangocms_form_builder_countries.models import CountryField
+
+        instance = Mock(field_name="country", config={"field_label": "Country", "countries_first": ["CH"]})
+        name, field = CountryField.get_form_field(instance)
+        form = type("CountryForm", (forms.Form,), {name: field})(initial={"country": "CH"})
+
+        html = Template("{% load form_builder_tags %}{% render_widget form 'country' %}").render(
+            Context({"form": form})
+        )
+
+        assert '<select name="country" class="form-select" id="id_country">' in html
+        assert '<option value="CH" selected>Switzerland</option>' in html
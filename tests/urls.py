@@ -1,7 +1,10 @@
 """URL configuration for tests."""
 
+from django.contrib import admin
 from django.urls import include, path
 
 urlpatterns = [
+    path("admin/", admin.site.urls),
+    path("countries/", include("djangocms_form_builder_countries.urls")),
     path("", include("cms.urls")),
 ]
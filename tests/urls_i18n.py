@@ -0,0 +1,13 @@
+"""URL configuration for tests of pages served in several languages."""
+
+from django.conf.urls.i18n import i18n_patterns
+from django.contrib import admin
+from django.urls import include, path
+
+urlpatterns = [
+    path("admin/", admin.site.urls),
+    # djangocms_form_builder only installs its URLs into ROOT_URLCONF at startup
+    path("@form-builder/", include("djangocms_form_builder.urls", namespace="form_builder")),
+    path("countries/", include("djangocms_form_builder_countries.urls")),
+    *i18n_patterns(path("", include("cms.urls"))),
+]